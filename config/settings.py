@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'dashboard.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,6 +89,18 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared by every worker process, so the version keys that invalidate the location tree, person choices
+# and marks reach all of them. The table is created by migration 0093 (or `manage.py createcachetable`).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dashboard_cache',
+        'TIMEOUT': 60 * 60 * 24,
+    }
+}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -148,3 +161,12 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DJANGO_ADMIN_PER_PAGE = 20
 
 
+# Query Budgets (dashboard.middleware.QueryBudgetMiddleware)
+QUERY_BUDGET = {
+    'ENABLED': True,
+    'MAX_QUERIES': 50,
+    'MAX_SQL_MS': 500,
+    'MAX_DUPLICATES': 10,
+    'SAMPLE_RATE': 0.05,
+    'VIEW_BUDGETS': {},
+}
@@ -0,0 +1,24 @@
+# Settings for the test / performance suite, which runs on SQLite so no MySQL server is needed:
+#   python manage.py test dashboard --settings=config.settings_test
+from .settings import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_db.sqlite3',
+    }
+}
+
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if not middleware.startswith('debug_toolbar')]
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W001']
+
+# One process, so a local cache is shared anyway and keeps cache reads out of the query counts
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Keep QueryLog writes out of the query counts the suite asserts on
+QUERY_BUDGET = {**QUERY_BUDGET, 'ENABLED': False}
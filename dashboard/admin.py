@@ -1,8 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.conf import settings
 
-from . import models
+from . import models, utils
 from .forms import AdminCustomUserCreationForm, AdminCustomUserChangeForm, ReminderAdminForm
 
 
@@ -53,7 +53,7 @@ class DistrictAdmin(admin.ModelAdmin):
 
 @admin.register(models.SubDistrict)
 class SubDistrictAdmin(admin.ModelAdmin):
-    list_display = ('name', 'district', 'description', 'id')
+    list_display = ('name', 'path', 'description', 'id')
     list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
 
 
@@ -118,22 +118,54 @@ class SessionAdmin(admin.ModelAdmin):
 
 @admin.register(models.Trade)
 class TradeAdmin(admin.ModelAdmin):
-    list_display = ('type', 'code', 'session_code', 'followup_code', 'date', 'price', 'deposit', 'rent',
-                    'contract_owner', 'contract_buyer', 'contract_renter', 'datetime_created')
+    list_display = ('type', 'code', 'session_code', 'file', 'customer', 'followup_code', 'date', 'price', 'deposit',
+                    'rent', 'contract_owner', 'contract_buyer', 'contract_renter', 'datetime_created')
     ordering = ('-datetime_created',)
     list_filter = ('type',)
     readonly_fields = ('code', 'datetime_created',)
     list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
 
+    def file(self, obj):
+        return obj.sale_file or obj.rent_file
+
+    file.short_description = 'فایل'
+
+    def customer(self, obj):
+        return obj.buyer or obj.renter
+
+    customer.short_description = 'مشتری'
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.with_parties()
+
 
 # --------------------------------- MNGs ----------------------------------
 @admin.register(models.TaskBoss)
 class TaskBossAdmin(admin.ModelAdmin):
-    list_display = ('type', 'agent', 'code', 'condition', 'datetime_created')
+    list_display = ('type', 'title', 'agent_name', 'code', 'condition', 'datetime_created')
     ordering = ('-datetime_created',)
     list_filter = ['type', 'condition']
-    readonly_fields = ('code', 'datetime_created',)
+    readonly_fields = ('code', 'title', 'agent_name', 'location_name', 'datetime_created',)
     list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
+    actions = ['approve_tasks', 'reject_tasks']
+
+    def review(self, request, queryset, approve):
+        results = utils.bulk_review_tasks(queryset.values_list('pk', flat=True), approve=approve)
+        done = sum(1 for result in results if result['success'])
+        self.message_user(request, f'{done} وظیفه از {len(results)} وظیفه بررسی شد.',
+                          messages.SUCCESS if done else messages.WARNING)
+        for result in results:
+            if not result['success']:
+                self.message_user(request, f"{result['code'] or result['id']}: {result['message']}", messages.WARNING)
+
+    @admin.action(description='تایید وظایف انتخاب‌شده')
+    def approve_tasks(self, request, queryset):
+        self.review(request, queryset, approve=True)
+
+    @admin.action(description='رد وظایف انتخاب‌شده')
+    def reject_tasks(self, request, queryset):
+        self.review(request, queryset, approve=False)
 
 
 @admin.register(models.Reminder)
@@ -162,7 +194,7 @@ class ReportItemAdmin(admin.ModelAdmin):
     list_display = ('type', 'report', 'file_code', 'customer_code', 'datetime_created',)
     ordering = ('-datetime_created',)
     list_filter = ['type',]
-    readonly_fields = ('datetime_created',)
+    readonly_fields = ('sale_file', 'rent_file', 'buyer', 'renter', 'datetime_created',)
     list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
 
 
@@ -249,3 +281,43 @@ class InteractionItemAdmin(admin.ModelAdmin):
         return qs.select_related('interaction', 'content_type')
 
 
+
+
+# ------------------------------ Phone numbers ------------------------------
+@admin.register(models.PhoneCluster)
+class PhoneClusterAdmin(admin.ModelAdmin):
+    list_display = ('phone_number', 'content_type', 'size', 'datetime_updated')
+    list_filter = ['content_type']
+    search_fields = ['phone_number']
+    readonly_fields = ('content_type', 'phone_number', 'object_ids', 'size', 'datetime_updated')
+    list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
+
+
+# -------------------------------- Archive ---------------------------------
+@admin.register(models.ArchivedRecord)
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    list_display = ('title', 'code', 'content_type', 'object_id', 'reason', 'datetime_archived')
+    list_filter = ['content_type', 'reason']
+    search_fields = ['code', 'title']
+    readonly_fields = ('content_type', 'object_id', 'code', 'title', 'reason', 'data', 'related', 'links',
+                       'datetime_archived')
+    list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
+    actions = ['restore_records']
+
+    @admin.action(description='بازیابی ردیف‌های انتخاب‌شده')
+    def restore_records(self, request, queryset):
+        for record in queryset:
+            utils.restore_archived(record)
+        self.message_user(request, f'{len(queryset)} ردیف بازیابی شد.', messages.SUCCESS)
+
+
+# ------------------------------- Monitoring --------------------------------
+@admin.register(models.QueryLog)
+class QueryLogAdmin(admin.ModelAdmin):
+    list_display = ['view_name', 'method', 'status_code', 'query_count', 'sql_time', 'duplicate_count', 'over_budget', 'datetime_created']
+    list_filter = ['over_budget', 'method', 'view_name']
+    search_fields = ['view_name', 'path']
+    readonly_fields = ['view_name', 'path', 'method', 'status_code', 'query_count', 'sql_time', 'duplicate_count',
+                       'duplicates', 'over_budget', 'datetime_created']
+    date_hierarchy = 'datetime_created'
+    list_per_page = getattr(settings, 'DJANGO_ADMIN_PER_PAGE', 20)
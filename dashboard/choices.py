@@ -27,6 +27,18 @@ statuses = [
 ]
 
 
+# Files also expire once datetime_expired passes (see the sweep_expired command)
+file_statuses = statuses + [
+    ('exp', 'منقضی شده'),
+]
+
+archive_reasons = [
+    ('can', 'لغو شده'),
+    ('exp', 'منقضی شده'),
+    ('del', 'درخواست حذف'),
+]
+
+
 directions = [
     ('nth', _('North')),
     ('sth', _('South')),
@@ -274,3 +286,13 @@ code_finder_types = [
     ('rt', 'مستاجر'),
 ]
 
+
+full_text_types = [
+    ('', 'همه موارد'),
+    ('sf', 'فایل فروش'),
+    ('rf', 'فایل اجاره'),
+    ('by', 'خریدار'),
+    ('rt', 'مستاجر'),
+    ('ps', 'آگهی‌دهنده'),
+]
+
@@ -1,10 +1,13 @@
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django import forms
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from django.utils.translation import gettext as _
 from jdatetime import datetime as jdatetime
 
-from . import models, checkers, choices
+from jalali.fields import JalaliDateField
+
+from . import models, checkers, choices, locations
 
 
 # --------------------------------- CUM ---------------------------------
@@ -26,6 +29,95 @@ class LoginForm(forms.ModelForm):
         fields = ['username', 'password']
 
 
+# --------------------------------- Filter Choices ---------------------------------
+def location_attrs(level, parent=None):
+    attrs = {'data-choices-url': reverse_lazy('location_choices', args=[level])}
+    if parent:
+        attrs['data-parent'] = parent
+    return attrs
+
+
+class LocationFilterMixin:
+    """
+    Fills the location selects of a filter form from the cached location tree.
+    Only the children of the selected parent (plus the selected values) are rendered; filter_choices.js
+    reloads a select from the location_choices endpoint when its parent changes.
+    """
+    location_fields = {
+        'province': (models.Province, None),
+        'city': (models.City, 'province'),
+        'district': (models.District, 'city'),
+        'sub_district': (models.SubDistrict, 'district'),
+        'sub_districts': (models.SubDistrict, 'district'),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        tree = locations.get_tree()
+        for name, (model, parent) in self.location_fields.items():
+            field = self.fields.get(name)
+            if field is None:
+                continue
+            nodes = list(locations.choices(model, self.data.get(parent) if parent else None, tree))
+            selected = self.data.getlist(name) if hasattr(self.data, 'getlist') else [self.data.get(name)]
+            for value in selected:
+                node = tree.get(model, int(value)) if str(value).isdigit() else None
+                if node is not None and node not in nodes:
+                    nodes.append(node)
+            blank = [] if isinstance(field, forms.MultipleChoiceField) else [('', '---------')]
+            field.choices = blank + [(node.pk, node.name) for node in nodes]
+
+
+class PersonAutocompleteWidget(forms.Select):
+    """
+    Renders only the selected person; filter_choices.js fetches other options from person_autocomplete.
+    """
+    def __init__(self, attrs=None):
+        super().__init__({'data-autocomplete-url': reverse_lazy('person_autocomplete'), **(attrs or {})})
+        self.validated = None
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        ids = [str(pk) for pk in value if str(pk).isdigit()]
+        if self.validated is not None and ids == [str(self.validated.pk)]:
+            selected = [self.validated]
+        else:
+            selected = choices.queryset.filter(pk__in=ids) if ids else []
+        self.choices = [('', '---------')] + [(person.pk, choices.field.label_from_instance(person)) for person in selected]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class PersonChoiceField(forms.ModelChoiceField):
+    """
+    Person select fed by the autocomplete endpoint. The posted id is validated with a single query and
+    the widget reuses that person when the form is rendered again.
+    """
+    widget = PersonAutocompleteWidget
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', models.Person.objects.all())
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        person = super().to_python(value)
+        self.widget.validated = person
+        return person
+
+
+class PersonFieldMixin:
+    """
+    For model forms with a PersonChoiceField: the field has already loaded the person, so the model's
+    foreign key check (a second query for the same id) is skipped.
+    """
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.add('person')
+        return exclude
+
+
 # --------------------------------- Sale Files ---------------------------------
 create_sale_file_fields = ['province', 'city', 'district', 'sub_district', 'address', 'street', 'price_announced', 'price_min', 'room',
                            'area', 'age', 'document', 'level', 'parking', 'elevator', 'warehouse', 'title', 'description', 'source',
@@ -38,10 +130,13 @@ sale_file_required_fields = ['province', 'city', 'district', 'sub_district', 'ad
                              'age', 'document', 'level', 'parking', 'elevator', 'warehouse', 'title', 'description', 'source',]
 
 
-class SaleFileCreateForm(forms.ModelForm):
+class SaleFileCreateForm(PersonFieldMixin, forms.ModelForm):
     class Meta:
         model = models.SaleFile
         fields = create_sale_file_fields
+        field_classes = {
+            'person': PersonChoiceField,
+        }
         widgets = {
             'province': forms.Select(attrs={'id': 'province'}),
             'city': forms.Select(attrs={'id': 'city'}),
@@ -74,12 +169,16 @@ class SaleFileCreateForm(forms.ModelForm):
         return cleaned_data
 
 
-class SaleFileFilterForm(forms.Form):
-    province = forms.ModelChoiceField(queryset=models.Province.objects.all(), required=False, label=_('Province'))
-    city = forms.ModelChoiceField(queryset=models.City.objects.all(), required=False, label=_('City'))
-    district = forms.ModelChoiceField(queryset=models.District.objects.all(), required=False, label=_('District'))
-    sub_district = forms.ModelChoiceField(queryset=models.SubDistrict.objects.all(), required=False, label=_('Sub-District'))
-    person = forms.ModelChoiceField(queryset=models.Person.objects.all(), required=False, label=_('Person'))
+class SaleFileFilterForm(LocationFilterMixin, forms.Form):
+    province = forms.TypedChoiceField(coerce=int, required=False, label=_('Province'),
+                                      widget=forms.Select(attrs=location_attrs('provinces')))
+    city = forms.TypedChoiceField(coerce=int, required=False, label=_('City'),
+                                  widget=forms.Select(attrs=location_attrs('cities', 'province')))
+    district = forms.TypedChoiceField(coerce=int, required=False, label=_('District'),
+                                      widget=forms.Select(attrs=location_attrs('districts', 'city')))
+    sub_district = forms.TypedChoiceField(coerce=int, required=False, label=_('Sub-District'),
+                                          widget=forms.Select(attrs=location_attrs('sub-districts', 'district')))
+    person = PersonChoiceField(required=False, label=_('Person'))
     source = forms.ChoiceField(choices=[('', '---------')] + choices.sources, required=False, label=_('Source'))
     min_price = forms.IntegerField(required=False, label=_('Min Price'))
     max_price = forms.IntegerField(required=False, label=_('Max Price'))
@@ -97,8 +196,8 @@ class SaleFileFilterForm(forms.Form):
     warehouse = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Warehouse'))
     has_images = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Images'))
     has_video = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Video'))
-    min_date = forms.CharField(required=False, label='از تاریخ')
-    max_date = forms.CharField(required=False, label='تا تاریخ')
+    min_date = JalaliDateField(required=False, label='از تاریخ')
+    max_date = JalaliDateField(required=False, label='تا تاریخ')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -123,7 +222,7 @@ class SaleFileFilterForm(forms.Form):
 
 
 class SaleFileAgentFilterForm(forms.Form):
-    person = forms.ModelChoiceField(queryset=models.Person.objects.all(), required=False, label=_('Person'))
+    person = PersonChoiceField(required=False, label=_('Person'))
     source = forms.ChoiceField(choices=[('', '---------')] + choices.sources, required=False, label=_('Source'))
     min_price = forms.IntegerField(required=False, label=_('Min Price'))
     max_price = forms.IntegerField(required=False, label=_('Max Price'))
@@ -141,8 +240,8 @@ class SaleFileAgentFilterForm(forms.Form):
     warehouse = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Warehouse'))
     has_images = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Images'))
     has_video = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Video'))
-    min_date = forms.CharField(required=False, label='از تاریخ')
-    max_date = forms.CharField(required=False, label='تا تاریخ')
+    min_date = JalaliDateField(required=False, label='از تاریخ')
+    max_date = JalaliDateField(required=False, label='تا تاریخ')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -216,10 +315,13 @@ rent_file_required_fields = ['province', 'city', 'district', 'sub_district', 'ad
                              'description', 'source',]
 
 
-class RentFileCreateForm(forms.ModelForm):
+class RentFileCreateForm(PersonFieldMixin, forms.ModelForm):
     class Meta:
         model = models.RentFile
         fields = create_rent_file_fields
+        field_classes = {
+            'person': PersonChoiceField,
+        }
         widgets = {
             'province': forms.Select(attrs={'id': 'province'}),
             'city': forms.Select(attrs={'id': 'city'}),
@@ -258,12 +360,16 @@ class RentFileCreateForm(forms.ModelForm):
         return cleaned_data
 
 
-class RentFileFilterForm(forms.Form):
-    province = forms.ModelChoiceField(queryset=models.Province.objects.all(), required=False, label=_('Province'))
-    city = forms.ModelChoiceField(queryset=models.City.objects.all(), required=False, label=_('City'))
-    district = forms.ModelChoiceField(queryset=models.District.objects.all(), required=False, label=_('District'))
-    sub_district = forms.ModelChoiceField(queryset=models.SubDistrict.objects.all(), required=False, label=_('Sub-District'))
-    person = forms.ModelChoiceField(queryset=models.Person.objects.all(), required=False, label=_('Person'))
+class RentFileFilterForm(LocationFilterMixin, forms.Form):
+    province = forms.TypedChoiceField(coerce=int, required=False, label=_('Province'),
+                                      widget=forms.Select(attrs=location_attrs('provinces')))
+    city = forms.TypedChoiceField(coerce=int, required=False, label=_('City'),
+                                  widget=forms.Select(attrs=location_attrs('cities', 'province')))
+    district = forms.TypedChoiceField(coerce=int, required=False, label=_('District'),
+                                      widget=forms.Select(attrs=location_attrs('districts', 'city')))
+    sub_district = forms.TypedChoiceField(coerce=int, required=False, label=_('Sub-District'),
+                                          widget=forms.Select(attrs=location_attrs('sub-districts', 'district')))
+    person = PersonChoiceField(required=False, label=_('Person'))
     source = forms.ChoiceField(choices=[('', '---------')] + choices.sources, required=False, label=_('Source'))
     min_deposit = forms.IntegerField(required=False, label=_('Min Deposit'))
     max_deposit = forms.IntegerField(required=False, label=_('Max Deposit'))
@@ -284,8 +390,8 @@ class RentFileFilterForm(forms.Form):
     warehouse = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Warehouse'))
     has_images = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Images'))
     has_video = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Video'))
-    min_date = forms.CharField(required=False, label='از تاریخ')
-    max_date = forms.CharField(required=False, label='تا تاریخ')
+    min_date = JalaliDateField(required=False, label='از تاریخ')
+    max_date = JalaliDateField(required=False, label='تا تاریخ')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -318,7 +424,7 @@ class RentFileFilterForm(forms.Form):
 
 
 class RentFileAgentFilterForm(forms.Form):
-    person = forms.ModelChoiceField(queryset=models.Person.objects.all(), required=False, label=_('Person'))
+    person = PersonChoiceField(required=False, label=_('Person'))
     source = forms.ChoiceField(choices=[('', '---------')] + choices.sources, required=False, label=_('Source'))
     min_deposit = forms.IntegerField(required=False, label=_('Min Deposit'))
     max_deposit = forms.IntegerField(required=False, label=_('Max Deposit'))
@@ -339,8 +445,8 @@ class RentFileAgentFilterForm(forms.Form):
     warehouse = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Warehouse'))
     has_images = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Images'))
     has_video = forms.ChoiceField(choices=[('', '---------')] + choices.booleans, required=False, label=_('Has Video'))
-    min_date = forms.CharField(required=False, label='از تاریخ')
-    max_date = forms.CharField(required=False, label='تا تاریخ')
+    min_date = JalaliDateField(required=False, label='از تاریخ')
+    max_date = JalaliDateField(required=False, label='تا تاریخ')
 
     def clean(self):
         cleaned_data = super().clean()
@@ -527,16 +633,19 @@ class BuyerCreateForm(forms.ModelForm):
         return cleaned_data
 
 
-class BuyerFilterForm(forms.Form):
-    sub_districts = forms.ModelMultipleChoiceField(
-        queryset=models.SubDistrict.objects.all(),
-        widget=forms.SelectMultiple(attrs={'class': 'select2'}),
+class BuyerFilterForm(LocationFilterMixin, forms.Form):
+    sub_districts = forms.TypedMultipleChoiceField(
+        coerce=int,
+        widget=forms.SelectMultiple(attrs={'class': 'select2', **location_attrs('sub-districts', 'district')}),
         required=False,
         label='Sub-Districts'
     )
-    province = forms.ModelChoiceField(queryset=models.Province.objects.all(), required=False, label=_('Province'))
-    city = forms.ModelChoiceField(queryset=models.City.objects.all(), required=False, label=_('City'))
-    district = forms.ModelChoiceField(queryset=models.District.objects.all(), required=False, label=_('District'))
+    province = forms.TypedChoiceField(coerce=int, required=False, label=_('Province'),
+                                      widget=forms.Select(attrs=location_attrs('provinces')))
+    city = forms.TypedChoiceField(coerce=int, required=False, label=_('City'),
+                                  widget=forms.Select(attrs=location_attrs('cities', 'province')))
+    district = forms.TypedChoiceField(coerce=int, required=False, label=_('District'),
+                                      widget=forms.Select(attrs=location_attrs('districts', 'city')))
     min_budget = forms.IntegerField(required=False, label=_('Min Budget'))
     max_budget = forms.IntegerField(required=False, label=_('Max Budget'))
     min_area = forms.IntegerField(required=False, label=_('Min Area'))
@@ -661,16 +770,19 @@ class RenterCreateForm(forms.ModelForm):
         return cleaned_data
 
 
-class RenterFilterForm(forms.Form):
-    sub_districts = forms.ModelMultipleChoiceField(
-        queryset=models.SubDistrict.objects.all(),
-        widget=forms.SelectMultiple(attrs={'class': 'select2'}),
+class RenterFilterForm(LocationFilterMixin, forms.Form):
+    sub_districts = forms.TypedMultipleChoiceField(
+        coerce=int,
+        widget=forms.SelectMultiple(attrs={'class': 'select2', **location_attrs('sub-districts', 'district')}),
         required=False,
         label='Sub-Districts'
     )
-    province = forms.ModelChoiceField(queryset=models.Province.objects.all(), required=False, label=_('Province'))
-    city = forms.ModelChoiceField(queryset=models.City.objects.all(), required=False, label=_('City'))
-    district = forms.ModelChoiceField(queryset=models.District.objects.all(), required=False, label=_('District'))
+    province = forms.TypedChoiceField(coerce=int, required=False, label=_('Province'),
+                                      widget=forms.Select(attrs=location_attrs('provinces')))
+    city = forms.TypedChoiceField(coerce=int, required=False, label=_('City'),
+                                  widget=forms.Select(attrs=location_attrs('cities', 'province')))
+    district = forms.TypedChoiceField(coerce=int, required=False, label=_('District'),
+                                      widget=forms.Select(attrs=location_attrs('districts', 'city')))
     min_deposit = forms.IntegerField(required=False, label=_('Min Deposit'))
     max_deposit = forms.IntegerField(required=False, label=_('Max Deposit'))
     min_rent = forms.IntegerField(required=False, label=_('Min Rent'))
@@ -784,6 +896,28 @@ class CodeFinderForm(forms.Form):
     )
 
 
+
+class FullTextSearchForm(forms.Form):
+    q = forms.CharField(
+        max_length=200,
+        required=True,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control form-control-xl form-control-outlined',
+            'id': 'q',
+            'placeholder': 'عنوان، آدرس، نام، تلفن یا کد',
+        })
+    )
+
+    type = forms.ChoiceField(
+        choices=choices.full_text_types,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'form-control form-control-xl form-control-outlined',
+            'id': 'type'
+        })
+    )
+
+
 # --------------------------------- Locations ---------------------------------
 class ProvinceCreateForm(forms.ModelForm):
     class Meta:
@@ -1363,29 +1497,29 @@ class ReportItemForm(forms.ModelForm):
         if item_type == 'service' and not customer_code:
             self.add_error('customer_code', 'کد مشتری برای نوع خدمات الزامی است.')
 
-        sale_file_codes = list(
-            models.SaleFile.objects.exclude(delete_request='Yes').filter(status='acc').values_list('code', flat=True))
-        rent_file_codes = list(
-            models.RentFile.objects.exclude(delete_request='Yes').filter(status='acc').values_list('code', flat=True))
-        buyer_codes = list(
-            models.Buyer.objects.exclude(delete_request='Yes').filter(status='acc').values_list('code', flat=True))
-        renter_codes = list(
-            models.Renter.objects.exclude(delete_request='Yes').filter(status='acc').values_list('code', flat=True))
+        is_sale_file = bool(file_code) and (models.SaleFile.objects.exclude(delete_request='Yes')
+                                            .filter(status='acc', code=file_code).exists())
+        is_rent_file = bool(file_code) and (models.RentFile.objects.exclude(delete_request='Yes')
+                                            .filter(status='acc', code=file_code).exists())
+        is_buyer = bool(customer_code) and (models.Buyer.objects.exclude(delete_request='Yes')
+                                            .filter(status='acc', code=customer_code).exists())
+        is_renter = bool(customer_code) and (models.Renter.objects.exclude(delete_request='Yes')
+                                             .filter(status='acc', code=customer_code).exists())
 
         if file_code:
-            if file_code not in sale_file_codes and file_code not in rent_file_codes:
+            if not is_sale_file and not is_rent_file:
                 self.add_error('file_code', 'کد فایل وجود ندارد.')
         if customer_code:
-            if customer_code not in buyer_codes and customer_code not in renter_codes:
+            if not is_buyer and not is_renter:
                 self.add_error('customer_code', 'کد مشتری وجود ندارد.')
 
         if item_type == 'ser' and file_code and customer_code:
-            if file_code in sale_file_codes:
-                if customer_code not in buyer_codes:
+            if is_sale_file:
+                if not is_buyer:
                     self.add_error('file_code', 'فایل و مشتری باید از یک نوع باشند.')
                     self.add_error('customer_code', 'فایل و مشتری باید از یک نوع باشند.')
-            if file_code in rent_file_codes:
-                if customer_code not in renter_codes:
+            if is_rent_file:
+                if not is_renter:
                     self.add_error('file_code', 'فایل و مشتری باید از یک نوع باشند.')
                     self.add_error('customer_code', 'فایل و مشتری باید از یک نوع باشند.')
         return cleaned_data
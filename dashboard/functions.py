@@ -1,228 +1,122 @@
-from jdatetime import date, timedelta, datetime
-from jalali_date import datetime2jalali
+import re
+from collections import namedtuple
+from functools import lru_cache
+
 from django.utils import timezone
 
+from jalali import conversion
+from jalali.conversion import weekday_names
+
 
-def current_month():
-    now = timezone.now()
-    today = datetime2jalali(now)
-    past_days = []
-    for i in range(0, 31):
-        past_day = today - timedelta(days=i)
-        if past_day.month == today.month:
-            past_day = past_day.strftime('%Y/%m/%d')
-            past_days.append(past_day)
-    future_days = []
-    for i in range(1, 31):
-        next_day = today + timedelta(days=i)
-        if next_day.month == today.month:
-            next_day = next_day.strftime('%Y/%m/%d')
-            future_days.append(next_day)
-    return sorted(past_days + future_days, key=lambda x: int(x.split('/')[2]))
-
-
-def previous_month():
-    now = timezone.now()
-    today = datetime2jalali(now)
-    first_day_current = today.replace(day=1)
-    last_day_previous = first_day_current - timedelta(days=1)
-    first_day_previous = last_day_previous.replace(day=1)
-    days_list = []
-    this_day = first_day_previous
-    while this_day.month == last_day_previous.month:
-        days_list.append(this_day.strftime('%Y/%m/%d'))
-        this_day += timedelta(days=1)
-    return days_list
-
-
-def previous_2_month():
-    now = timezone.now()
-    today = datetime2jalali(now)
-    target_month = today.month - 2
-    target_year = today.year
-    if target_month <= 0:
-        target_month += 12
-        target_year -= 1
-    first_day_target = today.replace(year=target_year, month=target_month, day=1)
-    days_list = []
-    this_day = first_day_target
-    while this_day.month == target_month:
-        days_list.append(this_day.strftime('%Y/%m/%d'))
-        this_day += timedelta(days=1)
-    return days_list
-
-
-def next_month():
-    now = timezone.now()
-    today = datetime2jalali(now)
-    target_month = today.month + 1
-    target_year = today.year
-    if target_month > 12:
-        target_month = 1
-        target_year += 1
-    first_day_next = today.replace(year=target_year, month=target_month, day=1)
-    days_list = []
-    this_day = first_day_next
-    while this_day.month == target_month:
-        days_list.append(this_day.strftime('%Y/%m/%d'))
-        this_day += timedelta(days=1)
-    return days_list
-
-
-def next_2_month():
-    now = timezone.now()
-    today = datetime2jalali(now)
-    target_month = today.month + 2
-    target_year = today.year
-    if target_month > 12:
-        target_month -= 12
-        target_year += 1
-    first_day_target = today.replace(year=target_year, month=target_month, day=1)
-    days_list = []
-    this_day = first_day_target
-    while this_day.month == target_month:
-        days_list.append(this_day.strftime('%Y/%m/%d'))
-        this_day += timedelta(days=1)
-    return days_list
-
-
-def current_month_finder(number):
-    number = str(number)
-    if number == '1':
-        return 'فروردین'
-    if number == '2':
-        return 'اردیبهشت'
-    if number == '3':
-        return 'خرداد'
-    if number == '4':
-        return 'تیر'
-    if number == '5':
-        return 'مرداد'
-    if number == '6':
-        return 'شهریور'
-    if number == '7':
-        return 'مهر'
-    if number == '8':
-        return 'آبان'
-    if number == '9':
-        return 'آذر'
-    if number == '10':
-        return 'دی'
-    if number == '11':
-        return 'بهمن'
-    if number == '12':
-        return 'اسفند'
-
-
-def previous_month_finder(number):
-    number = str(number)
-    if number == '1':
-        return 'اسفند'
-    if number == '2':
-        return 'فروردین'
-    if number == '3':
-        return 'اردیبهشت'
-    if number == '4':
-        return 'خرداد'
-    if number == '5':
-        return 'تیر'
-    if number == '6':
-        return 'مرداد'
-    if number == '7':
-        return 'شهریور'
-    if number == '8':
-        return 'مهر'
-    if number == '9':
-        return 'آبان'
-    if number == '10':
-        return 'آذر'
-    if number == '11':
-        return 'دی'
-    if number == '12':
-        return 'بهمن'
-
-
-def previous_2_month_finder(number):
-    number = str(number)
-    if number == '1':
-        return 'بهمن'
-    if number == '2':
-        return 'اسفند'
-    if number == '3':
-        return 'فروردین'
-    if number == '4':
-        return 'اردیبهشت'
-    if number == '5':
-        return 'خرداد'
-    if number == '6':
-        return 'تیر'
-    if number == '7':
-        return 'مرداد'
-    if number == '8':
-        return 'شهریور'
-    if number == '9':
-        return 'مهر'
-    if number == '10':
-        return 'آبان'
-    if number == '11':
-        return 'آذر'
-    if number == '12':
-        return 'دی'
-
-
-def next_month_finder(number):
-    number = str(number)
-    if number == '1':
-        return 'اردیبهشت'
-    if number == '2':
-        return 'خرداد'
-    if number == '3':
-        return 'تیر'
-    if number == '4':
-        return 'مرداد'
-    if number == '5':
-        return 'شهریور'
-    if number == '6':
-        return 'مهر'
-    if number == '7':
-        return 'آبان'
-    if number == '8':
-        return 'آذر'
-    if number == '9':
-        return 'دی'
-    if number == '10':
-        return 'بهمن'
-    if number == '11':
-        return 'اسفند'
-    if number == '12':
-        return 'فروردین'
-
-
-def next_2_month_finder(number):
-    number = str(number)
-    if number == '1':
-        return 'خرداد'
-    if number == '2':
-        return 'تیر'
-    if number == '3':
-        return 'مرداد'
-    if number == '4':
-        return 'شهریور'
-    if number == '5':
-        return 'مهر'
-    if number == '6':
-        return 'آبان'
-    if number == '7':
-        return 'آذر'
-    if number == '8':
-        return 'دی'
-    if number == '9':
-        return 'بهمن'
-    if number == '10':
-        return 'اسفند'
-    if number == '11':
-        return 'فروردین'
-    if number == '12':
-        return 'اردیبهشت'
+month_names = ('فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
+               'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند')
 
 
+# Fixed solar holidays as (month, day); lunar holidays move every year and are not listed here.
+solar_holidays = frozenset({
+    (1, 1), (1, 2), (1, 3), (1, 4), (1, 12), (1, 13),
+    (3, 14), (3, 15), (11, 22), (12, 29),
+})
+
+CalendarDay = namedtuple('CalendarDay', ['date', 'day', 'weekday', 'weekday_name', 'is_holiday'])
+JalaliDate = namedtuple('JalaliDate', ['year', 'month', 'day'])
+
+
+def jalali_today():
+    return JalaliDate(*conversion.gregorian_to_jalali(timezone.now()))
+
+
+def shift_month(year, month, offset):
+    """
+    Move (year, month) by `offset` months, crossing year boundaries as needed.
+    """
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+
+def month_length(year, month):
+    if month <= 6:
+        return 31
+    if month <= 11:
+        return 30
+    return 30 if conversion.is_leap(year) else 29
+
+
+@lru_cache(maxsize=256)
+def month_grid(year, month):
+    """
+    Memoized grid of a Jalali month.
+
+    Returns:
+        tuple of CalendarDay, one per day of the month
+    """
+    weekday = conversion.ordinal_weekday(conversion.jalali_to_ordinal(year, month, 1))
+    days = []
+    for day in range(1, month_length(year, month) + 1):
+        days.append(CalendarDay(
+            date=f'{year:04d}/{month:02d}/{day:02d}',
+            day=day,
+            weekday=weekday,
+            weekday_name=weekday_names[weekday],
+            is_holiday=weekday == 6 or (month, day) in solar_holidays,
+        ))
+        weekday = (weekday + 1) % 7
+    return tuple(days)
+
+
+def month_days(offset=0, today=None):
+    """
+    Day strings ('YYYY/MM/DD') of the month `offset` months away from the current one.
+    """
+    today = today or jalali_today()
+    year, month = shift_month(today.year, today.month, offset)
+    return [day.date for day in month_grid(year, month)]
+
+
+def month_name(month, offset=0):
+    return month_names[(int(month) - 1 + offset) % 12]
+
+
+def month_bounds(year, month):
+    """
+    First and last day strings of a Jalali month, for range lookups on the 'YYYY/MM/DD' date columns.
+    """
+    grid = month_grid(year, month)
+    return grid[0].date, grid[-1].date
+
+
+# Persian and Arabic-Indic digits to ASCII
+_phone_digits = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+
+def normalize_phone(phone):
+    """
+    Canonical 09xxxxxxxxx form of a mobile number typed with Persian digits, spaces or dashes,
+    or with a +98/0098/98 prefix. Anything else comes back digits-only.
+    """
+    digits = re.sub(r'\D', '', (phone or '').translate(_phone_digits))
+    if digits.startswith('0098'):
+        digits = digits[4:]
+    elif digits.startswith('98') and len(digits) == 12:
+        digits = digits[2:]
+    if len(digits) == 10 and digits.startswith('9'):
+        digits = '0' + digits
+    return digits[:11]
+
+
+def normalize_phone_prefix(text):
+    """
+    The typed start of a mobile number in the same 09xx form as normalize_phone,
+    or '' when the text is not a number (e.g. a name).
+    """
+    text = (text or '').translate(_phone_digits).strip()
+    if not re.fullmatch(r'\+?[\d\s-]+', text):
+        return ''
+    digits = re.sub(r'\D', '', text)
+    if digits.startswith('0098'):
+        digits = '0' + digits[4:]
+    elif digits.startswith('98'):
+        digits = '0' + digits[2:]
+    elif digits.startswith('9'):
+        digits = '0' + digits
+    return digits[:11]
@@ -0,0 +1,165 @@
+"""
+Location hierarchy (province > city > district > sub-district) served from a cache.
+
+The tree is read with four flat queries, stored in the shared cache under a version key and kept
+per process, so a request normally costs one cache lookup. Location saves and deletes (the location
+views, admin, cascades) bump the version through signals.py, which makes every process reload.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Province, City, District, SubDistrict
+
+
+VERSION_CACHE_KEY = 'location_tree_version'
+TREE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# URL name of each level -> (model, parent model)
+LEVELS = {
+    'provinces': (Province, None),
+    'cities': (City, Province),
+    'districts': (District, City),
+    'sub-districts': (SubDistrict, District),
+}
+
+# (version, tree) of this process
+_local = {'version': None, 'tree': None}
+
+
+class Location:
+    """
+    One node of the cached tree; prints as its name so templates can use it like the model instance.
+    """
+    __slots__ = ('pk', 'name', 'parent', 'children', 'path')
+
+    def __init__(self, pk, name, parent=None):
+        self.pk = pk
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.path = name if parent is None else SubDistrict.build_path(parent.path, name)
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def id(self):
+        return self.pk
+
+    # Parent aliases matching the model foreign keys, so templates written for the models
+    # (`sub_district.district.city`) work on the tree as they are
+    @property
+    def district(self):
+        return self.parent
+
+    city = province = district
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f'<Location {self.pk}: {self.path}>'
+
+
+class LocationTree:
+    """
+    All locations, each level as a list in id order plus an id map per level.
+    """
+    def __init__(self):
+        self.provinces, self.cities, self.districts, self.sub_districts = [], [], [], []
+        self.by_level = {Province: {}, City: {}, District: {}, SubDistrict: {}}
+
+    def add(self, model, pk, name, parent=None):
+        node = Location(pk, name, parent)
+        self.by_level[model][pk] = node
+        {Province: self.provinces, City: self.cities, District: self.districts,
+         SubDistrict: self.sub_districts}[model].append(node)
+        return node
+
+    def get(self, model, pk):
+        return self.by_level[model].get(pk)
+
+
+def build_tree():
+    tree = LocationTree()
+    for pk, name in Province.objects.order_by('pk').values_list('pk', 'name'):
+        tree.add(Province, pk, name)
+    levels = ((City, Province, 'province_id'), (District, City, 'city_id'), (SubDistrict, District, 'district_id'))
+    for model, parent_model, parent_field in levels:
+        for pk, name, parent_id in model.objects.order_by('pk').values_list('pk', 'name', parent_field):
+            parent = tree.get(parent_model, parent_id)
+            if parent is not None:
+                tree.add(model, pk, name, parent)
+    return tree
+
+
+def current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def get_tree():
+    """
+    The location tree for the current version: from this process, else the shared cache, else the database.
+    """
+    version = current_version()
+    if _local['version'] == version:
+        return _local['tree']
+    key = f'location_tree_{version}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_tree()
+        cache.set(key, tree, TREE_CACHE_TIMEOUT)
+    _local.update(version=version, tree=tree)
+    return tree
+
+
+def choices(model, parent_id=None, tree=None):
+    """
+    Locations of one level for a cascading dropdown: every province, or the children of the given parent.
+
+    Args:
+        model: Province, City, District or SubDistrict
+        parent_id: id of the selected parent, ignored for provinces
+
+    Returns:
+        list: Location nodes, empty when the parent is unknown
+    """
+    tree = tree or get_tree()
+    if model is Province:
+        return tree.provinces
+    parent_model = next(parent for level, parent in LEVELS.values() if level is model)
+    try:
+        parent = tree.get(parent_model, int(parent_id))
+    except (TypeError, ValueError):
+        return []
+    return parent.children if parent is not None else []
+
+
+def invalidate():
+    # Bumped after commit so other processes cannot cache a tree read before the change was visible
+    transaction.on_commit(lambda: cache.set(VERSION_CACHE_KEY, time.time_ns(), None))
+
+
+def refresh_paths(sub_districts):
+    """
+    Rewrite SubDistrict.path for the given queryset, e.g. the descendants of a renamed city.
+
+    Returns:
+        int: number of paths that changed
+    """
+    changed = []
+    for sub_district in sub_districts.select_related('district__city__province').only(
+            'id', 'name', 'path', 'district__name', 'district__city__name', 'district__city__province__name'):
+        district = sub_district.district
+        path = SubDistrict.build_path(district.city.province.name, district.city.name, district.name,
+                                      sub_district.name)
+        if path != sub_district.path:
+            sub_district.path = path
+            changed.append(sub_district)
+    SubDistrict.objects.bulk_update(changed, ['path'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.utils import ARCHIVE_DAYS, ARCHIVE_MODELS, archive_candidates, archive_rows
+
+
+class Command(BaseCommand):
+    help = '''Move cancelled, expired and delete-requested files and customers into the archive table.
+
+    Rows are moved in batches, one transaction per batch. Bosses can still find them with the "include archived"
+    search mode and bring them back through the recover pages. Schedule it, e.g. nightly from cron:
+        0 3 * * * python manage.py archive_cold_rows
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_DAYS, help='Only archive rows cold for this many days')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows per transaction')
+        parser.add_argument('--limit', type=int, help='Stop after this many rows per model')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        for model in ARCHIVE_MODELS:
+            candidates = archive_candidates(model, days=options['days'])
+            if options['dry_run']:
+                self.stdout.write(f'{model.__name__}: {candidates.count()} rows would be archived')
+                continue
+            archived = 0
+            while options['limit'] is None or archived < options['limit']:
+                size = batch_size if options['limit'] is None else min(batch_size, options['limit'] - archived)
+                ids = list(candidates.values_list('pk', flat=True)[:size])
+                if not ids:
+                    break
+                archived += archive_rows(model, ids)
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'{model.__name__}: {archived} rows archived'))
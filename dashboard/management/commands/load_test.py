@@ -0,0 +1,247 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import resolve, reverse, NoReverseMatch, Resolver404
+
+from dashboard.models import CustomUserModel, SaleFile, RentFile, Buyer, TaskBoss
+
+
+class Command(BaseCommand):
+    help = '''Replay a JSON-lines request log against the app in-process and report latency per url name.
+
+    Each line is one request, e.g.
+        {"name": "sale_file_list", "params": {"min_area": 80}, "user": "boss", "weight": 5}
+        {"name": "toggle_marks", "method": "POST", "data": {"items": ["sf:12", "by:3"]}, "user": "agent1"}
+        {"path": "/tasks/boss/approve/7/abc/", "method": "POST", "data": {"status": "acc", "condition": "cl"}}
+    Requests are drawn by weight (default 1), so a raw access log replays with its own traffic mix.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', nargs='?', help='JSON-lines request log')
+        parser.add_argument('--requests', type=int, help='Number of requests to send (default: one per log line)')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--mode', choices=['weighted', 'sequential'], default='weighted',
+                            help='Draw requests by weight, or replay the log in order')
+        parser.add_argument('--warmup', type=int, default=0, help='Requests per thread sent before measuring')
+        parser.add_argument('--user', help='Username for entries without a "user" key')
+        parser.add_argument('--host', default='localhost', help='Host header; must be in ALLOWED_HOSTS')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--write-sample', metavar='PATH', help='Write a sample request mix built from the current '
+                                                                   'database to PATH and exit')
+
+    def handle(self, *args, **options):
+        if options['write_sample']:
+            self.write_sample(options['write_sample'])
+            return
+        if not options['log']:
+            raise CommandError('A request log is required (or use --write-sample)')
+
+        entries = self.load_entries(options['log'], options['user'])
+        total = options['requests'] or len(entries)
+        threads = max(options['threads'], 1)
+        rng = random.Random(options['seed'])
+        if options['mode'] == 'sequential':
+            plan = [entries[index % len(entries)] for index in range(total)]
+        else:
+            plan = rng.choices(entries, weights=[entry['weight'] for entry in entries], k=total)
+
+        users = {user.username: user for user in
+                 CustomUserModel.objects.filter(username__in={entry['user'] for entry in entries if entry['user']})}
+        missing = {entry['user'] for entry in entries if entry['user']} - set(users)
+        if missing:
+            raise CommandError(f'Unknown users in log: {", ".join(sorted(missing))}')
+
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+
+        def worker(chunk):
+            clients = {}
+            try:
+                for entry in plan[:options['warmup']]:
+                    self.send(clients, users, entry, options['host'])
+                for entry in chunk:
+                    elapsed, status = self.send(clients, users, entry, options['host'])
+                    with lock:
+                        timings[entry['label']].append(elapsed)
+                        if status >= 400:
+                            errors[entry['label']] += 1
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(plan[index::threads],)) for index in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        wall_time = time.perf_counter() - started
+
+        results = self.summarize(timings, errors, wall_time)
+        baseline = self.load_baseline(options['baseline'])
+        self.print_results(results, wall_time, threads, baseline)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({'wall_time': wall_time, 'threads': threads, 'results': results}, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def load_entries(self, path, default_user):
+        entries = []
+        with open(path, encoding='utf-8') as handle:
+            for number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    raw = json.loads(line)
+                except ValueError as error:
+                    raise CommandError(f'Line {number}: invalid JSON ({error})')
+                entries.append(self.parse_entry(raw, number, default_user))
+        if not entries:
+            raise CommandError('The request log is empty')
+        return entries
+
+    @staticmethod
+    def parse_entry(raw, number, default_user):
+        if 'path' in raw:
+            path = raw['path']
+        elif 'name' in raw:
+            try:
+                path = reverse(raw['name'], args=raw.get('args') or [])
+            except NoReverseMatch:
+                raise CommandError(f'Line {number}: no url named {raw["name"]!r} with args {raw.get("args")}')
+        else:
+            raise CommandError(f'Line {number}: needs "name" or "path"')
+        try:
+            label = raw.get('name') or resolve(urlsplit(path).path).url_name or path
+        except Resolver404:
+            raise CommandError(f'Line {number}: {path} does not match any url')
+        return {
+            'label': label,
+            'path': path,
+            'method': raw.get('method', 'GET').upper(),
+            'params': raw.get('params') or {},
+            'data': raw.get('data') or {},
+            'user': raw.get('user') or default_user,
+            'weight': float(raw.get('weight', 1)),
+        }
+
+    @staticmethod
+    def send(clients, users, entry, host):
+        client = clients.get(entry['user'])
+        if client is None:
+            client = clients[entry['user']] = Client(raise_request_exception=False, HTTP_HOST=host)
+            if entry['user']:
+                client.force_login(users[entry['user']])
+        start = time.perf_counter()
+        if entry['method'] == 'GET':
+            response = client.get(entry['path'], entry['params'])
+        else:
+            response = client.generic(entry['method'], entry['path'], data=urlencode(entry['data'], doseq=True),
+                                      content_type='application/x-www-form-urlencoded')
+        return time.perf_counter() - start, response.status_code
+
+    @staticmethod
+    def summarize(timings, errors, wall_time):
+        results = {}
+        for label, values in timings.items():
+            values.sort()
+            results[label] = {
+                'count': len(values),
+                'errors': errors[label],
+                'p50': _percentile(values, 50) * 1000,
+                'p95': _percentile(values, 95) * 1000,
+                'p99': _percentile(values, 99) * 1000,
+                'throughput': len(values) / wall_time if wall_time else 0,
+            }
+        return results
+
+    @staticmethod
+    def load_baseline(path):
+        if not path:
+            return {}
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle).get('results', {})
+
+    def print_results(self, results, wall_time, threads, baseline):
+        header = f'{"url name":<28}{"count":>7}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>9}'
+        if baseline:
+            header += f'{"p95 change":>12}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, row in sorted(results.items(), key=lambda item: -item[1]['p95']):
+            line = (f'{label[:27]:<28}{row["count"]:>7}{row["errors"]:>8}{row["p50"]:>10.1f}{row["p95"]:>10.1f}'
+                    f'{row["p99"]:>10.1f}{row["throughput"]:>9.1f}')
+            previous = baseline.get(label)
+            if previous and previous['p95']:
+                change = (row['p95'] - previous['p95']) / previous['p95'] * 100
+                text = f'{change:+.0f}%'
+                line += f'{text:>12}'
+                if change > 20:
+                    line = self.style.WARNING(line)
+            self.stdout.write(line)
+        count = sum(row['count'] for row in results.values())
+        failed = sum(row['errors'] for row in results.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} requests ({failed} errors) in {wall_time:.2f}s with {threads} threads: '
+            f'{count / wall_time if wall_time else 0:.1f} req/s'))
+
+    def write_sample(self, path):
+        boss = CustomUserModel.objects.filter(title='bs').first()
+        agent = CustomUserModel.objects.filter(title__in=['fp', 'bt'], sub_district__isnull=False).first()
+        if not boss or not agent:
+            raise CommandError('Need at least one boss and one agent with a sub-district (see seed_data)')
+        sale_files = list(SaleFile.objects.filter(sub_district=agent.sub_district, status='acc')
+                          .values_list('pk', 'unique_url_id')[:20])
+        rent_files = list(RentFile.objects.filter(sub_district=agent.sub_district, status='acc')
+                          .values_list('pk', 'unique_url_id')[:20])
+        buyers = list(Buyer.objects.filter(status='acc').values_list('pk', 'code')[:20])
+        tasks = list(TaskBoss.objects.filter(type='sf', condition='op').values_list('pk', 'code')[:20])
+
+        entries = [
+            {'name': 'dashboard', 'user': boss.username, 'weight': 4},
+            {'name': 'dashboard', 'user': agent.username, 'weight': 6},
+            {'name': 'sale_file_list', 'user': agent.username, 'weight': 10},
+            {'name': 'sale_file_list', 'user': agent.username, 'params': {'min_area': 60, 'max_area': 150},
+             'weight': 5},
+            {'name': 'rent_file_list', 'user': agent.username, 'weight': 8},
+            {'name': 'sale_file_list', 'user': boss.username, 'weight': 4},
+            {'name': 'buyer_list', 'user': agent.username, 'weight': 4},
+            {'name': 'session_list', 'user': agent.username, 'weight': 3},
+            {'name': 'boss_task_list', 'user': boss.username, 'weight': 4},
+            {'name': 'current_month', 'user': agent.username, 'weight': 2},
+        ]
+        entries += [{'name': 'sale_file_detail', 'args': list(item), 'user': agent.username, 'weight': 1}
+                    for item in sale_files]
+        entries += [{'name': 'rent_file_detail', 'args': list(item), 'user': agent.username, 'weight': 1}
+                    for item in rent_files]
+        entries += [{'name': 'buyer_detail', 'args': list(item), 'user': agent.username, 'weight': 0.5}
+                    for item in buyers]
+        entries += [{'name': 'toggle_marks', 'method': 'POST', 'data': {'items': [f'sf:{pk}']},
+                     'user': agent.username, 'weight': 0.5} for pk, _ in sale_files]
+        entries += [{'name': 'boss_task_approve', 'args': list(item), 'method': 'POST', 'user': boss.username,
+                     'data': {'status': 'acc', 'condition': 'cl'}, 'weight': 0.5} for item in tasks]
+
+        with open(path, 'w', encoding='utf-8') as handle:
+            for entry in entries:
+                handle.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(entries)} entries to {path}'))
+
+
+def _percentile(values, percent):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(math.ceil(percent / 100 * len(values)) - 1, 0))]
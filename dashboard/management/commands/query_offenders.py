@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum, Q
+from django.utils import timezone
+
+from dashboard.models import QueryLog
+
+
+class Command(BaseCommand):
+    help = 'Print the views with the worst query counts / SQL time recorded by QueryBudgetMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Only look at logs from the last N days')
+        parser.add_argument('--limit', type=int, default=15, help='Number of views to print')
+        parser.add_argument('--order', choices=['queries', 'time', 'duplicates', 'violations'], default='queries',
+                            help='Sort views by average queries, average SQL time, duplicates or budget violations')
+        parser.add_argument('--prune', type=int, default=None,
+                            help='Delete logs older than N days before reporting')
+
+    def handle(self, *args, **options):
+        if options['prune'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune'])
+            deleted, _ = QueryLog.objects.filter(datetime_created__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} query logs older than {options["prune"]} days'))
+
+        since = timezone.now() - timedelta(days=options['days'])
+        ordering = {
+            'queries': '-avg_queries',
+            'time': '-avg_time',
+            'duplicates': '-avg_duplicates',
+            'violations': '-violations',
+        }[options['order']]
+        rows = (QueryLog.objects.filter(datetime_created__gte=since)
+                .values('view_name')
+                .annotate(requests=Count('id'),
+                          violations=Count('id', filter=Q(over_budget=True)),
+                          avg_queries=Avg('query_count'),
+                          max_queries=Max('query_count'),
+                          avg_time=Avg('sql_time'),
+                          max_time=Max('sql_time'),
+                          avg_duplicates=Avg('duplicate_count'),
+                          total_time=Sum('sql_time'))
+                .order_by(ordering)[:options['limit']])
+
+        if not rows:
+            self.stdout.write(self.style.WARNING(f'No query logs in the last {options["days"]} days'))
+            return
+
+        self.stdout.write(f'{"view":<40} {"reqs":>6} {"over":>5} {"avg q":>7} {"max q":>6} '
+                          f'{"avg ms":>8} {"max ms":>8} {"dups":>6}')
+        for row in rows:
+            self.stdout.write(
+                f'{row["view_name"][:40]:<40} {row["requests"]:>6} {row["violations"]:>5} '
+                f'{row["avg_queries"]:>7.1f} {row["max_queries"]:>6} {row["avg_time"]:>8.1f} '
+                f'{row["max_time"]:>8.1f} {row["avg_duplicates"]:>6.1f}'
+            )
+
+        worst = (QueryLog.objects.filter(datetime_created__gte=since, view_name=rows[0]['view_name'])
+                 .exclude(duplicate_count=0).order_by('-duplicate_count').first())
+        if worst:
+            self.stdout.write(self.style.WARNING(f'\nMost repeated queries in {worst.view_name} ({worst.path}):'))
+            for item in worst.duplicates[:5]:
+                self.stdout.write(f'  x{item["count"]}  {item["sql"][:160]}')
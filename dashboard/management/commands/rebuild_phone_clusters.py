@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.functions import normalize_phone
+from dashboard.utils import PHONE_MODELS, rebuild_phone_clusters
+
+
+class Command(BaseCommand):
+    help = '''Re-normalize phone numbers and rebuild the duplicate phone clusters of persons, buyers and renters.
+
+    Signals keep the clusters current; run this after bulk imports or raw SQL updates that bypass them.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per query')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        for model in PHONE_MODELS:
+            changed = []
+            for row in model.objects.only('id', 'phone_number', 'phone_normalized').iterator(chunk_size=batch_size):
+                phone = normalize_phone(row.phone_number)
+                if phone != row.phone_normalized:
+                    row.phone_normalized = phone
+                    changed.append(row)
+            model.objects.bulk_update(changed, ['phone_normalized'], batch_size=batch_size)
+            clusters = rebuild_phone_clusters(model)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: {len(changed)} numbers normalized, {clusters} duplicate clusters'))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from scratch (signals keep it current afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows read per query')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = search.rebuild_index(batch_size=max(options['batch_size'], 1), stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {total} documents in {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.utils import (CODE_REFERENCE_MODELS, code_reference_gaps, code_reference_mismatches,
+                             resolve_code_reference_batch)
+
+
+class Command(BaseCommand):
+    help = '''Fill the foreign keys of sessions, reminders and trades from their file/customer/session codes,
+    and the codes from the foreign keys, one query per referenced model and batch.
+
+    A code that disagrees with its foreign key is rewritten from the key.
+    Save() does the same for single rows; run this after imports or bulk edits that bypass it.
+    With --check it only reports rows whose code and foreign key disagree and fails if there are any,
+    e.g. nightly from cron:
+        30 3 * * * python manage.py resolve_code_references --check
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows resolved per batch')
+        parser.add_argument('--check', action='store_true', help='Only report rows whose code and key disagree')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            return self.check_references()
+
+        batch_size = max(options['batch_size'], 1)
+        for model in CODE_REFERENCE_MODELS:
+            gaps = code_reference_gaps(model).select_related(*model.code_references.values()).order_by('pk')
+            updated = last_pk = 0
+            while True:
+                rows = list(gaps.filter(pk__gt=last_pk)[:batch_size])
+                if not rows:
+                    break
+                updated += resolve_code_reference_batch(model, rows)
+                last_pk = rows[-1].pk
+            self.stdout.write(self.style.SUCCESS(f'{model.__name__}: {updated} rows resolved'))
+
+    def check_references(self):
+        failed = False
+        for model in CODE_REFERENCE_MODELS:
+            for fk_name, count in code_reference_mismatches(model).items():
+                if count:
+                    failed = True
+                    self.stdout.write(self.style.WARNING(f'{model.__name__}.{fk_name}: {count} rows disagree'))
+        if failed:
+            raise CommandError('Codes and foreign keys disagree; run resolve_code_references to fill the gaps')
+        self.stdout.write(self.style.SUCCESS('All codes and foreign keys agree'))
@@ -0,0 +1,347 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from jalali import conversion
+from dashboard import choices, functions, search, utils
+from dashboard.models import (Province, City, District, SubDistrict, CustomUserModel, Person, SaleFile, RentFile,
+                              Buyer, Renter, Session, Trade, TaskBoss, Reminder, Report, Announcement,
+                              generate_unique_id)
+
+
+first_names = ['علی', 'محمد', 'زهرا', 'فاطمه', 'حسین', 'مریم', 'رضا', 'سارا', 'مهدی', 'نرگس', 'امیر', 'الهام']
+last_names = ['احمدی', 'محمدی', 'حسینی', 'رضایی', 'کریمی', 'موسوی', 'جعفری', 'صادقی', 'رحیمی', 'نوری']
+streets = ['ولیعصر', 'انقلاب', 'آزادی', 'شریعتی', 'مطهری', 'پاسداران', 'نیاوران', 'ستارخان']
+
+
+def values(choice_list):
+    return [value for value, label in choice_list]
+
+
+class Command(BaseCommand):
+    help = 'Seed the database with synthetic locations, agents, files, customers, services and announcements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--provinces', type=int, default=2)
+        parser.add_argument('--cities', type=int, default=3, help='Cities per province')
+        parser.add_argument('--districts', type=int, default=4, help='Districts per city')
+        parser.add_argument('--sub-districts', type=int, default=3, help='Sub-districts per district')
+        parser.add_argument('--persons', type=int, default=20000)
+        parser.add_argument('--sale-files', type=int, default=100000)
+        parser.add_argument('--rent-files', type=int, default=100000)
+        parser.add_argument('--buyers', type=int, default=50000)
+        parser.add_argument('--renters', type=int, default=50000)
+        parser.add_argument('--sessions', type=int, default=20000)
+        parser.add_argument('--trades', type=int, default=5000)
+        parser.add_argument('--reminders', type=int, default=10000)
+        parser.add_argument('--announcements', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=365, help='Spread creation dates over this many days')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--password', default='password', help='Password of the generated users')
+
+    def handle(self, *args, **options):
+        if options['sale_files'] > 999999 or options['rent_files'] > 999999:
+            raise CommandError('Sale and rent file codes are 6 digits; use at most 999999 files of each type')
+        self.random = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.phones = []
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            sub_districts = self.create_locations()
+            boss, agents = self.create_users(sub_districts)
+            persons = self.create_persons(agents)
+            sale_files = self.create_sale_files(sub_districts, persons, agents)
+            rent_files = self.create_rent_files(sub_districts, persons, agents)
+            buyers = self.create_customers(Buyer, sub_districts, agents)
+            renters = self.create_customers(Renter, sub_districts, agents)
+            sessions = self.create_sessions(agents, sale_files, rent_files, buyers, renters)
+            self.create_trades(sessions)
+            self.create_tasks(sale_files, rent_files, buyers, renters, persons, sessions)
+            self.create_reminders_and_reports(agents)
+            self.create_announcements(agents, sale_files, rent_files, buyers, renters)
+            # Rows are bulk created without signals, so build the search index and phone clusters in one pass
+            search.rebuild_index(batch_size=self.batch_size)
+            for model in utils.PHONE_MODELS:
+                utils.rebuild_phone_clusters(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded database in {time.perf_counter() - started:.1f}s (boss user: {boss.username})'))
+
+    # helpers
+    def log(self, model, count):
+        self.stdout.write(f'  {model._meta.verbose_name_plural}: {count}')
+
+    def random_datetime(self):
+        return self.now - timedelta(days=self.random.randrange(self.options['days']),
+                                    seconds=self.random.randrange(86400))
+
+    def jalali_date(self, days_from_today):
+        return conversion.jalali_string(self.now + timedelta(days=days_from_today))
+
+    def name(self):
+        return f'{self.random.choice(first_names)} {self.random.choice(last_names)}'
+
+    def phone(self):
+        # Some numbers repeat, so lists have duplicates to mark
+        if self.phones and self.random.random() < 0.05:
+            return self.random.choice(self.phones)
+        phone = '09' + ''.join(self.random.choices('0123456789', k=9))
+        self.phones.append(phone)
+        return phone
+
+    def bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        if created and created[0].pk is None:
+            # MySQL does not return primary keys from bulk_create; the rows were inserted in order
+            # inside this transaction, so the newest ids belong to them.
+            pks = list(model.objects.order_by('-pk').values_list('pk', flat=True)[:len(created)])[::-1]
+            for obj, pk in zip(created, pks):
+                obj.pk = pk
+                obj._state.adding = False
+        self.log(model, len(created))
+        return created
+
+    def codes(self, model, count, digits):
+        existing = set(model.objects.exclude(code=None).values_list('code', flat=True))
+        sample = self.random.sample(range(1, 10 ** digits), count + len(existing))
+        return [code for code in (str(i).zfill(digits) for i in sample) if code not in existing][:count]
+
+    # generators
+    def create_locations(self):
+        sub_districts = []
+        for p in range(self.options['provinces']):
+            province = Province.objects.create(name=f'استان {p + 1}')
+            for c in range(self.options['cities']):
+                city = City.objects.create(name=f'شهر {p + 1}-{c + 1}', province=province)
+                for d in range(self.options['districts']):
+                    district = District.objects.create(name=f'محله {p + 1}-{c + 1}-{d + 1}', city=city)
+                    for s in range(self.options['sub_districts']):
+                        name = f'زیرمحله {p + 1}-{c + 1}-{d + 1}-{s + 1}'
+                        sub_districts.append(SubDistrict(
+                            name=name, district=district,
+                            path=SubDistrict.build_path(province.name, city.name, district.name, name)))
+        sub_districts = self.bulk(SubDistrict, sub_districts)
+        return list(SubDistrict.objects.select_related('district__city__province').filter(
+            pk__in=[sub_district.pk for sub_district in sub_districts]))
+
+    def create_users(self, sub_districts):
+        stamp = generate_unique_id()[:6]
+        boss = CustomUserModel(username=f'boss_{stamp}', title='bs', name_family=self.name())
+        boss.set_password(self.options['password'])
+        boss.save()
+        agents = []
+        for index, sub_district in enumerate(sub_districts):
+            for title in ('fp', 'cp', 'bt'):
+                agent = CustomUserModel(username=f'{title}_{stamp}_{index}', title=title, name_family=self.name(),
+                                        sub_district=sub_district)
+                agent.set_password(self.options['password'])
+                agents.append(agent)
+        agents = self.bulk(CustomUserModel, agents)
+        return boss, list(CustomUserModel.objects.filter(username__in=[agent.username for agent in agents])
+                          .select_related('sub_district'))
+
+    def create_persons(self, agents):
+        return self.bulk(Person, [
+            Person(name=self.name(), phone_number=phone, phone_normalized=functions.normalize_phone(phone),
+                   status='acc', created_by=self.random.choice(agents))
+            for phone in (self.phone() for _ in range(self.options['persons']))
+        ])
+
+    def location_fields(self, sub_district):
+        return {
+            'sub_district': sub_district,
+            'district': sub_district.district,
+            'city': sub_district.district.city,
+            'province': sub_district.district.city.province,
+        }
+
+    def file_fields(self, sub_districts, persons, agents):
+        sub_district = self.random.choice(sub_districts)
+        area = self.random.randint(40, 400)
+        return dict(
+            **self.location_fields(sub_district),
+            address=f'خیابان {self.random.choice(streets)}، کوچه {self.random.randint(1, 40)}',
+            street=self.random.choice(streets),
+            room=self.random.choice(values(choices.rooms)),
+            area=area,
+            age=self.random.choice(values(choices.ages)),
+            document=self.random.choice(values(choices.booleans)),
+            level=self.random.choice(values(choices.levels)),
+            parking=self.random.choice(values(choices.booleans)),
+            elevator=self.random.choice(values(choices.booleans)),
+            warehouse=self.random.choice(values(choices.booleans)),
+            title=f'آپارتمان {area} متری {sub_district.name}',
+            source=self.random.choice(values(choices.sources)),
+            person=self.random.choice(persons) if persons else None,
+            unique_url_id=generate_unique_id(),
+            status=self.random.choices(['acc', 'pen', 'can'], weights=[85, 10, 5])[0],
+            created_by=self.random.choice(agents),
+        )
+
+    def create_sale_files(self, sub_districts, persons, agents):
+        sale_files = []
+        for code in self.codes(SaleFile, self.options['sale_files'], 6):
+            fields = self.file_fields(sub_districts, persons, agents)
+            price = fields['area'] * self.random.randint(30, 150) * 1000000
+            sale_files.append(SaleFile(code=code, price_announced=price, price_min=int(price * 0.95), **fields))
+        created = self.bulk(SaleFile, sale_files)
+        self.backdate(SaleFile, created)
+        return created
+
+    def create_rent_files(self, sub_districts, persons, agents):
+        rent_files = []
+        for code in self.codes(RentFile, self.options['rent_files'], 6):
+            fields = self.file_fields(sub_districts, persons, agents)
+            deposit = self.random.randint(100, 3000) * 1000000
+            rent = self.random.randint(0, 60) * 1000000
+            rent_files.append(RentFile(code=code, deposit_announced=deposit, deposit_min=int(deposit * 0.9),
+                                       rent_announced=rent, rent_min=int(rent * 0.9),
+                                       convertable=self.random.choice(values(choices.beings)), **fields))
+        created = self.bulk(RentFile, rent_files)
+        self.backdate(RentFile, created)
+        return created
+
+    def backdate(self, model, objects):
+        # datetime_created is auto_now_add, so spread it over the requested window after the insert
+        for obj in objects:
+            obj.datetime_created = self.random_datetime()
+        model.objects.bulk_update(objects, ['datetime_created'], batch_size=self.batch_size)
+
+    def create_customers(self, model, sub_districts, agents):
+        count = self.options['buyers'] if model is Buyer else self.options['renters']
+        customers = []
+        for code in self.codes(model, count, 10):
+            sub_district = self.random.choice(sub_districts)
+            room_min = self.random.randint(0, 3)
+            area_min = self.random.randint(40, 200)
+            fields = dict(
+                province=sub_district.district.city.province,
+                city=sub_district.district.city,
+                district=sub_district.district,
+                room_min=str(room_min), room_max=str(room_min + 1),
+                area_min=area_min, area_max=area_min + self.random.randint(20, 150),
+                age_min='0', age_max=str(self.random.randint(5, 20)),
+                document=self.random.choice(values(choices.booleans)),
+                parking=self.random.choice(values(choices.booleans)),
+                elevator=self.random.choice(values(choices.booleans)),
+                warehouse=self.random.choice(values(choices.booleans)),
+                name=self.name(), code=code,
+                status=self.random.choices(['acc', 'pen', 'can'], weights=[85, 10, 5])[0],
+                datetime_created=self.random_datetime(),
+                created_by=self.random.choice(agents),
+            )
+            if model is Buyer:
+                budget = self.random.randint(2, 60) * 1000000000
+                fields.update(budget_announced=budget, budget_max=int(budget * 1.1))
+            else:
+                deposit = self.random.randint(100, 3000) * 1000000
+                fields.update(deposit_announced=deposit, deposit_max=int(deposit * 1.1),
+                              rent_announced=self.random.randint(0, 60) * 1000000,
+                              convertable=self.random.choice(values(choices.beings)))
+            phone = self.phone()
+            customer = model(phone_number=phone, phone_normalized=functions.normalize_phone(phone), **fields)
+            customer.seed_sub_district = sub_district
+            customers.append(customer)
+        created = self.bulk(model, customers)
+        through = model.sub_districts.through
+        through.objects.bulk_create([
+            through(**{f'{model._meta.model_name}_id': customer.pk, 'subdistrict_id': customer.seed_sub_district.pk})
+            for customer in customers
+        ], batch_size=self.batch_size)
+        return created
+
+    def create_sessions(self, agents, sale_files, rent_files, buyers, renters):
+        sessions = []
+        for code in self.codes(Session, self.options['sessions'], 10):
+            agent = self.random.choice(agents)
+            session = Session(agent=agent, code=code, date=self.jalali_date(self.random.randint(-60, 14)),
+                              time=self.random.choice(values(choices.times)),
+                              status=self.random.choice(values(choices.serv_statuses)))
+            if self.random.random() < 0.5 and sale_files and buyers:
+                session.type = 'sale'
+                session.sale_file = self.random.choice(sale_files)
+                session.buyer = self.random.choice(buyers)
+                session.sale_file_code, session.buyer_code = session.sale_file.code, session.buyer.code
+            elif rent_files and renters:
+                session.type = 'rent'
+                session.rent_file = self.random.choice(rent_files)
+                session.renter = self.random.choice(renters)
+                session.rent_file_code, session.renter_code = session.rent_file.code, session.renter.code
+            session.sub_district_id = session.file_sub_district_id()
+            sessions.append(session)
+        return self.bulk(Session, sessions)
+
+    def create_trades(self, sessions):
+        count = min(self.options['trades'], len(sessions))
+        trades = []
+        for session, code in zip(self.random.sample(sessions, count), self.codes(Trade, count, 6)):
+            trade = Trade(session=session, session_code=session.code, type=session.type, code=code,
+                          date=session.date, contract_owner=self.name(),
+                          followup_code_status=choices.fc_statuses[1][0])
+            if session.type == 'sale':
+                trade.price = session.sale_file.price_announced
+                trade.contract_buyer = session.buyer.name
+            else:
+                trade.deposit = session.rent_file.deposit_announced
+                trade.rent = session.rent_file.rent_announced
+                trade.contract_renter = session.renter.name
+            trades.append(trade)
+        return self.bulk(Trade, trades)
+
+    def create_tasks(self, sale_files, rent_files, buyers, renters, persons, sessions):
+        # One open task per pending object, the same rows the post_save signals create for real data
+        tasks = []
+        targets = (('new_sale_file', 'sf', sale_files), ('new_rent_file', 'rf', rent_files),
+                   ('new_buyer', 'by', buyers), ('new_renter', 'rt', renters), ('new_person', 'ps', persons[:100]),
+                   ('new_session', 'ss', sessions[:len(sessions) // 10]))
+        for field, task_type, objects in targets:
+            tasks += [TaskBoss(**{field: obj}, type=task_type)
+                      for obj in objects if task_type in ('ps', 'ss') or obj.status == 'pen']
+        for task, code in zip(tasks, self.codes(TaskBoss, len(tasks), 10)):
+            task.code = code
+            task.fill_display_fields()
+        return self.bulk(TaskBoss, tasks)
+
+    def create_reminders_and_reports(self, agents):
+        reminders = [
+            Reminder(title='پیگیری مشتری', date=self.jalali_date(self.random.randint(-30, 30)),
+                     agent=self.random.choice(agents), code=code)
+            for code in self.codes(Reminder, self.options['reminders'], 10)
+        ]
+        self.bulk(Reminder, reminders)
+        reports = []
+        for agent in agents:
+            for days in range(0, 60):
+                if self.random.random() < 0.7:
+                    reports.append(Report(agent=agent, date=self.jalali_date(-days),
+                                          status=self.random.choice(values(choices.report_statuses))))
+        self.bulk(Report, reports)
+
+    def create_announcements(self, agents, sale_files, rent_files, buyers, renters):
+        sources = [(mark_type, ContentType.objects.get_for_model(model), objects)
+                   for mark_type, model, objects in (('sf', SaleFile, sale_files), ('rf', RentFile, rent_files),
+                                                     ('by', Buyer, buyers), ('rt', Renter, renters)) if objects]
+        if not sources:
+            return
+        announcements = []
+        for _ in range(self.options['announcements']):
+            mark_type, content_type, objects = self.random.choice(sources)
+            announcements.append(Announcement(content_type=content_type, object_id=self.random.choice(objects).pk,
+                                              created_by=self.random.choice(agents), announcement_type=mark_type))
+        announcements = self.bulk(Announcement, announcements)
+        through = Announcement.visible_to.through
+        visible = []
+        for announcement in announcements:
+            for agent in self.random.sample(agents, min(5, len(agents))):
+                if agent.pk != announcement.created_by_id:
+                    visible.append(through(announcement_id=announcement.pk, customusermodel_id=agent.pk))
+        through.objects.bulk_create(visible, batch_size=self.batch_size)
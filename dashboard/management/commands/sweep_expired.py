@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import SaleFile, RentFile, Announcement
+from dashboard.utils import deactivate_announcements, deactivate_old_announcements
+
+
+class Command(BaseCommand):
+    help = '''Expire accepted files whose datetime_expired has passed and deactivate old announcements.
+
+    Works in batches, one short transaction per batch, so it can run on a live database. Schedule it, e.g. from cron:
+        */15 * * * * python manage.py sweep_expired
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per transaction')
+        parser.add_argument('--announcement-days', type=int, default=30,
+                            help='Deactivate announcements older than this many days')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be changed')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = max(options['batch_size'], 1)
+
+        for model in (SaleFile, RentFile):
+            due = model.objects.filter(status='acc', datetime_expired__lte=now)
+            if options['dry_run']:
+                self.stdout.write(f'{model.__name__}: {due.count()} files would expire')
+                continue
+            content_type = ContentType.objects.get_for_model(model)
+            expired = announcements = 0
+            while True:
+                ids = list(due.order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    expired += model.objects.filter(pk__in=ids, status='acc').update(status='exp')
+                    announcements += deactivate_announcements(
+                        Announcement.objects.filter(content_type=content_type, object_id__in=ids))
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: {expired} files expired, {announcements} announcements deactivated'))
+
+        if options['dry_run']:
+            cutoff = now - timezone.timedelta(days=options['announcement_days'])
+            count = Announcement.objects.filter(is_active=True, datetime_created__lt=cutoff).count()
+            self.stdout.write(f'{count} old announcements would be deactivated')
+            return
+        count = deactivate_old_announcements(days=options['announcement_days'], batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{count} old announcements deactivated'))
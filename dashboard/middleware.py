@@ -0,0 +1,126 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_DEFAULTS = {
+    'ENABLED': True,
+    'MAX_QUERIES': 50,
+    'MAX_SQL_MS': 500,
+    'MAX_DUPLICATES': 10,
+    # Share of within-budget requests that are still recorded; over-budget requests are always recorded.
+    'SAMPLE_RATE': 0.05,
+    'IGNORE_PATHS': ('/static/', '/media/', '/__debug__/', '/admin/jsi18n/'),
+    # Per url-name overrides, e.g. {'sale_file_list': {'MAX_QUERIES': 20}}
+    'VIEW_BUDGETS': {},
+}
+
+_literal_patterns = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def query_budget_settings():
+    config = dict(QUERY_BUDGET_DEFAULTS)
+    config.update(getattr(settings, 'QUERY_BUDGET', {}))
+    return config
+
+
+def sql_fingerprint(sql):
+    """
+    Strip literals and placeholder lists so repeated queries with different parameters look the same.
+    """
+    for pattern, replacement in _literal_patterns:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()[:500]
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[sql_fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [{'sql': sql, 'count': count} for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+class QueryBudgetMiddleware:
+    """
+    Count queries and SQL time per request with connection.execute_wrapper (works with DEBUG off),
+    warn when a view goes over its budget and store a QueryLog row for over-budget and sampled requests.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = query_budget_settings()
+
+    def __call__(self, request):
+        if not self.config['ENABLED'] or request.path.startswith(tuple(self.config['IGNORE_PATHS'])):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        self.record(request, response, recorder)
+        return response
+
+    def budget_for(self, view_name):
+        budget = {key: self.config[key] for key in ('MAX_QUERIES', 'MAX_SQL_MS', 'MAX_DUPLICATES')}
+        budget.update(self.config['VIEW_BUDGETS'].get(view_name, {}))
+        return budget
+
+    def record(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else '') or request.path
+        budget = self.budget_for(view_name)
+        sql_ms = recorder.duration * 1000
+        duplicates = recorder.duplicates()
+        duplicate_count = sum(item['count'] - 1 for item in duplicates)
+
+        over_budget = (recorder.count > budget['MAX_QUERIES'] or sql_ms > budget['MAX_SQL_MS']
+                       or duplicate_count > budget['MAX_DUPLICATES'])
+        if over_budget:
+            logger.warning('Query budget exceeded by %s (%s): %d queries, %.1fms SQL, %d duplicates',
+                           view_name, request.path, recorder.count, sql_ms, duplicate_count)
+        elif random.random() >= self.config['SAMPLE_RATE']:
+            return
+
+        from .models import QueryLog
+        try:
+            QueryLog.objects.create(
+                view_name=view_name[:200],
+                path=request.path[:500],
+                method=request.method,
+                status_code=response.status_code,
+                query_count=recorder.count,
+                sql_time=round(sql_ms, 2),
+                duplicate_count=duplicate_count,
+                duplicates=duplicates[:10],
+                over_budget=over_budget,
+            )
+        except Exception:
+            logger.exception('Could not store query log for %s', view_name)
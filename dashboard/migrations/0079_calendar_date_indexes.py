@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0078_remove_taskboss_ur_task_remove_visit_agent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['agent', 'date'], name='dashboard_r_agent_i_cd8792_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['agent', 'date'], name='dashboard_r_agent_i_3e62fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['date'], name='dashboard_r_date_aa3ca4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['agent', 'date'], name='dashboard_s_agent_i_d89642_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['date'], name='dashboard_s_date_374b57_idx'),
+        ),
+    ]
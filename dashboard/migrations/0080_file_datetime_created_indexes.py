@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0079_calendar_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentfile',
+            index=models.Index(fields=['datetime_created'], name='dashboard_r_datetim_ad9d58_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salefile',
+            index=models.Index(fields=['datetime_created'], name='dashboard_s_datetim_eb6488_idx'),
+        ),
+    ]
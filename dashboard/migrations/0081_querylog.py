@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0080_file_datetime_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(db_index=True, max_length=200, verbose_name='نام ویو')),
+                ('path', models.CharField(max_length=500, verbose_name='مسیر')),
+                ('method', models.CharField(max_length=10, verbose_name='متد')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='کد پاسخ')),
+                ('query_count', models.PositiveIntegerField(verbose_name='تعداد کوئری')),
+                ('sql_time', models.FloatField(verbose_name='زمان SQL (میلی\u200cثانیه)')),
+                ('duplicate_count', models.PositiveIntegerField(default=0, verbose_name='کوئری\u200cهای تکراری')),
+                ('duplicates', models.JSONField(blank=True, default=list, verbose_name='اثر انگشت تکراری\u200cها')),
+                ('over_budget', models.BooleanField(default=False, verbose_name='خارج از بودجه')),
+                ('datetime_created', models.DateTimeField(auto_now_add=True, verbose_name='زمان ساخت')),
+            ],
+            options={
+                'verbose_name': 'لاگ کوئری',
+                'verbose_name_plural': 'لاگ\u200cهای کوئری',
+                'ordering': ['-datetime_created'],
+                'indexes': [models.Index(fields=['-datetime_created'], name='dashboard_q_datetim_4dad58_idx'), models.Index(fields=['view_name', '-datetime_created'], name='dashboard_q_view_na_58f7ba_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_report_item_snapshots(apps, schema_editor):
+    ReportItem = apps.get_model('dashboard', 'ReportItem')
+    targets = {
+        'sale_file': (apps.get_model('dashboard', 'SaleFile'), 'file_code'),
+        'rent_file': (apps.get_model('dashboard', 'RentFile'), 'file_code'),
+        'buyer': (apps.get_model('dashboard', 'Buyer'), 'customer_code'),
+        'renter': (apps.get_model('dashboard', 'Renter'), 'customer_code'),
+    }
+    items = list(ReportItem.objects.only('id', 'file_code', 'customer_code'))
+    for start in range(0, len(items), 1000):
+        chunk = items[start:start + 1000]
+        for field, (model, code_field) in targets.items():
+            codes = {getattr(item, code_field) for item in chunk if getattr(item, code_field)}
+            ids = dict(model.objects.filter(code__in=codes).values_list('code', 'id')) if codes else {}
+            for item in chunk:
+                setattr(item, f'{field}_id', ids.get(getattr(item, code_field)))
+        ReportItem.objects.bulk_update(chunk, list(targets))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0081_querylog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportitem',
+            name='buyer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_items', to='dashboard.buyer', verbose_name='خریدار'),
+        ),
+        migrations.AddField(
+            model_name='reportitem',
+            name='rent_file',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_items', to='dashboard.rentfile', verbose_name='فایل اجاره'),
+        ),
+        migrations.AddField(
+            model_name='reportitem',
+            name='renter',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_items', to='dashboard.renter', verbose_name='مستاجر'),
+        ),
+        migrations.AddField(
+            model_name='reportitem',
+            name='sale_file',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_items', to='dashboard.salefile', verbose_name='فایل فروش'),
+        ),
+        migrations.RunPython(fill_report_item_snapshots, migrations.RunPython.noop),
+    ]
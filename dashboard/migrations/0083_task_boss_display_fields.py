@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:01
+
+from django.db import migrations, models
+
+
+def fill_task_display_fields(apps, schema_editor):
+    TaskBoss = apps.get_model('dashboard', 'TaskBoss')
+    tasks = TaskBoss.objects.select_related(
+        'new_sale_file__created_by', 'new_sale_file__sub_district',
+        'new_rent_file__created_by', 'new_rent_file__sub_district',
+        'new_buyer__created_by', 'new_buyer__district', 'new_renter__created_by', 'new_renter__district',
+        'new_person__created_by',
+        'new_session__agent', 'new_session__sale_file__sub_district', 'new_session__rent_file__sub_district',
+        'result_session__agent', 'result_session__sale_file__sub_district', 'result_session__rent_file__sub_district',
+    )
+    batch = []
+    for task in tasks.iterator(chunk_size=1000):
+        session = task.new_session or task.result_session
+        if session:
+            agent = session.agent
+            file = session.sale_file if session.type == 'sale' else session.rent_file if session.type == 'rent' else None
+            title = file.title if file else ''
+            location = file.sub_district if file else None
+        else:
+            target = task.new_sale_file or task.new_rent_file or task.new_buyer or task.new_renter or task.new_person
+            agent = getattr(target, 'created_by', None)
+            title = (getattr(target, 'title', None) or getattr(target, 'name', None)) if target else ''
+            location = getattr(target, 'sub_district', None) or getattr(target, 'district', None)
+        task.title = (title or '')[:200]
+        task.agent_name = ((agent.name_family or agent.username) if agent else '')[:200]
+        task.location_name = (location.name if location else '')[:200]
+        batch.append(task)
+        if len(batch) == 1000:
+            TaskBoss.objects.bulk_update(batch, ['title', 'agent_name', 'location_name'])
+            batch = []
+    if batch:
+        TaskBoss.objects.bulk_update(batch, ['title', 'agent_name', 'location_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0082_report_item_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskboss',
+            name='agent_name',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='نام مشاور'),
+        ),
+        migrations.AddField(
+            model_name='taskboss',
+            name='location_name',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='محدوده'),
+        ),
+        migrations.AddField(
+            model_name='taskboss',
+            name='title',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='عنوان'),
+        ),
+        migrations.AddIndex(
+            model_name='taskboss',
+            index=models.Index(fields=['condition', '-datetime_created'], name='dashboard_t_conditi_6fa3ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskboss',
+            index=models.Index(fields=['condition', 'type', '-datetime_created'], name='dashboard_t_conditi_c03136_idx'),
+        ),
+        migrations.RunPython(fill_task_display_fields, migrations.RunPython.noop),
+    ]
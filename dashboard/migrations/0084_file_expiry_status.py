@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0083_task_boss_display_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rentfile',
+            name='status',
+            field=models.CharField(choices=[('acc', 'پذیرفته \u200cشده'), ('can', 'رد شده'), ('pen', 'در انتظار'), ('exp', 'منقضی شده')], default='pen', max_length=10, verbose_name='وضعیت'),
+        ),
+        migrations.AlterField(
+            model_name='salefile',
+            name='status',
+            field=models.CharField(choices=[('acc', 'پذیرفته \u200cشده'), ('can', 'رد شده'), ('pen', 'در انتظار'), ('exp', 'منقضی شده')], default='pen', max_length=10, verbose_name='وضعیت'),
+        ),
+        migrations.AddIndex(
+            model_name='rentfile',
+            index=models.Index(fields=['status', 'datetime_expired'], name='dashboard_r_status_45cc3e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salefile',
+            index=models.Index(fields=['status', 'datetime_expired'], name='dashboard_s_status_358521_idx'),
+        ),
+    ]
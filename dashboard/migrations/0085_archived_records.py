@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:12
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0084_file_expiry_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('code', models.CharField(blank=True, db_index=True, max_length=10, null=True, verbose_name='کد')),
+                ('title', models.CharField(blank=True, max_length=230, verbose_name='عنوان')),
+                ('reason', models.CharField(choices=[('can', 'لغو شده'), ('exp', 'منقضی شده'), ('del', 'درخواست حذف')], max_length=10, verbose_name='علت بایگانی')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='داده')),
+                ('related', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='ردیف\u200cهای وابسته')),
+                ('links', models.JSONField(blank=True, default=dict, verbose_name='ارجاع\u200cها')),
+                ('datetime_archived', models.DateTimeField(auto_now_add=True, verbose_name='زمان بایگانی')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'ردیف بایگانی',
+                'verbose_name_plural': 'ردیف\u200cهای بایگانی',
+                'ordering': ['-datetime_archived'],
+                'indexes': [models.Index(fields=['content_type', '-datetime_archived'], name='dashboard_a_content_2277bf_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_archived_record')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0085_archived_records'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40, unique=True, verbose_name='واژه')),
+                ('document_count', models.PositiveIntegerField(default=0, verbose_name='تعداد اسناد')),
+            ],
+            options={
+                'verbose_name': 'واژه جستجو',
+                'verbose_name_plural': 'واژه\u200cهای جستجو',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('length', models.PositiveIntegerField(default=0, verbose_name='تعداد واژه\u200cها')),
+                ('datetime_indexed', models.DateTimeField(auto_now=True, verbose_name='زمان نمایه\u200cسازی')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'سند جستجو',
+                'verbose_name_plural': 'اسناد جستجو',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40, verbose_name='واژه')),
+                ('frequency', models.PositiveSmallIntegerField(default=1, verbose_name='تکرار')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='dashboard.searchdocument')),
+            ],
+            options={
+                'verbose_name': 'ردیف نمایه',
+                'verbose_name_plural': 'ردیف\u200cهای نمایه',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchposting',
+            constraint=models.UniqueConstraint(fields=('term', 'document'), name='unique_search_posting'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from dashboard.functions import normalize_phone
+
+
+def fill_phone_clusters(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    PhoneCluster = apps.get_model('dashboard', 'PhoneCluster')
+    for model_name in ('person', 'buyer', 'renter'):
+        model = apps.get_model('dashboard', model_name)
+        batch = []
+        members = {}
+        for row in model.objects.only('id', 'phone_number', 'status', 'delete_request').iterator(chunk_size=1000):
+            row.phone_normalized = normalize_phone(row.phone_number)
+            batch.append(row)
+            if row.phone_normalized and row.status == 'acc' and row.delete_request != 'Yes':
+                members.setdefault(row.phone_normalized, []).append(row.pk)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, ['phone_normalized'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['phone_normalized'])
+        content_type, _ = ContentType.objects.get_or_create(app_label='dashboard', model=model_name)
+        PhoneCluster.objects.bulk_create([
+            PhoneCluster(content_type=content_type, phone_number=phone, object_ids=sorted(ids), size=len(ids))
+            for phone, ids in members.items() if len(ids) > 1
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dashboard', '0086_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buyer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=11, verbose_name='شماره تلفن استاندارد'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=11, verbose_name='شماره تلفن استاندارد'),
+        ),
+        migrations.AddField(
+            model_name='renter',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=11, verbose_name='شماره تلفن استاندارد'),
+        ),
+        migrations.CreateModel(
+            name='PhoneCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=11, verbose_name='تلفن همراه')),
+                ('object_ids', models.JSONField(default=list, verbose_name='شناسه\u200cها')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='تعداد')),
+                ('datetime_updated', models.DateTimeField(auto_now=True, verbose_name='زمان بروزرسانی')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='نوع')),
+            ],
+            options={
+                'verbose_name': 'شماره تکراری',
+                'verbose_name_plural': 'شماره\u200cهای تکراری',
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'phone_number'), name='unique_phone_cluster')],
+            },
+        ),
+        migrations.RunPython(fill_phone_clusters, migrations.RunPython.noop),
+    ]
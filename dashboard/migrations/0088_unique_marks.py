@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:27
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_marks(apps, schema_editor):
+    # Keep the oldest mark of each (agent, target) pair
+    Mark = apps.get_model('dashboard', 'Mark')
+    for field in ('sale_file', 'rent_file', 'buyer', 'renter'):
+        duplicates = (Mark.objects.filter(**{f'{field}__isnull': False}).order_by()
+                      .values('agent', field).annotate(count=Count('id'), keep=Min('id')).filter(count__gt=1))
+        for row in duplicates:
+            (Mark.objects.filter(agent=row['agent'], **{field: row[field]})
+             .exclude(pk=row['keep']).delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0087_phone_clusters'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_marks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mark',
+            constraint=models.UniqueConstraint(fields=('agent', 'sale_file'), name='unique_sale_file_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='mark',
+            constraint=models.UniqueConstraint(fields=('agent', 'rent_file'), name='unique_rent_file_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='mark',
+            constraint=models.UniqueConstraint(fields=('agent', 'buyer'), name='unique_buyer_mark'),
+        ),
+        migrations.AddConstraint(
+            model_name='mark',
+            constraint=models.UniqueConstraint(fields=('agent', 'renter'), name='unique_renter_mark'),
+        ),
+    ]
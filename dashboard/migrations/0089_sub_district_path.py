@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:30
+
+from django.db import migrations, models
+
+
+def fill_sub_district_paths(apps, schema_editor):
+    SubDistrict = apps.get_model('dashboard', 'SubDistrict')
+    batch = []
+    for sub_district in SubDistrict.objects.select_related('district__city__province').iterator(chunk_size=1000):
+        district = sub_district.district
+        sub_district.path = ' | '.join([district.city.province.name, district.city.name, district.name,
+                                        sub_district.name])
+        batch.append(sub_district)
+    SubDistrict.objects.bulk_update(batch, ['path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0088_unique_marks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subdistrict',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=410, verbose_name='مسیر'),
+        ),
+        migrations.RunPython(fill_sub_district_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0089_sub_district_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['status', 'name'], name='dashboard_p_status_620b37_idx'),
+        ),
+    ]
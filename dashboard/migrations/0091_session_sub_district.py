@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_session_sub_districts(apps, schema_editor):
+    Session = apps.get_model('dashboard', 'Session')
+    SaleFile = apps.get_model('dashboard', 'SaleFile')
+    RentFile = apps.get_model('dashboard', 'RentFile')
+    Session.objects.filter(sale_file__isnull=False).update(sub_district=models.Subquery(
+        SaleFile.objects.filter(pk=models.OuterRef('sale_file_id')).values('sub_district_id')[:1]))
+    Session.objects.filter(sale_file__isnull=True, rent_file__isnull=False).update(sub_district=models.Subquery(
+        RentFile.objects.filter(pk=models.OuterRef('rent_file_id')).values('sub_district_id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0090_person_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='sub_district',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='dashboard.subdistrict', verbose_name='زیرمحله'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['sub_district', 'agent', '-datetime_created'], name='dashboard_s_sub_dis_2b4f98_idx'),
+        ),
+        migrations.RunPython(fill_session_sub_districts, migrations.RunPython.noop),
+    ]
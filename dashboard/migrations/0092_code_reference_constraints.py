@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-19 20:44
+
+from django.db import migrations, models
+
+
+def fill_missing_codes(apps, schema_editor):
+    # Rows with a foreign key but no code would fail the new constraints; take the code from the key
+    references = {'sale_file': 'SaleFile', 'rent_file': 'RentFile', 'buyer': 'Buyer', 'renter': 'Renter'}
+    for model_name in ('Session', 'Reminder'):
+        model = apps.get_model('dashboard', model_name)
+        for fk_name, related_name in references.items():
+            related = apps.get_model('dashboard', related_name)
+            code_field = f'{fk_name}_code'
+            (model.objects.filter(**{f'{fk_name}__isnull': False})
+             .filter(models.Q(**{f'{code_field}__isnull': True}) | models.Q(**{code_field: ''}))
+             .update(**{code_field: models.Subquery(
+                 related.objects.filter(pk=models.OuterRef(f'{fk_name}_id')).values('code')[:1])}))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0091_session_sub_district'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_missing_codes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.CheckConstraint(condition=models.Q(('sale_file__isnull', True), models.Q(('sale_file_code__isnull', False), models.Q(('sale_file_code', ''), _negated=True)), _connector='OR'), name='reminder_sale_file_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.CheckConstraint(condition=models.Q(('rent_file__isnull', True), models.Q(('rent_file_code__isnull', False), models.Q(('rent_file_code', ''), _negated=True)), _connector='OR'), name='reminder_rent_file_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.CheckConstraint(condition=models.Q(('buyer__isnull', True), models.Q(('buyer_code__isnull', False), models.Q(('buyer_code', ''), _negated=True)), _connector='OR'), name='reminder_buyer_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.CheckConstraint(condition=models.Q(('renter__isnull', True), models.Q(('renter_code__isnull', False), models.Q(('renter_code', ''), _negated=True)), _connector='OR'), name='reminder_renter_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.CheckConstraint(condition=models.Q(('sale_file__isnull', True), models.Q(('sale_file_code__isnull', False), models.Q(('sale_file_code', ''), _negated=True)), _connector='OR'), name='session_sale_file_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.CheckConstraint(condition=models.Q(('rent_file__isnull', True), models.Q(('rent_file_code__isnull', False), models.Q(('rent_file_code', ''), _negated=True)), _connector='OR'), name='session_rent_file_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.CheckConstraint(condition=models.Q(('buyer__isnull', True), models.Q(('buyer_code__isnull', False), models.Q(('buyer_code', ''), _negated=True)), _connector='OR'), name='session_buyer_has_code'),
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.CheckConstraint(condition=models.Q(('renter__isnull', True), models.Q(('renter_code__isnull', False), models.Q(('renter_code', ''), _negated=True)), _connector='OR'), name='session_renter_has_code'),
+        ),
+    ]
@@ -4,7 +4,6 @@ import zipfile
 import random
 import string
 import jdatetime
-from jdatetime import timedelta, datetime
 
 from django.conf import settings
 from django.db import models
@@ -12,11 +11,14 @@ from django.shortcuts import reverse
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.text import slugify
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from . import choices
+from jalali import conversion
+
+from . import choices, functions
 
 
 # -------------------------------- CODEs ---------------------------------
@@ -33,44 +35,14 @@ def generate_unique_code_longer():
 
 
 # -------------------------------- TIMEs ---------------------------------
-def next_week_shamsi():
+def shamsi_day_choices(offsets, today_label=False):
     days = []
-    today = datetime.today()
-    for i in range(0, 7):
-        next_day = today + timedelta(days=i)
-        weekday_en = next_day.strftime('%A')
-        date_str = next_day.strftime('%Y/%m/%d')
-        weekday_fa = {
-            'Monday': 'دوشنبه',
-            'Tuesday': 'سه‌شنبه',
-            'Wednesday': 'چهارشنبه',
-            'Thursday': 'پنج‌شنبه',
-            'Friday': 'جمعه',
-            'Saturday': 'شنبه',
-            'Sunday': 'یکشنبه',
-        }.get(weekday_en, weekday_en)
-        label = f"{weekday_fa} | {date_str}"
-        days.append((date_str, label))
-    return days
-
-
-def last_and_next_week_shamsi():
-    days = []
-    today = datetime.today()
-    for i in range(-7, 8):
-        target_day = today + timedelta(days=i)
-        weekday_en = target_day.strftime('%A')
-        date_str = target_day.strftime('%Y/%m/%d')
-        weekday_fa = {
-            'Monday': 'دوشنبه',
-            'Tuesday': 'سه‌شنبه',
-            'Wednesday': 'چهارشنبه',
-            'Thursday': 'پنج‌شنبه',
-            'Friday': 'جمعه',
-            'Saturday': 'شنبه',
-            'Sunday': 'یکشنبه',
-        }.get(weekday_en, weekday_en)
-        if i == 0:
+    today = timezone.now().date().toordinal()
+    for i in offsets:
+        ordinal = today + i
+        date_str = conversion.format_jalali(*conversion.ordinal_to_jalali(ordinal))
+        weekday_fa = functions.weekday_names[conversion.ordinal_weekday(ordinal)]
+        if today_label and i == 0:
             label = f"{weekday_fa} | {date_str} (امروز)"
         else:
             label = f"{weekday_fa} | {date_str}"
@@ -78,46 +50,184 @@ def last_and_next_week_shamsi():
     return days
 
 
+def next_week_shamsi():
+    return shamsi_day_choices(range(0, 7))
+
+
+def last_and_next_week_shamsi():
+    return shamsi_day_choices(range(-7, 8), today_label=True)
+
+
 def next_month_shamsi():
-    days = []
-    today = datetime.today()
-    for i in range(0, 30):
-        next_day = today + timedelta(days=i)
-        weekday_en = next_day.strftime('%A')
-        date_str = next_day.strftime('%Y/%m/%d')
-        weekday_fa = {
-            'Monday': 'دوشنبه',
-            'Tuesday': 'سه‌شنبه',
-            'Wednesday': 'چهارشنبه',
-            'Thursday': 'پنج‌شنبه',
-            'Friday': 'جمعه',
-            'Saturday': 'شنبه',
-            'Sunday': 'یکشنبه',
-        }.get(weekday_en, weekday_en)
-        label = f"{weekday_fa} | {date_str}"
-        days.append((date_str, label))
-    return days
+    return shamsi_day_choices(range(0, 30))
 
 
 def last_month_shamsi():
-    days = []
-    today = datetime.today()
-    for i in range(0, 31):
-        prev_day = today - timedelta(days=i)
-        weekday_en = prev_day.strftime('%A')
-        date_str = prev_day.strftime('%Y/%m/%d')
-        weekday_fa = {
-            'Monday': 'دوشنبه',
-            'Tuesday': 'سه‌شنبه',
-            'Wednesday': 'چهارشنبه',
-            'Thursday': 'پنج‌شنبه',
-            'Friday': 'جمعه',
-            'Saturday': 'شنبه',
-            'Sunday': 'یکشنبه',
-        }.get(weekday_en, weekday_en)
-        label = f"{weekday_fa} | {date_str}"
-        days.append((date_str, label))
-    return days
+    return shamsi_day_choices(range(0, -31, -1))
+
+
+# -------------------------------- TRACKING ---------------------------------
+class FieldTrackerMixin:
+    """
+    Remembers the database values of `tracked_fields` when a row is loaded, so save() and signals
+    can tell what changed without fetching the row again.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: value for name, value in zip(field_names, values)
+                                   if name in cls.tracked_fields}
+        return instance
+
+    def loaded_value(self, field):
+        """
+        Value of `field` as last loaded from or saved to the database (None for unsaved instances,
+        also in the post_save handlers of their insert).
+        """
+        if self._state.adding:
+            return None
+        loaded_values = self.__dict__.setdefault('_loaded_values', {})
+        if field not in loaded_values:
+            # Deferred when the row was loaded; read it once
+            loaded_values[field] = type(self)._base_manager.filter(pk=self.pk).values_list(field, flat=True).first()
+        return loaded_values[field]
+
+    def has_changed(self, field):
+        return self._state.adding or getattr(self, field) != self.loaded_value(field)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # Nothing is stored yet: post_save handlers of the insert see every field as unset, without a query
+            self._loaded_values = dict.fromkeys(self.tracked_fields)
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{field: getattr(self, field) for field in self.tracked_fields
+               if update_fields is None or field in update_fields},
+        }
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{field: getattr(self, field) for field in self.tracked_fields if fields is None or field in fields},
+        }
+
+
+class PhoneNumberMixin:
+    """
+    Keeps the indexed `phone_normalized` column in step with the free-form `phone_number`.
+    """
+    def save(self, *args, **kwargs):
+        self.phone_normalized = functions.normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
+        super().save(*args, **kwargs)
+
+
+class CodeReferenceMixin:
+    """
+    For rows that store a related row both by code (`sale_file_code`) and by foreign key (`sale_file`).
+    `code_references` maps each code field to its foreign key. The foreign key wins: resolve_code_references(),
+    called by save() and the backfill command, fills a missing key from its code and a missing code from its key.
+    The exception is a loaded row whose code was edited and its key was not (the update forms post codes only):
+    the key then follows the new code. This needs the codes and keys in `tracked_fields` of FieldTrackerMixin.
+    """
+    code_references = {}
+
+    def code_edited(self, code_field, key_attname):
+        if self._state.adding or code_field not in getattr(self, 'tracked_fields', ()):
+            return False
+        return self.has_changed(code_field) and not self.has_changed(key_attname)
+
+    @classmethod
+    def resolve_code_references(cls, instances, strict=False):
+        """
+        Fill missing foreign keys and codes of many unsaved or loaded rows, and point keys at edited codes,
+        with at most one query per referenced model and direction (none when everything is already set).
+
+        Args:
+            instances: rows of this model
+            strict: raise the related model's DoesNotExist for a code that matches no row
+
+        Returns:
+            set: names of the fields that were filled
+        """
+        changed = set()
+        for code_field, fk_name in cls.code_references.items():
+            field = cls._meta.get_field(fk_name)
+            related_model = field.related_model
+            edited = {id(obj) for obj in instances if obj.code_edited(code_field, field.attname)}
+            for obj in instances:
+                if id(obj) in edited and not getattr(obj, code_field) and getattr(obj, field.attname) is not None:
+                    setattr(obj, fk_name, None)
+                    changed.add(fk_name)
+            by_code = [obj for obj in instances if getattr(obj, code_field)
+                       and (getattr(obj, field.attname) is None or id(obj) in edited)]
+            if by_code:
+                targets = related_model._base_manager.in_bulk({getattr(obj, code_field) for obj in by_code},
+                                                              field_name='code')
+                for obj in by_code:
+                    target = targets.get(getattr(obj, code_field))
+                    if target is not None:
+                        if target.pk != getattr(obj, field.attname):
+                            changed.add(fk_name)
+                        setattr(obj, fk_name, target)
+                    elif strict:
+                        raise related_model.DoesNotExist(f'{related_model.__name__} {getattr(obj, code_field)} not found')
+
+            by_key = []
+            for obj in instances:
+                if getattr(obj, field.attname) is None:
+                    continue
+                if field.is_cached(obj):
+                    # Free to compare, so a changed key also rewrites a stale code
+                    target = getattr(obj, fk_name)
+                    if getattr(obj, code_field) != target.code:
+                        setattr(obj, code_field, target.code)
+                        changed.add(code_field)
+                elif not getattr(obj, code_field):
+                    by_key.append(obj)
+            if by_key:
+                codes = dict(related_model._base_manager.filter(pk__in={getattr(obj, field.attname) for obj in by_key})
+                             .values_list('pk', 'code'))
+                for obj in by_key:
+                    setattr(obj, code_field, codes.get(getattr(obj, field.attname)))
+                    changed.add(code_field)
+        return changed
+
+
+# Code field -> foreign key of the rows that point at a file and a customer (sessions, reminders)
+FILE_AND_CUSTOMER_CODES = {
+    'sale_file_code': 'sale_file',
+    'rent_file_code': 'rent_file',
+    'buyer_code': 'buyer',
+    'renter_code': 'renter',
+}
+
+
+def code_reference_tracked_fields(code_references):
+    # Codes and key attnames whose loaded values CodeReferenceMixin compares, see code_edited()
+    return tuple(code_references) + tuple(f'{fk_name}_id' for fk_name in code_references.values())
+
+
+def code_reference_constraints(model_name, code_references):
+    """
+    CHECK constraints (one per reference) that a stored foreign key always comes with its code.
+    Agreement of the two values spans tables and is verified by `resolve_code_references --check`.
+    """
+    return [
+        models.CheckConstraint(
+            condition=models.Q(**{f'{fk_name}__isnull': True}) | (models.Q(**{f'{code_field}__isnull': False})
+                                                                  & ~models.Q(**{code_field: ''})),
+            name=f'{model_name}_{fk_name}_has_code',
+        )
+        for code_field, fk_name in code_references.items()
+    ]
 
 
 # --------------------------------- LOCs ------------------------------------
@@ -177,11 +287,32 @@ class SubDistrict(models.Model):
     name = models.CharField(max_length=100, default='', verbose_name=_('Sub-District Name'))
     district = models.ForeignKey(District, on_delete=models.CASCADE, related_name='sub_districts')
     description = models.TextField(max_length=1000, blank=True, null=True, default='', verbose_name=_('Description'))
+    # "province | city | district | sub-district", so rows can show the whole location without joins;
+    # location signals rewrite it when an ancestor is renamed or moved
+    path = models.CharField(max_length=410, blank=True, default='', editable=False, verbose_name='مسیر')
+
+    path_separator = ' | '
 
     class Meta:
         verbose_name = 'زیرمحله'
         verbose_name_plural = 'زیرمحلات'
 
+    def save(self, *args, **kwargs):
+        district = District.objects.select_related('city__province').get(pk=self.district_id)
+        self.path = self.build_path(district.city.province.name, district.city.name, district.name, self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'path'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def build_path(cls, *names):
+        return cls.path_separator.join(names)
+
+    @property
+    def parent_path(self):
+        return self.path.rpartition(self.path_separator)[0]
+
     @property
     def slug(self):
         return slugify(self.name, allow_unicode=True)
@@ -220,9 +351,11 @@ class CustomUserModel(AbstractUser):
 
 
 # --------------------------------- FILEs -----------------------------------
-class Person(models.Model):
+class Person(PhoneNumberMixin, FieldTrackerMixin, models.Model):
     name = models.CharField(max_length=100, verbose_name=_('Name'))
     phone_number = models.CharField(max_length=11, verbose_name=_('Phone Number'))
+    phone_normalized = models.CharField(max_length=11, blank=True, default='', editable=False, db_index=True,
+                                        verbose_name='شماره تلفن استاندارد')
     description = models.TextField(max_length=150, blank=True, null=True, verbose_name=_('Description'))
     status = models.CharField(max_length=10, choices=choices.statuses, default='pen', verbose_name=_('Status'))
     datetime_created = models.DateTimeField(auto_now_add=True, null=True)
@@ -231,8 +364,13 @@ class Person(models.Model):
     created_by = models.ForeignKey(CustomUserModel, on_delete=models.SET_NULL, null=True, blank=True,
                                    verbose_name='ایجاد شده توسط')
 
+    tracked_fields = ('status', 'delete_request', 'phone_normalized')
+
     class Meta:
         ordering = ('-datetime_created',)
+        indexes = [
+            models.Index(fields=['status', 'name']),
+        ]
         verbose_name = 'شخص آگهی‌دهنده'
         verbose_name_plural = 'اشخاص آگهی‌دهنده'
 
@@ -243,7 +381,7 @@ class Person(models.Model):
         return reverse('person_detail', args=[self.pk])
 
 
-class SaleFile(models.Model):
+class SaleFile(FieldTrackerMixin, models.Model):
     # location fields
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='sale_files',
                                  verbose_name=_('Province'))
@@ -304,7 +442,7 @@ class SaleFile(models.Model):
                                verbose_name=_('Person'))
     unique_url_id = models.CharField(max_length=20, null=True, unique=True, blank=True)
     code = models.CharField(max_length=6, null=True, unique=True, blank=True, verbose_name=_('Code'))
-    status = models.CharField(max_length=10, choices=choices.statuses, default='pen', verbose_name=_('Status'))
+    status = models.CharField(max_length=10, choices=choices.file_statuses, default='pen', verbose_name=_('Status'))
     datetime_created = models.DateTimeField(auto_now_add=True)
     datetime_expired = models.DateTimeField(blank=True, null=True)
     delete_request = models.CharField(max_length=3, choices=choices.yes_or_no, blank=True, null=True, default='No',
@@ -326,14 +464,15 @@ class SaleFile(models.Model):
         if self.video:
             return True
 
+    tracked_fields = ('status', 'sub_district_id')
+
     def save(self, *args, **kwargs):
-        if self.pk is not None:
-            old_status = SaleFile.objects.get(pk=self.pk).status
-            if old_status == 'pen' and self.status == 'acc':
-                self.datetime_expired = timezone.now() + timezone.timedelta(days=60)
-        else:
-            if self.status == 'acc':
+        update_fields = kwargs.get('update_fields')
+        if self.status == 'acc' and (self._state.adding or self.loaded_value('status') == 'pen'):
+            if update_fields is None or 'status' in update_fields:
                 self.datetime_expired = timezone.now() + timezone.timedelta(days=60)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'datetime_expired'}
         if not self.unique_url_id:
             self.unique_url_id = generate_unique_id()
         if not self.code:
@@ -347,12 +486,16 @@ class SaleFile(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'فایل فروش'
         verbose_name_plural = 'فایل‌های فروش'
+        indexes = [
+            models.Index(fields=['datetime_created']),
+            models.Index(fields=['status', 'datetime_expired']),
+        ]
 
     def get_absolute_url(self):
         return reverse('sale_file_detail', args=[self.pk, self.unique_url_id])
 
 
-class RentFile(models.Model):
+class RentFile(FieldTrackerMixin, models.Model):
     # location fields
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='rent_files',
                                  verbose_name=_('Province'))
@@ -416,7 +559,7 @@ class RentFile(models.Model):
                                verbose_name=_('Person'))
     unique_url_id = models.CharField(max_length=20, null=True, unique=True, blank=True)
     code = models.CharField(max_length=6, null=True, unique=True, blank=True, verbose_name=_('Code'))
-    status = models.CharField(max_length=10, choices=choices.statuses, default='pen', verbose_name=_('Status'))
+    status = models.CharField(max_length=10, choices=choices.file_statuses, default='pen', verbose_name=_('Status'))
     datetime_created = models.DateTimeField(auto_now_add=True)
     datetime_expired = models.DateTimeField(blank=True, null=True)
     delete_request = models.CharField(max_length=3, choices=choices.yes_or_no, blank=True, null=True, default='No',
@@ -461,14 +604,15 @@ class RentFile(models.Model):
         # Return URL of the ZIP file
         return f"{settings.MEDIA_URL}temp_zips/{zip_filename}"
 
+    tracked_fields = ('status', 'sub_district_id')
+
     def save(self, *args, **kwargs):
-        if self.pk is not None:
-            old_status = RentFile.objects.get(pk=self.pk).status
-            if old_status == 'pen' and self.status == 'acc':
-                self.datetime_expired = timezone.now() + timezone.timedelta(days=60)
-        else:
-            if self.status == 'acc':
+        update_fields = kwargs.get('update_fields')
+        if self.status == 'acc' and (self._state.adding or self.loaded_value('status') == 'pen'):
+            if update_fields is None or 'status' in update_fields:
                 self.datetime_expired = timezone.now() + timezone.timedelta(days=60)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'datetime_expired'}
         if not self.unique_url_id:
             self.unique_url_id = generate_unique_id()
         if not self.code:
@@ -482,12 +626,16 @@ class RentFile(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'فایل اجاره'
         verbose_name_plural = 'فایل‌های اجاره'
+        indexes = [
+            models.Index(fields=['datetime_created']),
+            models.Index(fields=['status', 'datetime_expired']),
+        ]
 
     def get_absolute_url(self):
         return reverse('rent_file_detail', args=[self.pk, self.unique_url_id])
 
 
-class Buyer(models.Model):
+class Buyer(PhoneNumberMixin, FieldTrackerMixin, models.Model):
     # locations
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='buyers',
                                  verbose_name=_('Province'))
@@ -514,6 +662,8 @@ class Buyer(models.Model):
     # info
     name = models.CharField(max_length=100, verbose_name=_('Name'))
     phone_number = models.CharField(max_length=11, verbose_name=_('Phone Number'))
+    phone_normalized = models.CharField(max_length=11, blank=True, default='', editable=False, db_index=True,
+                                        verbose_name='شماره تلفن استاندارد')
     description = models.TextField(max_length=2000, blank=True, null=True, verbose_name=_('Description'))
     code = models.CharField(max_length=10, null=True, unique=True, blank=True, verbose_name=_('Code'))
     status = models.CharField(max_length=10, choices=choices.statuses, default='pen', verbose_name=_('Status'))
@@ -523,6 +673,8 @@ class Buyer(models.Model):
     created_by = models.ForeignKey(CustomUserModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='buyers',
                                    verbose_name='ایجاد شده توسط')
 
+    tracked_fields = ('status', 'delete_request', 'phone_normalized')
+
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = generate_unique_code_longer()
@@ -540,7 +692,7 @@ class Buyer(models.Model):
         return reverse('buyer_detail', args=[self.pk, self.code])
 
 
-class Renter(models.Model):
+class Renter(PhoneNumberMixin, FieldTrackerMixin, models.Model):
     # locations
     province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='renters',
                                  verbose_name=_('Province'))
@@ -570,6 +722,8 @@ class Renter(models.Model):
     # info
     name = models.CharField(max_length=100, verbose_name=_('Name'))
     phone_number = models.CharField(max_length=11, verbose_name=_('Phone Number'))
+    phone_normalized = models.CharField(max_length=11, blank=True, default='', editable=False, db_index=True,
+                                        verbose_name='شماره تلفن استاندارد')
     description = models.TextField(max_length=2000, blank=True, null=True, verbose_name=_('Description'))
     code = models.CharField(max_length=10, null=True, unique=True, blank=True, verbose_name=_('Code'))
     status = models.CharField(max_length=10, choices=choices.statuses, default='pen', verbose_name=_('Status'))
@@ -579,6 +733,8 @@ class Renter(models.Model):
     created_by = models.ForeignKey(CustomUserModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='renters',
                                    verbose_name='ایجاد شده توسط')
 
+    tracked_fields = ('status', 'delete_request', 'phone_normalized')
+
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = generate_unique_code_longer()
@@ -597,7 +753,7 @@ class Renter(models.Model):
 
 
 # --------------------------------- SERVs ----------------------------------
-class Session(models.Model):
+class Session(CodeReferenceMixin, FieldTrackerMixin, models.Model):
     agent = models.ForeignKey(CustomUserModel, on_delete=models.SET_NULL, null=True, blank=True,
                               related_name='sessions', verbose_name=_('Agent'))
     sale_file_code = models.CharField(max_length=6, null=True, blank=True, verbose_name=_('Sale File Code'))
@@ -612,6 +768,9 @@ class Session(models.Model):
     renter_code = models.CharField(max_length=10, null=True, blank=True, verbose_name=_('Renter Code'))
     renter = models.ForeignKey(Renter, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions',
                                verbose_name=_('Visit Renter'))
+    # Copy of the visited file's sub-district, kept by save() and the file signals, so agent lists filter without joins
+    sub_district = models.ForeignKey(SubDistrict, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+                                     related_name='sessions', verbose_name=_('Sub-District'))
     type = models.CharField(max_length=10, choices=choices.types, blank=True, null=True,
                             verbose_name=_('Type of Trade'))
     description = models.TextField(max_length=1000, blank=True, null=True, verbose_name=_('Description'))
@@ -624,28 +783,27 @@ class Session(models.Model):
     status = models.CharField(max_length=10, choices=choices.serv_statuses, default='sub', verbose_name=_('Status'))
     datetime_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date and Time of Creation'))
 
+    tracked_fields = ('status',) + code_reference_tracked_fields(FILE_AND_CUSTOMER_CODES)
+    code_references = FILE_AND_CUSTOMER_CODES
+
     def save(self, *args, **kwargs):
-        if not self.sale_file and self.sale_file_code:
-            self.sale_file = SaleFile.objects.get(code=self.sale_file_code)
-        if not self.rent_file and self.rent_file_code:
-            self.rent_file = RentFile.objects.get(code=self.rent_file_code)
-        if not self.buyer and self.buyer_code:
-            self.buyer = Buyer.objects.get(code=self.buyer_code)
-        if not self.renter and self.renter_code:
-            self.renter = Renter.objects.get(code=self.renter_code)
+        self.resolve_code_references([self], strict=True)
+        self.sub_district_id = self.file_sub_district_id()
         if not self.code:
             self.code = generate_unique_code_longer()
-        is_new = self.pk is None
-        previous_status = None
-        if not is_new:
-            previous = Session.objects.filter(pk=self.pk).first()
-            if previous:
-                previous_status = previous.status
+        previous_status = self.loaded_value('status')
         super(Session, self).save(*args, **kwargs)
         if self.status == 'dne' and previous_status != 'dne':
             if not TaskBoss.objects.filter(result_session=self).exists():
                 TaskBoss.objects.create(result_session=self, type='rs')
 
+    def file_sub_district_id(self):
+        # The sale file wins for the rare session that has both files
+        for file in (self.sale_file, self.rent_file):
+            if file is not None:
+                return file.sub_district_id
+        return None
+
     def __str__(self):
         return f'نشست: {self.get_type_display()} / {self.code}'
 
@@ -653,12 +811,27 @@ class Session(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'نشست'
         verbose_name_plural = 'نشست‌ها'
+        indexes = [
+            models.Index(fields=['agent', 'date']),
+            models.Index(fields=['date']),
+            models.Index(fields=['sub_district', 'agent', '-datetime_created']),
+        ]
+        constraints = code_reference_constraints('session', FILE_AND_CUSTOMER_CODES)
 
     def get_absolute_url(self):
         return reverse('session_detail', args=[self.pk, self.code])
 
 
-class Trade(models.Model):
+class TradeQuerySet(models.QuerySet):
+    def with_parties(self):
+        """
+        Join the session with its files and customers, so Trade.parties, the party properties and __str__
+        need no further queries.
+        """
+        return self.select_related('session__sale_file', 'session__rent_file', 'session__buyer', 'session__renter')
+
+
+class Trade(CodeReferenceMixin, FieldTrackerMixin, models.Model):
     session_code = models.CharField(max_length=10, null=True, unique=True, blank=True, verbose_name='کد جلسه')
     session = models.ForeignKey(Session, on_delete=models.SET_NULL, null=True, blank=True, related_name='trades',
                                 verbose_name='جلسه')
@@ -681,33 +854,47 @@ class Trade(models.Model):
                                             verbose_name='وضعیت کد رهگیری')
     datetime_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date and Time of Creation'))
 
+    code_references = {'session_code': 'session'}
+    tracked_fields = code_reference_tracked_fields(code_references)
+
+    objects = TradeQuerySet.as_manager()
+
+    @property
+    def parties(self):
+        """
+        File and customer of the trade's session that match its type (sale_file/buyer or rent_file/renter,
+        the others None). Read once per session and kept on the instance; use
+        Trade.objects.with_parties() to load them with the trades.
+        """
+        cached = self.__dict__.get('_parties')
+        if cached is None or cached[0] != (self.session_id, self.type):
+            session = self.session
+            parties = dict.fromkeys(('sale_file', 'rent_file', 'buyer', 'renter'))
+            if session is not None and self.type == 'sale':
+                parties.update(sale_file=session.sale_file, buyer=session.buyer)
+            elif session is not None and self.type == 'rent':
+                parties.update(rent_file=session.rent_file, renter=session.renter)
+            cached = self._parties = ((self.session_id, self.type), parties)
+        return cached[1]
+
     @property
     def sale_file(self):
-        if self.type == 'sale' and self.session:
-            file = self.session.sale_file
-            return file
+        return self.parties['sale_file']
 
     @property
     def rent_file(self):
-        if self.type == 'rent' and self.session:
-            file = self.session.rent_file
-            return file
+        return self.parties['rent_file']
 
     @property
     def buyer(self):
-        if self.type == 'sale' and self.session:
-            buyer = self.session.buyer
-            return buyer
+        return self.parties['buyer']
 
     @property
     def renter(self):
-        if self.type == 'rent' and self.session:
-            renter = self.session.renter
-            return renter
+        return self.parties['renter']
 
     def save(self, *args, **kwargs):
-        if not self.session:
-            self.session = Session.objects.get(code=self.session_code)
+        self.resolve_code_references([self], strict=True)
         if self.followup_code:
             self.followup_code_status = choices.fc_statuses[0][0]
         else:
@@ -719,9 +906,9 @@ class Trade(models.Model):
     def __str__(self):
         if self.session:
             if self.type == 'sale':
-                return f'معامله: {self.get_type_display()} / {self.code} / {self.session.sale_file}'
+                return f'معامله: {self.get_type_display()} / {self.code} / {self.sale_file}'
             else:
-                return f'معامله: {self.get_type_display()} / {self.code} / {self.session.rent_file}'
+                return f'معامله: {self.get_type_display()} / {self.code} / {self.rent_file}'
         else:
             return f'معامله: {self.get_type_display()} / {self.code}'
 
@@ -754,8 +941,23 @@ class TaskBoss(models.Model):
     condition = models.CharField(max_length=10, choices=choices.boss_task_statuses, default='op', blank=True, null=True,
                                  verbose_name='وضعیت وظیفه مدیر')
     code = models.CharField(max_length=10, null=True, unique=True, blank=True)
+    # Display snapshot taken when the task is created, so the task queue lists from this table alone
+    title = models.CharField(max_length=200, blank=True, default='', verbose_name='عنوان')
+    agent_name = models.CharField(max_length=200, blank=True, default='', verbose_name='نام مشاور')
+    location_name = models.CharField(max_length=200, blank=True, default='', verbose_name='محدوده')
     datetime_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date and Time of Creation'))
 
+    # Relations the approve page needs for each task type
+    target_relations = {
+        'sf': ('new_sale_file', 'new_sale_file__created_by', 'new_sale_file__sub_district'),
+        'rf': ('new_rent_file', 'new_rent_file__created_by', 'new_rent_file__sub_district'),
+        'by': ('new_buyer', 'new_buyer__created_by'),
+        'rt': ('new_renter', 'new_renter__created_by'),
+        'ps': ('new_person', 'new_person__created_by'),
+        'ss': ('new_session', 'new_session__agent', 'new_session__sale_file', 'new_session__rent_file'),
+        'rs': ('result_session', 'result_session__agent', 'result_session__sale_file', 'result_session__rent_file'),
+    }
+
     @property
     def agent(self):
         if self.new_sale_file:
@@ -770,9 +972,28 @@ class TaskBoss(models.Model):
             return getattr(self.new_person, 'created_by', None)
         return None
 
+    def fill_display_fields(self):
+        session = self.new_session or self.result_session
+        if session:
+            agent = session.agent
+            file = session.sale_file if session.type == 'sale' else session.rent_file if session.type == 'rent' else None
+            title = file.title if file else ''
+            location = file.sub_district if file else None
+        else:
+            target = self.new_sale_file or self.new_rent_file or self.new_buyer or self.new_renter or self.new_person
+            agent = self.agent
+            title = (getattr(target, 'title', None) or getattr(target, 'name', None)) if target else ''
+            # Buyers and renters get their sub-districts after creation, so their district is shown instead
+            location = getattr(target, 'sub_district', None) or getattr(target, 'district', None)
+        self.title = (title or '')[:200]
+        self.agent_name = ((agent.name_family or str(agent)) if agent else '')[:200]
+        self.location_name = (location.name if location else '')[:200]
+
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = generate_unique_code_longer()
+        if self._state.adding:
+            self.fill_display_fields()
         super(TaskBoss, self).save(*args, **kwargs)
 
     def __str__(self):
@@ -782,12 +1003,16 @@ class TaskBoss(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'وظیفه مدیریتی'
         verbose_name_plural = 'وظایف مدیریتی'
+        indexes = [
+            models.Index(fields=['condition', '-datetime_created']),
+            models.Index(fields=['condition', 'type', '-datetime_created']),
+        ]
 
     def get_absolute_url(self):
         return reverse('boss_task_approve', args=[self.pk, self.code])
 
 
-class Reminder(models.Model):
+class Reminder(CodeReferenceMixin, FieldTrackerMixin, models.Model):
     title = models.CharField(max_length=200, verbose_name=_('Title'))
     date = models.CharField(max_length=200, verbose_name=_('Deadline'))
     agent = models.ForeignKey(CustomUserModel, on_delete=models.SET_NULL, null=True, blank=True, related_name='reminders',
@@ -809,19 +1034,15 @@ class Reminder(models.Model):
     status = models.CharField(max_length=10, choices=choices.reminder_statuses, default='OP', verbose_name=_('Status'))
     datetime_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date and Time of Creation'))
 
+    code_references = FILE_AND_CUSTOMER_CODES
+    tracked_fields = code_reference_tracked_fields(FILE_AND_CUSTOMER_CODES)
+
     @property
     def sub_district(self):
         return self.agent.sub_district
 
     def save(self, *args, **kwargs):
-        if not self.sale_file and self.sale_file_code:
-            self.sale_file = SaleFile.objects.get(code=self.sale_file_code)
-        if not self.rent_file and self.rent_file_code:
-            self.rent_file = RentFile.objects.get(code=self.rent_file_code)
-        if not self.buyer and self.buyer_code:
-            self.buyer = Buyer.objects.get(code=self.buyer_code)
-        if not self.renter and self.renter_code:
-            self.renter = Renter.objects.get(code=self.renter_code)
+        self.resolve_code_references([self], strict=True)
         if not self.code:
             self.code = generate_unique_code_longer()
         super(Reminder, self).save(*args, **kwargs)
@@ -833,6 +1054,10 @@ class Reminder(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'یادآور'
         verbose_name_plural = 'یادآورها'
+        indexes = [
+            models.Index(fields=['agent', 'date']),
+        ]
+        constraints = code_reference_constraints('reminder', FILE_AND_CUSTOMER_CODES)
 
     def get_absolute_url(self):
         return reverse('reminder_detail', args=[self.pk, self.code])
@@ -856,17 +1081,23 @@ class Mark(models.Model):
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = generate_unique_code_longer()
-        if self.sale_file:
+        if self.sale_file_id:
             self.type = choices.mark_types[0][0]
-        if self.rent_file:
+        if self.rent_file_id:
             self.type = choices.mark_types[1][0]
-        if self.buyer:
+        if self.buyer_id:
             self.type = choices.mark_types[2][0]
-        if self.renter:
+        if self.renter_id:
             self.type = choices.mark_types[3][0]
-        self.slug = slugify(self.agent.username)
+        if not self.slug:
+            self.slug = slugify(self.agent.username)
         super(Mark, self).save(*args, **kwargs)
 
+    @staticmethod
+    def cache_key(agent_id):
+        # Marked ids of an agent, see utils.get_marked_ids
+        return f'marks_{agent_id}'
+
     def __str__(self):
         return f'{self.agent} / {self.get_type_display()} / {self.code}'
 
@@ -874,6 +1105,12 @@ class Mark(models.Model):
         ordering = ('-datetime_created',)
         verbose_name = 'نشان‌شده'
         verbose_name_plural = 'نشان‌شده‌ها'
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'sale_file'], name='unique_sale_file_mark'),
+            models.UniqueConstraint(fields=['agent', 'rent_file'], name='unique_rent_file_mark'),
+            models.UniqueConstraint(fields=['agent', 'buyer'], name='unique_buyer_mark'),
+            models.UniqueConstraint(fields=['agent', 'renter'], name='unique_renter_mark'),
+        ]
 
     def get_absolute_url(self):
         return reverse('mark_detail', args=[self.pk])
@@ -900,6 +1137,10 @@ class Report(models.Model):
         verbose_name = 'گزارش'
         verbose_name_plural = 'گزارش‌ها'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['agent', 'date']),
+            models.Index(fields=['date']),
+        ]
 
     def __str__(self):
         if self.agent.name_family:
@@ -911,41 +1152,51 @@ class Report(models.Model):
         return reverse('report_detail', args=[self.agent, self.date])
 
 
-class ReportItem(models.Model):
+class ReportItem(FieldTrackerMixin, models.Model):
     report = models.ForeignKey(Report, on_delete=models.CASCADE, null=True, blank=True, related_name='ads', verbose_name='کزارش')
     file_code = models.CharField(max_length=10, null=True, blank=True, verbose_name='کد فایل')
     customer_code = models.CharField(max_length=10, null=True, blank=True, verbose_name='کد مشتری')
     description = models.TextField(max_length=1000, blank=True, null=True, verbose_name='توضیحات')
     type = models.CharField(max_length=10, choices=choices.report_item_choices, verbose_name='نوع')
+    # Snapshot of what the codes point to, filled on save so report pages don't scan the code lists per item
+    sale_file = models.ForeignKey(SaleFile, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='report_items', verbose_name='فایل فروش')
+    rent_file = models.ForeignKey(RentFile, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='report_items', verbose_name='فایل اجاره')
+    buyer = models.ForeignKey(Buyer, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='report_items', verbose_name='خریدار')
+    renter = models.ForeignKey(Renter, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='report_items', verbose_name='مستاجر')
     datetime_created = models.DateTimeField(auto_now_add=True, verbose_name=_('Date and Time of Creation'))
 
+    tracked_fields = ('file_code', 'customer_code')
+
+    @staticmethod
+    def _listed(obj):
+        if obj is not None and obj.status == 'acc' and obj.delete_request != 'Yes':
+            return obj
+        return None
+
     @property
     def file(self):
-        sale_file_codes = (SaleFile.objects.exclude(delete_request='Yes').filter(status='acc')
-                           .values('code').values_list('code', flat=True))
-        rent_file_codes = (RentFile.objects.exclude(delete_request='Yes').filter(status='acc')
-                           .values('code').values_list('code', flat=True))
-        if self.file_code in sale_file_codes:
-            file = SaleFile.objects.get(code=self.file_code)
-            return file
-        if self.file_code in rent_file_codes:
-            file = RentFile.objects.get(code=self.file_code)
-            return file
-        return None
+        return self._listed(self.sale_file) or self._listed(self.rent_file)
 
     @property
     def customer(self):
-        buyer_codes = (Buyer.objects.exclude(delete_request='Yes').filter(status='acc')
-                           .values('code').values_list('code', flat=True))
-        renter_codes = (Renter.objects.exclude(delete_request='Yes').filter(status='acc')
-                           .values('code').values_list('code', flat=True))
-        if self.customer_code in buyer_codes:
-            customer = Buyer.objects.get(code=self.customer_code)
-            return customer
-        if self.customer_code in renter_codes:
-            customer = Renter.objects.get(code=self.customer_code)
-            return customer
-        return None
+        return self._listed(self.buyer) or self._listed(self.renter)
+
+    def resolve_codes(self):
+        # Only a changed code, or one whose snapshot is still empty, is looked up again
+        if self.has_changed('file_code') or (self.file_code and not (self.sale_file_id or self.rent_file_id)):
+            self.sale_file = SaleFile.objects.filter(code=self.file_code).first() if self.file_code else None
+            self.rent_file = RentFile.objects.filter(code=self.file_code).first() if self.file_code else None
+        if self.has_changed('customer_code') or (self.customer_code and not (self.buyer_id or self.renter_id)):
+            self.buyer = Buyer.objects.filter(code=self.customer_code).first() if self.customer_code else None
+            self.renter = Renter.objects.filter(code=self.customer_code).first() if self.customer_code else None
+
+    def save(self, *args, **kwargs):
+        self.resolve_codes()
+        super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = 'آگهی'
@@ -967,6 +1218,43 @@ class ReportItem(models.Model):
             return reverse('report_item_detail', args=[self.pk, self.type])
 
 
+def resolve_report_items(items):
+    """
+    Fill the code snapshots of report items that don't have one yet (rows saved before the snapshot existed),
+    with one query per target model, so at most four queries for a whole report.
+
+    Args:
+        items: list of ReportItem, ideally loaded with select_related('sale_file', 'rent_file', 'buyer', 'renter')
+
+    Returns:
+        the same list
+    """
+    unresolved = [item for item in items
+                  if (item.file_code and not (item.sale_file_id or item.rent_file_id))
+                  or (item.customer_code and not (item.buyer_id or item.renter_id))]
+    if not unresolved:
+        return items
+
+    file_codes = {item.file_code for item in unresolved if item.file_code}
+    customer_codes = {item.customer_code for item in unresolved if item.customer_code}
+    sale_files = SaleFile.objects.in_bulk(file_codes, field_name='code') if file_codes else {}
+    rent_files = RentFile.objects.in_bulk(file_codes, field_name='code') if file_codes else {}
+    buyers = Buyer.objects.in_bulk(customer_codes, field_name='code') if customer_codes else {}
+    renters = Renter.objects.in_bulk(customer_codes, field_name='code') if customer_codes else {}
+
+    changed = []
+    for item in unresolved:
+        item.sale_file = sale_files.get(item.file_code)
+        item.rent_file = rent_files.get(item.file_code)
+        item.buyer = buyers.get(item.customer_code)
+        item.renter = renters.get(item.customer_code)
+        if item.sale_file_id or item.rent_file_id or item.buyer_id or item.renter_id:
+            changed.append(item)
+    if changed:
+        ReportItem.objects.bulk_update(changed, ['sale_file', 'rent_file', 'buyer', 'renter'])
+    return items
+
+
 class Announcement(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
@@ -1044,3 +1332,156 @@ class InteractionItem(models.Model):
         return f"آیتم در  {self.interaction.id} - {self.content_object}"
 
 
+
+
+# ------------------------------ Phone numbers ------------------------------
+class PhoneCluster(models.Model):
+    """
+    A phone number shared by two or more accepted persons, buyers or renters of the same type.
+    Rows are refreshed by signals whenever a member is saved or deleted, so pages look duplicates
+    up here instead of grouping the whole table.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name='نوع')
+    phone_number = models.CharField(max_length=11, verbose_name=_('Phone Number'))
+    object_ids = models.JSONField(default=list, verbose_name='شناسه‌ها')
+    size = models.PositiveIntegerField(default=0, verbose_name='تعداد')
+    datetime_updated = models.DateTimeField(auto_now=True, verbose_name='زمان بروزرسانی')
+
+    class Meta:
+        verbose_name = 'شماره تکراری'
+        verbose_name_plural = 'شماره‌های تکراری'
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'phone_number'], name='unique_phone_cluster'),
+        ]
+
+    def __str__(self):
+        return f'{self.phone_number} ({self.size})'
+
+
+# -------------------------------- Search ---------------------------------
+class SearchDocument(models.Model):
+    """
+    One indexed SaleFile/RentFile/Buyer/Renter/Person row (see dashboard.search); `length` is its number of terms.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    length = models.PositiveIntegerField(default=0, verbose_name='تعداد واژه‌ها')
+    datetime_indexed = models.DateTimeField(auto_now=True, verbose_name='زمان نمایه‌سازی')
+
+    class Meta:
+        verbose_name = 'سند جستجو'
+        verbose_name_plural = 'اسناد جستجو'
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id} ({self.length})"
+
+
+class SearchTerm(models.Model):
+    """
+    Vocabulary of the search index with the number of documents containing each term.
+    """
+    term = models.CharField(max_length=40, unique=True, verbose_name='واژه')
+    document_count = models.PositiveIntegerField(default=0, verbose_name='تعداد اسناد')
+
+    class Meta:
+        verbose_name = 'واژه جستجو'
+        verbose_name_plural = 'واژه‌های جستجو'
+
+    def __str__(self):
+        return f"{self.term} ({self.document_count})"
+
+
+class SearchPosting(models.Model):
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=40, verbose_name='واژه')
+    frequency = models.PositiveSmallIntegerField(default=1, verbose_name='تکرار')
+
+    class Meta:
+        verbose_name = 'ردیف نمایه'
+        verbose_name_plural = 'ردیف‌های نمایه'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'document'], name='unique_search_posting'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.document_id} ({self.frequency})"
+
+
+# -------------------------------- Archive ---------------------------------
+class ArchivedRecord(models.Model):
+    """
+    A cold SaleFile/RentFile/Buyer/Renter row moved out of its table by utils.archive_rows.
+    `data` holds the row's serialized fields (queryable, e.g. data__area__gte), `related` the rows deleted with it
+    (marks, boss tasks) and `links` the ids of rows whose foreign key to it was cleared, so restore_archived
+    can put everything back under the same pk.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    code = models.CharField(max_length=10, null=True, blank=True, db_index=True, verbose_name='کد')
+    title = models.CharField(max_length=230, blank=True, verbose_name='عنوان')
+    reason = models.CharField(max_length=10, choices=choices.archive_reasons, verbose_name='علت بایگانی')
+    data = models.JSONField(encoder=DjangoJSONEncoder, verbose_name='داده')
+    related = models.JSONField(encoder=DjangoJSONEncoder, default=list, blank=True, verbose_name='ردیف‌های وابسته')
+    links = models.JSONField(default=dict, blank=True, verbose_name='ارجاع‌ها')
+    datetime_archived = models.DateTimeField(auto_now_add=True, verbose_name='زمان بایگانی')
+
+    recover_urls = {
+        'salefile': ('sale_file_recover', 'unique_url_id'),
+        'rentfile': ('rent_file_recover', 'unique_url_id'),
+        'buyer': ('buyer_recover', 'code'),
+        'renter': ('renter_recover', 'code'),
+    }
+
+    @property
+    def model_name(self):
+        return ContentType.objects.get_for_id(self.content_type_id).model
+
+    def serialized_row(self):
+        return {'model': f'dashboard.{self.model_name}', 'pk': self.object_id, 'fields': self.data}
+
+    def get_recover_url(self):
+        name, key = self.recover_urls[self.model_name]
+        return reverse(name, args=[self.object_id, self.data.get(key)])
+
+    class Meta:
+        verbose_name = 'ردیف بایگانی'
+        verbose_name_plural = 'ردیف‌های بایگانی'
+        ordering = ['-datetime_archived']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_archived_record'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', '-datetime_archived']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} / {self.code} ({self.get_reason_display()})"
+
+
+# ------------------------------- Monitoring --------------------------------
+class QueryLog(models.Model):
+    view_name = models.CharField(max_length=200, db_index=True, verbose_name='نام ویو')
+    path = models.CharField(max_length=500, verbose_name='مسیر')
+    method = models.CharField(max_length=10, verbose_name='متد')
+    status_code = models.PositiveSmallIntegerField(verbose_name='کد پاسخ')
+    query_count = models.PositiveIntegerField(verbose_name='تعداد کوئری')
+    sql_time = models.FloatField(verbose_name='زمان SQL (میلی‌ثانیه)')
+    duplicate_count = models.PositiveIntegerField(default=0, verbose_name='کوئری‌های تکراری')
+    duplicates = models.JSONField(default=list, blank=True, verbose_name='اثر انگشت تکراری‌ها')
+    over_budget = models.BooleanField(default=False, verbose_name='خارج از بودجه')
+    datetime_created = models.DateTimeField(auto_now_add=True, verbose_name='زمان ساخت')
+
+    class Meta:
+        verbose_name = 'لاگ کوئری'
+        verbose_name_plural = 'لاگ‌های کوئری'
+        ordering = ['-datetime_created']
+        indexes = [
+            models.Index(fields=['-datetime_created']),
+            models.Index(fields=['view_name', '-datetime_created']),
+        ]
+
+    def __str__(self):
+        return f"{self.view_name} - {self.query_count} کوئری / {self.sql_time:.1f}ms"
@@ -0,0 +1,321 @@
+"""
+Full-text search over sale files, rent files, buyers, renters and persons.
+
+Text is normalized (Arabic/Persian letters, Persian/Arabic digits, ZWNJ, diacritics) and split into terms that are
+kept in an inverted index (SearchDocument / SearchTerm / SearchPosting); the signals in signals.py keep it current
+and `rebuild_search_index` fills it from scratch. Query terms match exactly, by prefix and with one or two typos,
+and documents are ranked with BM25.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q
+from django.db.models.functions import Length
+
+from .models import SaleFile, RentFile, Buyer, Renter, Person, SearchDocument, SearchTerm, SearchPosting
+
+
+# Indexed fields per model; 'person.name' follows the foreign key
+SEARCH_FIELDS = {
+    SaleFile: ('code', 'title', 'description', 'address', 'street', 'person.name', 'person.phone_number'),
+    RentFile: ('code', 'title', 'description', 'address', 'street', 'person.name', 'person.phone_number'),
+    Buyer: ('code', 'name', 'phone_number', 'description'),
+    Renter: ('code', 'name', 'phone_number', 'description'),
+    Person: ('name', 'phone_number', 'description'),
+}
+SEARCH_TYPES = {'sf': SaleFile, 'rf': RentFile, 'by': Buyer, 'rt': Renter, 'ps': Person}
+
+MAX_TERM_LENGTH = 40
+MAX_QUERY_TERMS = 6
+# Expansions kept per query term, most common first
+MAX_EXPANSIONS = 20
+# Score multipliers of non-exact matches
+PREFIX_WEIGHT = 0.8
+TYPO_WEIGHT = 0.6
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+STATS_CACHE_KEY = 'search_index_stats'
+STATS_CACHE_TIMEOUT = 60 * 10
+
+_characters = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ؤ': 'و',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4', '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4', '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    # ZWNJ separates words like a space; joiners, direction marks and tatweel are dropped
+    '\u200c': ' ', '\u200d': '', '\u200e': '', '\u200f': '', '\u0640': '',
+})
+_diacritics = re.compile(r'[\u064b-\u065f\u0670]')
+# Runs of letters or runs of digits, so "120متری" gives "120" and "متری"
+_terms = re.compile(r'[^\W\d_]+|\d+')
+
+stopwords = frozenset({'و', 'در', 'به', 'از', 'که', 'با', 'را', 'این', 'ان', 'برای', 'تا', 'یا', 'هم', 'یک'})
+
+
+def normalize(text):
+    return _diacritics.sub('', str(text).translate(_characters)).lower()
+
+
+def tokenize(text):
+    return [term[:MAX_TERM_LENGTH] for term in _terms.findall(normalize(text)) if term not in stopwords]
+
+
+def _field_value(instance, path):
+    value = instance
+    for name in path.split('.'):
+        value = getattr(value, name, None)
+        if value is None:
+            return ''
+    return value
+
+
+def document_terms(instance):
+    text = ' '.join(str(_field_value(instance, path)) for path in SEARCH_FIELDS[type(instance)])
+    return Counter(tokenize(text))
+
+
+def indexed_field_names(model):
+    return {path.split('.')[0] for path in SEARCH_FIELDS[model]}
+
+
+# ------------------------------- Maintenance -------------------------------
+def _adjust_document_counts(terms, delta):
+    if not terms:
+        return
+    if delta > 0:
+        SearchTerm.objects.bulk_create([SearchTerm(term=term) for term in terms], ignore_conflicts=True)
+    SearchTerm.objects.filter(term__in=terms).update(document_count=F('document_count') + delta)
+
+
+def index_object(instance):
+    """
+    Add or refresh one row in the index; only the postings that changed are written.
+    """
+    counts = document_terms(instance)
+    content_type = ContentType.objects.get_for_model(instance)
+    with transaction.atomic():
+        document, created = SearchDocument.objects.get_or_create(content_type=content_type, object_id=instance.pk)
+        old = {} if created else dict(document.postings.values_list('term', 'frequency'))
+        added = [term for term in counts if term not in old]
+        removed = [term for term in old if term not in counts]
+        changed = [term for term in counts if term in old and old[term] != counts[term]]
+
+        if removed:
+            document.postings.filter(term__in=removed).delete()
+        SearchPosting.objects.bulk_create([SearchPosting(document=document, term=term, frequency=counts[term])
+                                           for term in added])
+        for term in changed:
+            document.postings.filter(term=term).update(frequency=counts[term])
+        _adjust_document_counts(added, 1)
+        _adjust_document_counts(removed, -1)
+        if created or added or removed or changed:
+            document.length = sum(counts.values())
+            document.save(update_fields=['length', 'datetime_indexed'])
+
+
+def unindex_object(instance):
+    content_type = ContentType.objects.get_for_model(instance)
+    document = SearchDocument.objects.filter(content_type=content_type, object_id=instance.pk).first()
+    if document is None:
+        return
+    with transaction.atomic():
+        _adjust_document_counts(list(document.postings.values_list('term', flat=True)), -1)
+        document.delete()
+
+
+def rebuild_index(batch_size=500, stdout=None):
+    """
+    Drop and rebuild the whole index with bulk inserts.
+
+    Returns:
+        int: Number of indexed documents
+    """
+    total = 0
+    document_counts = Counter()
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        for model in SEARCH_FIELDS:
+            content_type = ContentType.objects.get_for_model(model)
+            queryset = model.objects.order_by('pk')
+            if 'person' in indexed_field_names(model):
+                queryset = queryset.select_related('person')
+            last_pk = 0
+            while True:
+                rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not rows:
+                    break
+                last_pk = rows[-1].pk
+                counts = {row.pk: document_terms(row) for row in rows}
+                SearchDocument.objects.bulk_create([
+                    SearchDocument(content_type=content_type, object_id=pk, length=sum(terms.values()))
+                    for pk, terms in counts.items()
+                ])
+                # Backends without RETURNING (MySQL) leave pks unset, so read them back
+                document_ids = dict(SearchDocument.objects.filter(content_type=content_type, object_id__in=counts)
+                                    .values_list('object_id', 'pk'))
+                SearchPosting.objects.bulk_create([
+                    SearchPosting(document_id=document_ids[pk], term=term, frequency=min(frequency, 32767))
+                    for pk, terms in counts.items() for term, frequency in terms.items()
+                ], batch_size=5000)
+                for terms in counts.values():
+                    document_counts.update(terms.keys())
+                total += len(rows)
+            if stdout:
+                stdout.write(f'  {model._meta.verbose_name_plural}: indexed')
+        SearchTerm.objects.bulk_create([SearchTerm(term=term, document_count=count)
+                                        for term, count in document_counts.items()], batch_size=5000)
+    cache.delete(STATS_CACHE_KEY)
+    return total
+
+
+# --------------------------------- Queries ---------------------------------
+def edit_distance(first, second, limit):
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions, adjacent swaps),
+    giving up with limit + 1 as soon as it is exceeded.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous_row, row = None, list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+def allowed_typos(term):
+    if len(term) < 4 or term.isdigit():
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+def expand_term(term):
+    """
+    Index terms a query term matches, with the weight of each match.
+
+    Returns:
+        dict: {index term: weight}
+    """
+    typos = allowed_typos(term)
+    lookup = Q(term__startswith=term)
+    if typos:
+        lookup |= Q(term__startswith=term[0], length__gte=len(term) - typos, length__lte=len(term) + typos)
+    candidates = (SearchTerm.objects.filter(document_count__gt=0).annotate(length=Length('term')).filter(lookup)
+                  .order_by('-document_count').values_list('term', flat=True)[:500])
+
+    # The term itself always counts, even when more common longer terms fill the candidate list
+    expansions = {term: 1.0}
+    for candidate in candidates:
+        if candidate == term:
+            continue
+        if candidate.startswith(term):
+            if len(expansions) < MAX_EXPANSIONS:
+                expansions.setdefault(candidate, PREFIX_WEIGHT)
+        elif typos and len(expansions) < MAX_EXPANSIONS and edit_distance(term, candidate, typos) <= typos:
+            expansions.setdefault(candidate, TYPO_WEIGHT)
+    return expansions
+
+
+def index_stats():
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = SearchDocument.objects.aggregate(count=Count('pk'), average_length=Avg('length'))
+        stats['average_length'] = stats['average_length'] or 1
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def visible_queryset(model, user):
+    """
+    Rows of `model` the user may find: bosses see everything, others only accepted rows without
+    a delete request (and consultants only their own customers, as in the search views).
+    """
+    queryset = model.objects.all()
+    if 'person' in indexed_field_names(model):
+        queryset = queryset.select_related('person', 'sub_district')
+    if user.title == 'bs':
+        return queryset
+    queryset = queryset.filter(status='acc').exclude(delete_request='Yes')
+    if user.title == 'cp' and model in (Buyer, Renter):
+        queryset = queryset.filter(created_by=user)
+    return queryset
+
+
+def search(query, user, types=None, limit=30):
+    """
+    Rank indexed rows against a free-text query.
+
+    Args:
+        query: Text typed by the user
+        user: Requesting user (limits what can be returned)
+        types: Keys of SEARCH_TYPES to search (default: all)
+        limit: Maximum number of results
+
+    Returns:
+        list: (score, type key, instance) tuples, best first
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    types = [key for key in (types or SEARCH_TYPES) if key in SEARCH_TYPES]
+    content_types = {ContentType.objects.get_for_model(SEARCH_TYPES[key]).pk: key for key in types}
+
+    expansions = {term: expand_term(term) for term in terms}
+    weights = defaultdict(list)
+    for position, matches in enumerate(expansions.values()):
+        for index_term, weight in matches.items():
+            weights[index_term].append((position, weight))
+    if not weights:
+        return []
+
+    # Rows the user may not see are left out before ranking, so they cannot push visible matches past the limit
+    visible = Q()
+    for content_type_id, key in content_types.items():
+        restriction = Q(document__content_type_id=content_type_id)
+        if user.title != 'bs':
+            restriction &= Q(document__object_id__in=visible_queryset(SEARCH_TYPES[key], user).values('pk'))
+        visible |= restriction
+
+    stats = index_stats()
+    document_counts = dict(SearchTerm.objects.filter(term__in=weights).values_list('term', 'document_count'))
+    postings = (SearchPosting.objects.filter(visible, term__in=weights)
+                .values_list('document__content_type_id', 'document__object_id', 'document__length', 'term',
+                             'frequency'))
+
+    # Each query term contributes its best matching index term to a document's score
+    best = defaultdict(dict)
+    for content_type_id, object_id, length, index_term, frequency in postings.iterator():
+        document_count = document_counts.get(index_term, 1)
+        idf = math.log(1 + (stats['count'] - document_count + 0.5) / (document_count + 0.5))
+        saturation = frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / stats['average_length']))
+        scores = best[(content_type_id, object_id)]
+        for position, weight in weights[index_term]:
+            score = weight * idf * saturation
+            if score > scores.get(position, 0):
+                scores[position] = score
+
+    ranked = sorted(((sum(scores.values()), key) for key, scores in best.items()), reverse=True)[:limit]
+    ids = defaultdict(list)
+    for _, (content_type_id, object_id) in ranked:
+        ids[content_type_id].append(object_id)
+    objects = {}
+    for content_type_id, object_ids in ids.items():
+        model = SEARCH_TYPES[content_types[content_type_id]]
+        for instance in visible_queryset(model, user).filter(pk__in=object_ids):
+            objects[(content_type_id, instance.pk)] = instance
+
+    results = [(score, content_types[key[0]], objects[key]) for score, key in ranked if key in objects]
+    return results[:limit]
@@ -1,44 +1,44 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.core.cache import cache
 
-from . import models
+from . import models, locations, search, utils
 
 
 # --------------------------------- Tasks ---------------------------------
 @receiver(post_save, sender=models.SaleFile)
 def boss_task_sale_file(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_sale_file=instance, type='sf')
 
 
 @receiver(post_save, sender=models.RentFile)
 def boss_task_rent_file(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_rent_file=instance, type='rf')
 
 
 @receiver(post_save, sender=models.Buyer)
 def boss_task_buyer(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_buyer=instance, type='by')
 
 
 @receiver(post_save, sender=models.Renter)
 def boss_task_renter(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_renter=instance, type='rt')
 
 
 @receiver(post_save, sender=models.Person)
 def boss_task_person(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_person=instance, type='ps')
 
 
 @receiver(post_save, sender=models.Session)
 def boss_task_session(sender, instance, created, **kwargs):
-    if created:
+    if created and not kwargs.get('raw'):
         models.TaskBoss.objects.create(new_session=instance, type='ss')
 
 
@@ -64,18 +64,18 @@ def create_announcement_for_agents(instance, announcement_type):
     return None
 
 
-@receiver(pre_save, sender=models.SaleFile)
-def check_sale_file_status_change(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = models.SaleFile.objects.get(pk=instance.pk)
-            instance._status_changed_to_acc = (
-                    old_instance.status != 'acc' and instance.status == 'acc'
-            )
-        except models.SaleFile.DoesNotExist:
-            instance._status_changed_to_acc = False
+def track_status_change(instance, update_fields, raw=False):
+    # Uses the status remembered at load time (FieldTrackerMixin) instead of re-reading the row.
+    # Raw saves (fixtures, restoring archived rows) put back existing data and never announce.
+    if raw or (update_fields is not None and 'status' not in update_fields):
+        instance._status_changed_to_acc = False
     else:
-        instance._status_changed_to_acc = instance.status == 'acc'
+        instance._status_changed_to_acc = instance.status == 'acc' and instance.has_changed('status')
+
+
+@receiver(pre_save, sender=models.SaleFile)
+def check_sale_file_status_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    track_status_change(instance, update_fields, raw)
 
 
 @receiver(post_save, sender=models.SaleFile)
@@ -85,17 +85,8 @@ def create_announcement_for_sale_file(sender, instance, created, **kwargs):
 
 
 @receiver(pre_save, sender=models.RentFile)
-def check_rent_file_status_change(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = models.RentFile.objects.get(pk=instance.pk)
-            instance._status_changed_to_acc = (
-                    old_instance.status != 'acc' and instance.status == 'acc'
-            )
-        except models.RentFile.DoesNotExist:
-            instance._status_changed_to_acc = False
-    else:
-        instance._status_changed_to_acc = instance.status == 'acc'
+def check_rent_file_status_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    track_status_change(instance, update_fields, raw)
 
 
 @receiver(post_save, sender=models.RentFile)
@@ -105,17 +96,8 @@ def create_announcement_for_rent_file(sender, instance, created, **kwargs):
 
 
 @receiver(pre_save, sender=models.Buyer)
-def check_buyer_status_change(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = models.Buyer.objects.get(pk=instance.pk)
-            instance._status_changed_to_acc = (
-                    old_instance.status != 'acc' and instance.status == 'acc'
-            )
-        except models.Buyer.DoesNotExist:
-            instance._status_changed_to_acc = False
-    else:
-        instance._status_changed_to_acc = instance.status == 'acc'
+def check_buyer_status_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    track_status_change(instance, update_fields, raw)
 
 
 @receiver(post_save, sender=models.Buyer)
@@ -125,17 +107,8 @@ def create_announcement_for_buyer(sender, instance, created, **kwargs):
 
 
 @receiver(pre_save, sender=models.Renter)
-def check_renter_status_change(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old_instance = models.Renter.objects.get(pk=instance.pk)
-            instance._status_changed_to_acc = (
-                    old_instance.status != 'acc' and instance.status == 'acc'
-            )
-        except models.Renter.DoesNotExist:
-            instance._status_changed_to_acc = False
-    else:
-        instance._status_changed_to_acc = instance.status == 'acc'
+def check_renter_status_change(sender, instance, update_fields=None, raw=False, **kwargs):
+    track_status_change(instance, update_fields, raw)
 
 
 @receiver(post_save, sender=models.Renter)
@@ -144,3 +117,127 @@ def create_announcement_for_renter(sender, instance, created, **kwargs):
         create_announcement_for_agents(instance, 'rt')
 
 
+# --------------------------------- Sessions ---------------------------------
+@receiver(post_save, sender=models.SaleFile)
+@receiver(post_save, sender=models.RentFile)
+def update_session_sub_district(sender, instance, created, raw=False, **kwargs):
+    # Keeps Session.sub_district (copied from the visited file) in step when a file moves
+    if created or raw or instance.loaded_value('sub_district_id') == instance.sub_district_id:
+        return
+    if sender is models.SaleFile:
+        sessions = models.Session.objects.filter(sale_file=instance)
+    else:
+        sessions = models.Session.objects.filter(rent_file=instance, sale_file__isnull=True)
+    sessions.update(sub_district_id=instance.sub_district_id)
+
+
+# --------------------------------- Reports ---------------------------------
+@receiver(post_save, sender=models.Report)
+@receiver(post_delete, sender=models.Report)
+def clear_report_compliance_cache(sender, instance, **kwargs):
+    date = str(instance.date)
+    cache.delete(utils.compliance_cache_key(date))
+    parts = date.split('/')
+    if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+        cache.delete(utils.heatmap_cache_key(int(parts[0]), int(parts[1])))
+
+
+# --------------------------------- Search ---------------------------------
+@receiver(post_save, sender=models.SaleFile)
+@receiver(post_save, sender=models.RentFile)
+@receiver(post_save, sender=models.Buyer)
+@receiver(post_save, sender=models.Renter)
+@receiver(post_save, sender=models.Person)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch unindexed fields (status, expiry, ...) leave the index alone
+    if update_fields is not None and not set(update_fields) & search.indexed_field_names(sender):
+        return
+    search.index_object(instance)
+    if sender is models.Person and not kwargs.get('created'):
+        # Files are indexed with their person's name and phone
+        for file in [*instance.sale_files.select_related('person'), *instance.rent_files.select_related('person')]:
+            search.index_object(file)
+
+
+@receiver(post_delete, sender=models.SaleFile)
+@receiver(post_delete, sender=models.RentFile)
+@receiver(post_delete, sender=models.Buyer)
+@receiver(post_delete, sender=models.Renter)
+@receiver(post_delete, sender=models.Person)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_object(instance)
+
+
+# --------------------------------- Phone numbers ---------------------------------
+phone_cluster_fields = ('status', 'delete_request', 'phone_normalized')
+
+
+@receiver(post_save, sender=models.Person)
+@receiver(post_save, sender=models.Buyer)
+@receiver(post_save, sender=models.Renter)
+def update_phone_clusters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        changed = phone_cluster_fields
+    else:
+        changed = [field for field in phone_cluster_fields if instance.has_changed(field)]
+    if not changed:
+        return
+    was_member = not created and (instance.loaded_value('status') == 'acc'
+                                  and instance.loaded_value('delete_request') != 'Yes')
+    if not was_member and not (instance.status == 'acc' and instance.delete_request != 'Yes'):
+        # e.g. a new pending row: not counted before or after
+        return
+    # The old number may have lost a member, the current one may have gained one
+    phone_numbers = {instance.phone_normalized}
+    if 'phone_normalized' in changed and not created:
+        phone_numbers.add(instance.loaded_value('phone_normalized'))
+    utils.refresh_phone_clusters(sender, phone_numbers)
+
+
+@receiver(post_delete, sender=models.Person)
+@receiver(post_delete, sender=models.Buyer)
+@receiver(post_delete, sender=models.Renter)
+def remove_from_phone_clusters(sender, instance, **kwargs):
+    utils.refresh_phone_clusters(sender, [instance.phone_normalized])
+
+
+# --------------------------------- Person autocomplete ---------------------------------
+@receiver(post_save, sender=models.Person)
+@receiver(post_delete, sender=models.Person)
+def forget_person_choices(sender, instance, **kwargs):
+    utils.forget_person_choices()
+
+
+# --------------------------------- Marks ---------------------------------
+# post_delete also covers queryset deletes and rows removed with a marked file, person or agent
+@receiver(post_save, sender=models.Mark)
+@receiver(post_delete, sender=models.Mark)
+def clear_marks_cache(sender, instance, **kwargs):
+    utils.forget_marked_ids(instance.agent_id)
+
+
+# --------------------------------- Locations ---------------------------------
+@receiver(post_save, sender=models.Province)
+@receiver(post_save, sender=models.City)
+@receiver(post_save, sender=models.District)
+@receiver(post_save, sender=models.SubDistrict)
+@receiver(post_delete, sender=models.Province)
+@receiver(post_delete, sender=models.City)
+@receiver(post_delete, sender=models.District)
+@receiver(post_delete, sender=models.SubDistrict)
+def invalidate_location_tree(sender, instance, **kwargs):
+    locations.invalidate()
+
+
+@receiver(post_save, sender=models.Province)
+@receiver(post_save, sender=models.City)
+@receiver(post_save, sender=models.District)
+def refresh_sub_district_paths(sender, instance, created, raw=False, **kwargs):
+    # A new location has no sub-districts yet; a renamed or moved one changes its descendants' paths
+    if created or raw:
+        return
+    lookup = {models.Province: 'district__city__province', models.City: 'district__city',
+              models.District: 'district'}[sender]
+    locations.refresh_paths(models.SubDistrict.objects.filter(**{lookup: instance}))
@@ -1,3 +1,490 @@
+import os
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import choices, forms, models, search, utils
+
+
+# Performance suite: seeds synthetic data with `seed_data` and asserts query-count and wall-time ceilings per view.
+#   python manage.py test dashboard --settings=config.settings_test
+# PERF_SCALE multiplies the seeded data (e.g. PERF_SCALE=20), PERF_TIME_FACTOR loosens the time ceilings on slow machines.
+PERF_SCALE = max(int(os.environ.get('PERF_SCALE', '1')), 1)
+PERF_TIME_FACTOR = float(os.environ.get('PERF_TIME_FACTOR', '1'))
+
+# Wall-time ceiling (seconds) for views without their own entry
+DEFAULT_SECONDS = 1.0
+
+
+class PerformanceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', provinces=1, cities=2, districts=2, sub_districts=2,
+            persons=50 * PERF_SCALE, sale_files=200 * PERF_SCALE, rent_files=200 * PERF_SCALE,
+            buyers=100 * PERF_SCALE, renters=100 * PERF_SCALE, sessions=80 * PERF_SCALE,
+            trades=20 * PERF_SCALE, reminders=40 * PERF_SCALE, announcements=40 * PERF_SCALE,
+            days=60, stdout=StringIO(),
+        )
+        cls.boss = models.CustomUserModel.objects.filter(title='bs').first()
+        cls.agent = models.CustomUserModel.objects.filter(title='bt').first()
+        sub_district = cls.agent.sub_district
+        cls.sale_file = models.SaleFile.objects.filter(sub_district=sub_district, status='acc').first()
+        cls.rent_file = models.RentFile.objects.filter(sub_district=sub_district, status='acc').first()
+        cls.buyer = models.Buyer.objects.filter(sub_districts=sub_district, status='acc').first()
+        cls.renter = models.Renter.objects.filter(sub_districts=sub_district, status='acc').first()
+        cls.session = models.Session.objects.filter(agent=cls.agent).first()
+        cls.trade = models.Trade.objects.first()
+        cls.task = models.TaskBoss.objects.filter(type='sf').first()
+        cls.report = models.Report.objects.filter(agent=cls.agent).first()
+        cls.announcement = models.Announcement.objects.first()
+
+    def assertWithinBudget(self, user, name, args=None, query=None, max_queries=10, max_seconds=DEFAULT_SECONDS):
+        url = reverse(name, args=args)
+        if query:
+            url = f'{url}?{query}'
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200, url)
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f'{name} ran {len(queries)} queries (ceiling {max_queries}):\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries),
+        )
+        self.assertLessEqual(elapsed, max_seconds * PERF_TIME_FACTOR,
+                             f'{name} took {elapsed:.3f}s (ceiling {max_seconds}s)')
+        return response
+
+
+class BossViewsPerformanceTest(PerformanceTestCase):
+    def test_dashboard(self):
+        self.assertWithinBudget(self.boss, 'dashboard', max_queries=45, max_seconds=2)
+
+    def test_file_lists(self):
+        self.assertWithinBudget(self.boss, 'sale_file_list', max_queries=12)
+        self.assertWithinBudget(self.boss, 'rent_file_list', max_queries=12)
+        # Out-of-range dates are a form error, not a server error
+        self.assertWithinBudget(self.boss, 'sale_file_list', query='min_date=9999/01/01', max_queries=12)
+        self.assertWithinBudget(self.boss, 'rent_file_list', query='max_date=9999/01/01', max_queries=12)
+
+    def test_customer_lists(self):
+        self.assertWithinBudget(self.boss, 'person_list', max_queries=10)
+        self.assertWithinBudget(self.boss, 'buyer_list', max_queries=12)
+        self.assertWithinBudget(self.boss, 'renter_list', max_queries=12)
+
+    def test_details(self):
+        self.assertWithinBudget(self.boss, 'sale_file_detail', args=[self.sale_file.pk, self.sale_file.unique_url_id],
+                                max_queries=10)
+        self.assertWithinBudget(self.boss, 'rent_file_detail', args=[self.rent_file.pk, self.rent_file.unique_url_id],
+                                max_queries=12)
+        self.assertWithinBudget(self.boss, 'buyer_detail', args=[self.buyer.pk, self.buyer.code], max_queries=12)
+        self.assertWithinBudget(self.boss, 'renter_detail', args=[self.renter.pk, self.renter.code], max_queries=14)
+
+    def test_search(self):
+        for name in ('search_sale_files', 'search_rent_files', 'search_buyers', 'search_renters'):
+            self.assertWithinBudget(self.boss, name, query='q=آپارتمان', max_queries=5)
+        self.assertWithinBudget(self.boss, 'code_finder', query=f'code={self.sale_file.code}', max_queries=12)
+        self.assertWithinBudget(self.boss, 'full_text_search', query='q=آپارتمان', max_queries=15)
+
+    def test_filter_choices(self):
+        sub_district = self.agent.sub_district
+        self.assertWithinBudget(self.boss, 'location_choices', args=['sub-districts'],
+                                query=f'parent={sub_district.district_id}', max_queries=6)
+        self.assertWithinBudget(self.boss, 'person_autocomplete', query=f'q={self.sale_file.person.name[:2]}',
+                                max_queries=3)
+        response = self.assertWithinBudget(self.boss, 'person_autocomplete',
+                                           query=f'q={self.sale_file.person.phone_number[:7]}', max_queries=3)
+        self.assertIn(self.sale_file.person_id, [person['id'] for person in response.json()['results']])
+        self.assertWithinBudget(self.boss, 'sale_file_list', max_queries=12,
+                                query=f'sub_district={sub_district.pk}&person={self.sale_file.person_id}')
+
+    def test_services(self):
+        self.assertWithinBudget(self.boss, 'session_list', max_queries=5)
+        self.assertWithinBudget(self.boss, 'trade_list', max_queries=5)
+        self.assertWithinBudget(self.boss, 'session_detail', args=[self.session.pk, self.session.code], max_queries=5)
+        self.assertWithinBudget(self.boss, 'trade_detail', args=[self.trade.pk, self.trade.code], max_queries=8)
+
+    def test_trade_admin(self):
+        # Parties of every listed trade come from the changelist query, however many trades are seeded
+        admin = models.CustomUserModel.objects.create_superuser(username='perf_admin', password='perf_admin')
+        self.assertWithinBudget(admin, 'admin:dashboard_trade_changelist', max_queries=8)
+
+    def test_tasks(self):
+        self.assertWithinBudget(self.boss, 'boss_task_list', max_queries=6)
+        self.assertWithinBudget(self.boss, 'boss_task_approve', args=[self.task.pk, self.task.code], max_queries=6)
+        self.assertWithinBudget(self.boss, 'delete_request_list', max_queries=10)
+
+    def test_calendar(self):
+        self.assertWithinBudget(self.boss, 'current_month', max_queries=7)
+        self.assertWithinBudget(self.boss, 'previous_month', max_queries=7)
+        year, month = self.report.date.split('/')[:2]
+        self.assertWithinBudget(self.boss, 'calendar_month', args=[int(year), int(month)], max_queries=7)
+
+    def test_reports(self):
+        self.assertWithinBudget(self.boss, 'report_list', args=[self.report.date], max_queries=7)
+        self.assertWithinBudget(self.boss, 'report_detail', args=[self.agent.pk, self.report.date], max_queries=8)
+
+    def test_announcements(self):
+        self.assertWithinBudget(self.boss, 'announcement_list', max_queries=6)
+        self.assertWithinBudget(self.boss, 'announcement_detail', args=[self.announcement.pk], max_queries=18)
+
+
+class AgentViewsPerformanceTest(PerformanceTestCase):
+    def test_dashboard(self):
+        self.assertWithinBudget(self.agent, 'dashboard', max_queries=16)
+
+    def test_lists(self):
+        for name, max_queries in (('sale_file_list', 8), ('rent_file_list', 8), ('person_list', 10),
+                                  ('buyer_list', 9), ('renter_list', 9), ('reminder_list', 7),
+                                  ('location_list', 13)):
+            self.assertWithinBudget(self.agent, name, max_queries=max_queries)
+
+    def test_services(self):
+        self.assertWithinBudget(self.agent, 'session_list', max_queries=7)
+        self.assertWithinBudget(self.agent, 'trade_list', max_queries=7)
+
+    def test_marks(self):
+        for name in ('sale_file_marks', 'rent_file_marks', 'buyer_marks', 'renter_marks'):
+            self.assertWithinBudget(self.agent, name, max_queries=9)
+
+    def test_details(self):
+        self.assertWithinBudget(self.agent, 'sale_file_detail', args=[self.sale_file.pk, self.sale_file.unique_url_id],
+                                max_queries=10)
+        self.assertWithinBudget(self.agent, 'buyer_detail', args=[self.buyer.pk, self.buyer.code], max_queries=13)
+        self.assertWithinBudget(self.agent, 'session_detail', args=[self.session.pk, self.session.code], max_queries=6)
+
+    def test_calendar(self):
+        self.assertWithinBudget(self.agent, 'current_month', max_queries=8)
+        self.assertWithinBudget(self.agent, 'next_month', max_queries=8)
+
+    def test_interactions(self):
+        self.assertWithinBudget(self.agent, 'announcement_list', max_queries=9)
+        self.assertWithinBudget(self.agent, 'interaction_list', max_queries=7)
+
+
+def seed_small_database():
+    call_command('seed_data', provinces=1, cities=1, districts=1, sub_districts=2, persons=10, sale_files=10,
+                 rent_files=10, buyers=10, renters=10, sessions=10, trades=4, reminders=4, announcements=4, days=30,
+                 stdout=StringIO())
+
+
+class CodeReferenceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_small_database()
+
+    def test_edited_code_moves_the_foreign_key(self):
+        # The update view posts codes only, through the same form as the create view
+        sub_district = next(sub_district for sub_district in models.SubDistrict.objects.all()
+                            if sub_district.sale_files.count() >= 2 and sub_district.buyers.exists())
+        first_file, second_file = sub_district.sale_files.all()[:2]
+        buyer = sub_district.buyers.first()
+        agent = models.CustomUserModel.objects.get(title='bt', sub_district=sub_district)
+        boss = models.CustomUserModel.objects.get(title='bs')
+        session = models.Session.objects.create(type='sale', agent=agent, date=models.next_week_shamsi()[0][0],
+                                                time=choices.times[0][0], sale_file_code=first_file.code,
+                                                buyer_code=buyer.code)
+
+        session = models.Session.objects.get(pk=session.pk)
+        form = forms.SessionCreateForm(instance=session, user=boss, data={
+            'type': 'sale', 'agent': agent.pk, 'date': session.date, 'time': session.time,
+            'sale_file_code': second_file.code, 'buyer_code': buyer.code,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        session.refresh_from_db()
+        self.assertEqual(session.sale_file_id, second_file.pk)
+        self.assertEqual(session.buyer_id, buyer.pk)
+        self.assertEqual(session.sub_district_id, sub_district.pk)
+
+        out = StringIO()
+        call_command('resolve_code_references', check=True, stdout=out)
+        self.assertIn('All codes and foreign keys agree', out.getvalue())
+
+    def test_command_repairs_disagreeing_codes(self):
+        session = models.Session.objects.filter(type='sale').first()
+        other_code = models.SaleFile.objects.exclude(pk=session.sale_file_id).values_list('code', flat=True).first()
+        models.Session.objects.filter(pk=session.pk).update(sale_file_code=other_code)
+
+        call_command('resolve_code_references', stdout=StringIO())
+        session.refresh_from_db()
+        self.assertEqual(session.sale_file_code, session.sale_file.code)
+        call_command('resolve_code_references', check=True, stdout=StringIO())
+
+
+class SearchVisibilityTest(TestCase):
+    def test_consultant_finds_own_buyer_below_invisible_matches(self):
+        consultant = models.CustomUserModel.objects.create_user(username='consultant', title='cp')
+        other = models.CustomUserModel.objects.create_user(username='other', title='cp')
+        fields = dict(room_min='1', room_max='2', document='Yes', parking='Yes', elevator='Yes', warehouse='Yes',
+                      phone_number='09120000000')
+        # Short documents rank above the consultant's long one: other consultants' rows and its own pending ones
+        hidden = [models.Buyer(name='ویلا', code=f'9{i:09d}', status='acc', created_by=other, **fields)
+                  for i in range(60)]
+        hidden += [models.Buyer(name='ویلا', code=f'8{i:09d}', status='pen', created_by=consultant, **fields)
+                   for i in range(30)]
+        own = models.Buyer(name='ویلا', code='7000000000', status='acc', created_by=consultant,
+                           description='خریدار ' + ' '.join(f'کلمه{i}' for i in range(30)), **fields)
+        models.Buyer.objects.bulk_create(hidden + [own])
+        search.rebuild_index()
+
+        results = search.search('ویلا', consultant, types=['by'], limit=10)
+        self.assertEqual([instance.code for _, _, instance in results], ['7000000000'])
+        self.assertEqual(len(search.search('ویلا', other, types=['by'], limit=100)), 60)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_small_database()
+
+    def test_restore_brings_back_row_links_and_dependents(self):
+        buyer = models.Buyer.objects.filter(sub_districts__isnull=False).first()
+        buyer.sub_districts.add(*models.SubDistrict.objects.all())
+        sub_district_ids = set(buyer.sub_districts.values_list('pk', flat=True))
+        agent = models.CustomUserModel.objects.filter(title='cp').first()
+        mark = models.Mark.objects.create(buyer=buyer, agent=agent, type='by', code=buyer.code)
+        report = models.Report.objects.create(agent=agent, date='1404/01/01')
+        item = models.ReportItem.objects.create(report=report, customer_code=buyer.code, type='ads')
+        self.assertEqual(item.buyer_id, buyer.pk)
+
+        self.assertEqual(utils.archive_rows(models.Buyer, [buyer.pk]), 1)
+        self.assertFalse(models.Buyer.objects.filter(pk=buyer.pk).exists())
+        self.assertFalse(models.Mark.objects.filter(pk=mark.pk).exists())
+        item.refresh_from_db()
+        self.assertIsNone(item.buyer_id)
+
+        # A newer buyer took the code while the row was archived
+        models.Buyer.objects.filter(pk=models.Buyer.objects.first().pk).update(code=buyer.code)
+        restored = utils.restore_archived(utils.archived_record(models.Buyer, buyer.pk))
+
+        self.assertEqual(restored.pk, buyer.pk)
+        self.assertEqual(restored.name, buyer.name)
+        self.assertNotEqual(restored.code, buyer.code)
+        self.assertEqual(models.Buyer.objects.filter(code=restored.code).count(), 1)
+        self.assertEqual(set(restored.sub_districts.values_list('pk', flat=True)), sub_district_ids)
+        self.assertTrue(models.Mark.objects.filter(pk=mark.pk, buyer=restored, agent=agent).exists())
+        item.refresh_from_db()
+        self.assertEqual(item.buyer_id, buyer.pk)
+        self.assertIsNone(utils.archived_record(models.Buyer, buyer.pk))
+
+
+class FieldTrackerTest(TestCase):
+    def test_insert_handlers_see_unset_values_without_queries(self):
+        seen = []
+
+        def receiver(sender, instance, created, **kwargs):
+            with CaptureQueriesContext(connection) as queries:
+                seen.append((created, instance.loaded_value('status'), instance.has_changed('status')))
+            seen.append(len(queries))
+
+        post_save.connect(receiver, sender=models.Person)
+        try:
+            person = models.Person.objects.create(name='الف', phone_number='09121112222', status='acc')
+            person.status = 'can'
+            person.save()
+        finally:
+            post_save.disconnect(receiver, sender=models.Person)
+        self.assertEqual(seen, [(True, None, True), 0, (False, 'acc', True), 0])
+
+
+class PhoneClusterTest(TestCase):
+    def cluster_ids(self, phone_number):
+        cluster = models.PhoneCluster.objects.filter(content_type=ContentType.objects.get_for_model(models.Person),
+                                                     phone_number=phone_number).first()
+        return cluster and cluster.object_ids
+
+    def test_members_follow_status_and_phone_changes(self):
+        first = models.Person.objects.create(name='الف', phone_number='۰۹۱۲۱۱۱۲۲۲۲', status='acc')
+        second = models.Person.objects.create(name='ب', phone_number='9121112222', status='pen')
+        third = models.Person.objects.create(name='پ', phone_number='09120000000', status='acc')
+        self.assertIsNone(self.cluster_ids('09121112222'))
+
+        # Gained by acceptance and by a phone change
+        second.status = 'acc'
+        second.save()
+        self.assertEqual(self.cluster_ids('09121112222'), [first.pk, second.pk])
+        third.phone_number = '09121112222'
+        third.save()
+        self.assertEqual(self.cluster_ids('09121112222'), [first.pk, second.pk, third.pk])
+
+        # Lost by cancellation and by a phone change; a single member is no cluster
+        second.status = 'can'
+        second.save()
+        self.assertEqual(self.cluster_ids('09121112222'), [first.pk, third.pk])
+        third.phone_number = '09129999999'
+        third.save()
+        self.assertIsNone(self.cluster_ids('09121112222'))
+        self.assertIsNone(self.cluster_ids('09129999999'))
+
+    def test_accepted_rows_created_with_a_used_number(self):
+        first = models.Person.objects.create(name='الف', phone_number='09121112222', status='acc')
+        with CaptureQueriesContext(connection) as queries:
+            second = models.Person.objects.create(name='ب', phone_number='۰۹۱۲۱۱۱۲۲۲۲', status='acc')
+        self.assertEqual(self.cluster_ids('09121112222'), [first.pk, second.pk])
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith('SELECT "dashboard_person"."status"')])
+        models.Person.objects.create(name='پ', phone_number='09121112222', status='pen')
+        self.assertEqual(self.cluster_ids('09121112222'), [first.pk, second.pk])
+
+
+class ToggleMarksTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_small_database()
+        cls.agent = models.CustomUserModel.objects.filter(title='bt').first()
+
+    def marks(self):
+        return set(models.Mark.objects.filter(agent=self.agent).values_list('type', 'sale_file_id', 'buyer_id'))
+
+    def test_flip_set_and_unknown_ids(self):
+        sale_file = models.SaleFile.objects.first()
+        buyer = models.Buyer.objects.first()
+        targets = [('sf', sale_file.pk), ('by', buyer.pk), ('by', 0)]
+
+        # Unknown ids are left out of the answer and never marked
+        self.assertEqual(utils.toggle_marks(self.agent, targets), {('sf', sale_file.pk): True, ('by', buyer.pk): True})
+        self.assertEqual(self.marks(), {('sf', sale_file.pk, None), ('by', None, buyer.pk)})
+        self.assertIn(buyer.pk, utils.get_marked_ids(self.agent)['by'])
+
+        # Flipping again unmarks
+        self.assertEqual(utils.toggle_marks(self.agent, targets[:1]), {('sf', sale_file.pk): False})
+        self.assertEqual(self.marks(), {('by', None, buyer.pk)})
+
+        # Setting a state twice changes nothing the second time
+        for _ in range(2):
+            self.assertEqual(utils.toggle_marks(self.agent, targets, state=True),
+                             {('sf', sale_file.pk): True, ('by', buyer.pk): True})
+            self.assertEqual(len(self.marks()), 2)
+        for _ in range(2):
+            self.assertEqual(utils.toggle_marks(self.agent, targets, state=False),
+                             {('sf', sale_file.pk): False, ('by', buyer.pk): False})
+            self.assertEqual(self.marks(), set())
+        self.assertEqual(utils.get_marked_ids(self.agent)['by'], set())
+        self.assertEqual(utils.toggle_marks(self.agent, [('by', 0)]), {})
+
+    def test_deletes_outside_toggle_marks_clear_the_cache(self):
+        buyers = list(models.Buyer.objects.all()[:2])
+        utils.toggle_marks(self.agent, [('by', buyer.pk) for buyer in buyers], state=True)
+        self.assertEqual(utils.get_marked_ids(self.agent)['by'], {buyer.pk for buyer in buyers})
+
+        # Removed with the marked buyer
+        buyers[0].delete()
+        self.assertEqual(utils.get_marked_ids(models.CustomUserModel.objects.get(pk=self.agent.pk))['by'],
+                         {buyers[1].pk})
+
+        # Removed by a queryset delete
+        models.Mark.objects.filter(agent=self.agent).delete()
+        self.assertEqual(utils.get_marked_ids(models.CustomUserModel.objects.get(pk=self.agent.pk))['by'], set())
+
+
+class BulkReviewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_small_database()
+        cls.boss = models.CustomUserModel.objects.get(title='bs')
+        cls.sale_files = list(models.SaleFile.objects.exclude(created_by=None)[:3])
+        cls.buyer = models.Buyer.objects.exclude(created_by=None).first()
+        models.SaleFile.objects.filter(pk__in=[sale_file.pk for sale_file in cls.sale_files]).update(
+            datetime_expired=None)
+        cls.tasks = [cls.open_task('sf', sale_file) for sale_file in cls.sale_files] + [cls.open_task('by', cls.buyer)]
+
+    @staticmethod
+    def open_task(task_type, target):
+        field, model, pending, _ = utils.BULK_REVIEW_TARGETS[task_type]
+        model.objects.filter(pk=target.pk).update(status=pending)
+        return models.TaskBoss.objects.create(type=task_type, **{field: target})
+
+    def announcement_count(self, model, ids):
+        return models.Announcement.objects.filter(content_type=ContentType.objects.get_for_model(model),
+                                                  object_id__in=ids).count()
+
+    def test_approve(self):
+        sale_file_ids = [sale_file.pk for sale_file in self.sale_files]
+        before = self.announcement_count(models.SaleFile, sale_file_ids)
+        buyer_before = self.announcement_count(models.Buyer, [self.buyer.pk])
+        closed = models.TaskBoss.objects.create(type='sf', new_sale_file=self.sale_files[0], condition='cl')
+        # Reviewed elsewhere in the meantime
+        models.SaleFile.objects.filter(pk=sale_file_ids[2]).update(status='acc')
+        task_ids = [task.pk for task in self.tasks] + [closed.pk, 0]
+
+        with CaptureQueriesContext(connection) as queries:
+            results = utils.bulk_review_tasks(task_ids, approve=True)
+
+        self.assertEqual([result['id'] for result in results], task_ids)
+        self.assertEqual([result['success'] for result in results], [True, True, False, True, False, False])
+        self.assertEqual(results[2]['message'], 'وضعیت این مورد قبلا تعیین شده است')
+        self.assertEqual(results[4]['message'], 'این وظیفه قبلا بسته شده است')
+        self.assertEqual(results[5], {'id': 0, 'code': None, 'success': False, 'message': 'وظیفه یافت نشد'})
+
+        # One status query per target model, whatever the number of tasks
+        status_reads = [query['sql'] for query in queries.captured_queries
+                        if query['sql'].startswith('SELECT "dashboard_salefile"."id", "dashboard_salefile"."status"')]
+        self.assertEqual(len(status_reads), 1)
+
+        approved = models.SaleFile.objects.filter(pk__in=sale_file_ids[:2])
+        self.assertEqual(set(approved.values_list('status', flat=True)), {'acc'})
+        for sale_file in approved:
+            self.assertAlmostEqual(sale_file.datetime_expired - timezone.now(),
+                                   timedelta(days=utils.FILE_EXPIRY_DAYS), delta=timedelta(minutes=1))
+        self.assertIsNone(models.SaleFile.objects.get(pk=sale_file_ids[2]).datetime_expired)
+        self.assertEqual(models.Buyer.objects.get(pk=self.buyer.pk).status, 'acc')
+        self.assertEqual(self.announcement_count(models.SaleFile, sale_file_ids), before + 2)
+        self.assertEqual(self.announcement_count(models.Buyer, [self.buyer.pk]), buyer_before + 1)
+        self.assertEqual(list(models.TaskBoss.objects.filter(pk__in=task_ids).order_by('pk')
+                              .values_list('condition', flat=True)), ['cl', 'cl', 'op', 'cl', 'cl'])
+
+        # Running it again reviews nothing
+        self.assertFalse(any(result['success'] for result in utils.bulk_review_tasks(task_ids, approve=True)))
+        self.assertEqual(self.announcement_count(models.SaleFile, sale_file_ids), before + 2)
+
+    def test_reject(self):
+        sale_file_ids = [sale_file.pk for sale_file in self.sale_files]
+        before = self.announcement_count(models.SaleFile, sale_file_ids)
+        results = utils.bulk_review_tasks([task.pk for task in self.tasks[:3]], approve=False)
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(set(models.SaleFile.objects.filter(pk__in=sale_file_ids).values_list('status', flat=True)),
+                         {'can'})
+        self.assertFalse(models.SaleFile.objects.filter(pk__in=sale_file_ids, datetime_expired__isnull=False).exists())
+        self.assertEqual(self.announcement_count(models.SaleFile, sale_file_ids), before)
+
+    def test_view(self):
+        url = reverse('boss_task_bulk_review')
+        agent = models.CustomUserModel.objects.filter(title='bt').first()
+        self.client.force_login(agent)
+        self.assertEqual(self.client.post(url, {'action': 'approve', 'task_ids': [self.tasks[0].pk]}).status_code, 403)
+
+        self.client.force_login(self.boss)
+        self.assertEqual(self.client.post(url, {'action': 'archive', 'task_ids': [self.tasks[0].pk]}).status_code, 400)
+        response = self.client.post(url, {'action': 'approve', 'task_ids': [self.tasks[0].pk, 0]},
+                                    headers={'x-requested-with': 'XMLHttpRequest'})
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual([result['success'] for result in data['results']], [True, False])
+        response = self.client.post(url, {'action': 'reject', 'task_ids': [self.tasks[1].pk]})
+        self.assertRedirects(response, reverse('boss_task_list'), fetch_redirect_response=False)
+        self.assertEqual(models.SaleFile.objects.get(pk=self.sale_files[1].pk).status, 'can')
 
-# Create your tests here.
+    def test_admin_actions(self):
+        admin = models.CustomUserModel.objects.create_superuser(username='review_admin', password='review_admin')
+        self.client.force_login(admin)
+        url = reverse('admin:dashboard_taskboss_changelist')
+        for action, task, status in (('approve_tasks', self.tasks[0], 'acc'), ('reject_tasks', self.tasks[1], 'can')):
+            response = self.client.post(url, {'action': action, '_selected_action': [task.pk]}, follow=True)
+            self.assertContains(response, '1 وظیفه از 1 وظیفه بررسی شد.')
+            task.refresh_from_db()
+            self.assertEqual(task.condition, 'cl')
+            self.assertEqual(task.new_sale_file.status, status)
@@ -15,6 +15,7 @@ urlpatterns = [
     path('calendar/previous-2/', views.calendar_previous_2_month_view, name='previous_2_month'),
     path('calendar/next/', views.calendar_next_month_view, name='next_month'),
     path('calendar/next-2/', views.calendar_next_2_month_view, name='next_2_month'),
+    path('calendar/<int:year>/<int:month>/', views.calendar_month_view, name='calendar_month'),
     # sale_file
     path('sale-files/', views.SaleFileListView.as_view(), name='sale_file_list'),
     re_path(r'sale-file/update/(?P<pk>[-\w]+)/(?P<unique_url_id>[-\w]+)/', views.SaleFileUpdateView.as_view(), name='sale_file_update'),
@@ -37,6 +38,7 @@ urlpatterns = [
     re_path(r'rent-file/create/', views.RentFileCreateView.as_view(), name='rent_file_create'),
     # locations
     path('locations/', views.LocationListView.as_view(), name='location_list'),
+    path('locations/choices/<str:level>/', views.location_choices, name='location_choices'),
     re_path(r'location/province/update/(?P<pk>[-\w]+)/', views.ProvinceUpdateView.as_view(), name='province_update'),
     re_path(r'location/city/update/(?P<pk>[-\w]+)/', views.CityUpdateView.as_view(), name='city_update'),
     re_path(r'location/sub_district/update/(?P<pk>[-\w]+)/', views.SubDistrictUpdateView.as_view(), name='sub_district_update'),
@@ -56,6 +58,8 @@ urlpatterns = [
     re_path(r'person/delete-request/(?P<pk>[-\w]+)/', views.PersonDeleteRequestView.as_view(), name='person_delete_request'),
     re_path(r'person/recover/(?P<pk>[-\w]+)/', views.PersonRecoverView.as_view(), name='person_recover'),
     re_path(r'person/create/', views.PersonCreateView.as_view(), name='person_create'),
+    path('phone-lookup/<str:object_type>/', views.phone_lookup, name='phone_lookup'),
+    path('persons/autocomplete/', views.person_autocomplete, name='person_autocomplete'),
     # buyers
     path('buyers/', views.BuyerListView.as_view(), name='buyer_list'),
     re_path(r'buyer/update/(?P<pk>[-\w]+)/(?P<code>[-\w]+)/', views.BuyerUpdateView.as_view(), name='buyer_update'),
@@ -80,16 +84,14 @@ urlpatterns = [
     path('quick-search/customer-buyers/', views.BuyerSearchView.as_view(), name='search_buyers'),
     path('quick-search/customer-renters/', views.RenterSearchView.as_view(), name='search_renters'),
     path('quick-search/code-finder/', views.CodeFinderView.as_view(), name='code_finder'),
+    path('quick-search/full-text/', views.FullTextSearchView.as_view(), name='full_text_search'),
     # marks (list)
     path('marks/sale-files', views.SaleFileMarksListView.as_view(), name='sale_file_marks'),
     path('marks/rent-files', views.RentFileMarksListView.as_view(), name='rent_file_marks'),
     path('marks/buyers', views.BuyerMarksListView.as_view(), name='buyer_marks'),
     path('marks/renters', views.RenterMarksListView.as_view(), name='renter_marks'),
     # marks (toggle)
-    path('toggle-mark/<str:object_type>/<int:object_id>/sale-file/', views.toggle_mark_sale_file, name='toggle_mark_sale_file'),
-    path('toggle-mark/<str:object_type>/<int:object_id>/rent-file/', views.toggle_mark_rent_file, name='toggle_mark_rent_file'),
-    path('marking-toggle/<str:object_type>/<int:object_id>/', views.toggle_mark_buyer, name='toggle_mark_buyer'),
-    path('toggling-mark/<str:object_type>/<int:object_id>/', views.toggle_mark_renter, name='toggle_mark_renter'),
+    path('marks/toggle/', views.toggle_marks, name='toggle_marks'),
     # marks (delete)
     path('marked-sale-file-delete/<int:pk>/', views.SaleFileMarkDeleteView.as_view(), name='sale_file_mark_delete'),
     path('marked-rent-file-delete/<int:pk>/', views.RentFileMarkDeleteView.as_view(), name='rent_file_mark_delete'),
@@ -120,6 +122,7 @@ urlpatterns = [
     # boss
     path('boss-tasks/', views.TaskBossListView.as_view(), name='boss_task_list'),
     path('tasks/boss/delete-requests/', views.delete_request_list_view, name='delete_request_list'),
+    path('tasks/boss/bulk-review/', views.boss_task_bulk_review, name='boss_task_bulk_review'),
     re_path(r'tasks/boss/approve/(?P<pk>[-\w]+)/(?P<code>[-\w]+)/', views.TaskBossApproveView.as_view(), name='boss_task_approve'),
     re_path(r'tasks/boss/delete/(?P<pk>[-\w]+)/(?P<code>[-\w]+)/', views.TaskBossDeleteView.as_view(), name='boss_task_delete'),
     # interactions
@@ -1,6 +1,22 @@
-from django.db.models import Count, Q, Prefetch
+import hashlib
+import time
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.paginator import Page, Paginator
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, Q, F, Value, CharField, Subquery, Prefetch, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
-from .models import Announcement, Interaction, InteractionItem, Buyer, Renter, SaleFile, RentFile
+from django.utils import timezone
+from django.utils.text import slugify
+from . import functions
+from .models import (Announcement, Interaction, InteractionItem, Buyer, Renter, SaleFile, RentFile, CustomUserModel,
+                     Report, TaskBoss, Person, Session, Reminder, Trade, Mark, ArchivedRecord, PhoneCluster)
+from .models import generate_unique_id, generate_unique_code, generate_unique_code_longer
 
 
 def get_unread_announcement_count(user):
@@ -336,28 +352,47 @@ def bulk_create_interaction(announcement, sender, receiver, selected_ids, messag
     return interaction
 
 
-def deactivate_old_announcements(days=30):
+def deactivate_announcements(queryset):
     """
-    Deactivate announcements older than specified days.
-    Run this as a periodic task (e.g., with Celery).
+    Deactivate announcements and drop the cached notification counts of everyone who could see them.
 
     Args:
-        days: Number of days after which to deactivate announcements
+        queryset: Announcement queryset
 
     Returns:
         int: Number of announcements deactivated
     """
-    from django.utils import timezone
-    from datetime import timedelta
+    ids = list(queryset.filter(is_active=True).values_list('pk', flat=True))
+    if not ids:
+        return 0
+    user_ids = set(Announcement.visible_to.through.objects.filter(announcement_id__in=ids)
+                   .values_list('customusermodel_id', flat=True))
+    count = Announcement.objects.filter(pk__in=ids).update(is_active=False)
+    cache.delete_many([f'notifications_{user_id}' for user_id in user_ids])
+    return count
 
-    cutoff_date = timezone.now() - timedelta(days=days)
 
-    count = Announcement.objects.filter(
-        is_active=True,
-        created_at__lt=cutoff_date
-    ).update(is_active=False)
+def deactivate_old_announcements(days=30, batch_size=1000):
+    """
+    Deactivate announcements older than specified days, batch by batch so each transaction stays small.
+    Run periodically through the sweep_expired command.
 
-    return count
+    Args:
+        days: Number of days after which to deactivate announcements
+        batch_size: Announcements per transaction
+
+    Returns:
+        int: Number of announcements deactivated
+    """
+    cutoff_date = timezone.now() - timezone.timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(Announcement.objects.filter(is_active=True, datetime_created__lt=cutoff_date)
+                   .order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            total += deactivate_announcements(Announcement.objects.filter(pk__in=ids))
 
 
 def get_agent_performance_stats(user, days=30):
@@ -586,3 +621,845 @@ def export_interaction_to_pdf(interaction):
     return buffer
 
 
+
+
+def filter_date_range(queryset, start_date=None, end_date=None, field='datetime_created'):
+    """
+    Restrict a queryset to the days between start_date and end_date (both inclusive).
+    The dates are converted to datetime bounds once, so the database can use the column index.
+
+    Args:
+        queryset: QuerySet to filter
+        start_date: Gregorian date or None (e.g. the cleaned value of a JalaliDateField)
+        end_date: Gregorian date or None
+        field: Name of the DateTimeField to filter on
+
+    Returns:
+        QuerySet: Filtered queryset
+    """
+    def bound(day, moment):
+        value = datetime.combine(day, moment)
+        return timezone.make_aware(value) if settings.USE_TZ else value
+
+    start, end = datetime.min.time(), datetime.max.time()
+    if start_date and end_date:
+        return queryset.filter(**{f'{field}__range': (bound(start_date, start), bound(end_date, end))})
+    if start_date:
+        return queryset.filter(**{f'{field}__gte': bound(start_date, start)})
+    if end_date:
+        return queryset.filter(**{f'{field}__lte': bound(end_date, end)})
+    return queryset
+
+
+# Past days are final, so their compliance data is cached; Report signals drop the keys if an old day is edited.
+COMPLIANCE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def compliance_cache_key(date):
+    return f'report_compliance_{date}'
+
+
+def heatmap_cache_key(year, month):
+    return f'report_heatmap_{year}_{month:02d}'
+
+
+def today_string():
+    today = functions.jalali_today()
+    return f'{today.year:04d}/{today.month:02d}/{today.day:02d}'
+
+
+def reporting_agents():
+    return CustomUserModel.objects.filter(is_active=True).exclude(title='bs')
+
+
+def agents_without_report(date):
+    """
+    Active agents who have no report on `date`, as one NOT EXISTS anti-join.
+
+    Args:
+        date: Jalali date string ('YYYY/MM/DD')
+
+    Returns:
+        QuerySet of CustomUserModel
+    """
+    return reporting_agents().exclude(Exists(Report.objects.filter(agent=OuterRef('pk'), date=date)))
+
+
+def report_compliance(date):
+    """
+    Compliance summary of one day: who has not reported and what share of agents did.
+    Summaries of past days are cached.
+
+    Args:
+        date: Jalali date string ('YYYY/MM/DD')
+
+    Returns:
+        dict: total_agents, missing_agents, missing_count, rate (percent)
+    """
+    is_past = date < today_string()
+    if is_past:
+        summary = cache.get(compliance_cache_key(date))
+        if summary is not None:
+            return summary
+
+    missing_agents = []
+    for agent in agents_without_report(date).only('id', 'username', 'name_family', 'title'):
+        display_name = agent.name_family if agent.name_family else agent.username
+        title_display = agent.get_title_display() if agent.title else 'نامشخص'
+        missing_agents.append({
+            'id': agent.id,
+            'display_name': display_name,
+            'title': title_display,
+            'full_info': f"{display_name} - {title_display}"
+        })
+    total_agents = reporting_agents().count()
+    summary = {
+        'total_agents': total_agents,
+        'missing_agents': missing_agents,
+        'missing_count': len(missing_agents),
+        'rate': round((total_agents - len(missing_agents)) * 100 / total_agents) if total_agents else 100,
+    }
+    if is_past:
+        cache.set(compliance_cache_key(date), summary, COMPLIANCE_CACHE_TIMEOUT)
+    return summary
+
+
+def compliance_heatmap(year, month):
+    """
+    Share of agents who reported on each day of a Jalali month, from one grouped query over the month.
+    Months that are over are cached.
+
+    Returns:
+        dict: year, month, month_name, total_agents and days (date, day, weekday, is_holiday, is_future,
+        reported, missing, rate, level 0-4)
+    """
+    first, last = functions.month_bounds(year, month)
+    today = today_string()
+    is_past = last < today
+    if is_past:
+        heatmap = cache.get(heatmap_cache_key(year, month))
+        if heatmap is not None:
+            return heatmap
+
+    reported_per_day = dict(
+        Report.objects.filter(date__range=(first, last), agent__is_active=True)
+        .exclude(agent__title='bs')
+        .values_list('date')
+        .annotate(agents=Count('agent', distinct=True))
+        .order_by()
+    )
+    total_agents = reporting_agents().count()
+    days = []
+    for day in functions.month_grid(year, month):
+        reported = reported_per_day.get(day.date, 0)
+        rate = round(reported * 100 / total_agents) if total_agents else 0
+        days.append({
+            'date': day.date,
+            'day': day.day,
+            'weekday': day.weekday,
+            'is_holiday': day.is_holiday,
+            'is_future': day.date > today,
+            'reported': reported,
+            'missing': max(total_agents - reported, 0),
+            'rate': rate,
+            'level': min(rate // 25, 4),
+        })
+    heatmap = {
+        'year': year,
+        'month': month,
+        'month_name': functions.month_name(month),
+        'total_agents': total_agents,
+        'days': days,
+    }
+    if is_past:
+        cache.set(heatmap_cache_key(year, month), heatmap, COMPLIANCE_CACHE_TIMEOUT)
+    return heatmap
+
+
+# Task types that can be reviewed in bulk: target field, model, pending status, announcement type
+BULK_REVIEW_TARGETS = {
+    'sf': ('new_sale_file', SaleFile, 'pen', 'sf'),
+    'rf': ('new_rent_file', RentFile, 'pen', 'rf'),
+    'by': ('new_buyer', Buyer, 'pen', 'by'),
+    'rt': ('new_renter', Renter, 'pen', 'rt'),
+    'ps': ('new_person', Person, 'pen', None),
+    'ss': ('new_session', Session, 'sub', None),
+}
+FILE_EXPIRY_DAYS = 60
+
+
+def bulk_review_tasks(task_ids, approve=True):
+    """
+    Approve or reject many open boss tasks in one transaction.
+    Statuses are loaded and written with one query per target model, and the announcements for
+    accepted files and customers are created together instead of through per-object save signals.
+
+    Args:
+        task_ids: TaskBoss ids
+        approve: True to accept the targets, False to cancel them
+
+    Returns:
+        list: one dict per task id with id, code, success and message
+    """
+    task_ids = [int(task_id) for task_id in task_ids]
+    results = {}
+    target_fields = [field for field, model, pending, announcement_type in BULK_REVIEW_TARGETS.values()]
+    new_status = 'acc' if approve else 'can'
+
+    with transaction.atomic():
+        tasks = (TaskBoss.objects.select_for_update().filter(pk__in=task_ids)
+                 .only('id', 'code', 'type', 'condition', *target_fields))
+        by_type = {}
+        for task in tasks:
+            if task.condition != 'op':
+                results[task.pk] = {'id': task.pk, 'code': task.code, 'success': False,
+                                    'message': 'این وظیفه قبلا بسته شده است'}
+            elif task.type not in BULK_REVIEW_TARGETS:
+                results[task.pk] = {'id': task.pk, 'code': task.code, 'success': False,
+                                    'message': 'این نوع وظیفه باید جداگانه بررسی شود'}
+            else:
+                by_type.setdefault(task.type, []).append(task)
+
+        closed_tasks = []
+        announcements = []
+        for task_type, type_tasks in by_type.items():
+            field, model, pending, announcement_type = BULK_REVIEW_TARGETS[task_type]
+            target_ids = [getattr(task, f'{field}_id') for task in type_tasks]
+            creator_field = 'agent_id' if model is Session else 'created_by_id'
+            current = {pk: (status, creator) for pk, status, creator in
+                       model.objects.filter(pk__in=target_ids).values_list('pk', 'status', creator_field)}
+
+            reviewed = []
+            for task in type_tasks:
+                target_id = getattr(task, f'{field}_id')
+                if target_id not in current:
+                    results[task.pk] = {'id': task.pk, 'code': task.code, 'success': False,
+                                        'message': 'مورد مرتبط با این وظیفه یافت نشد'}
+                elif current[target_id][0] != pending:
+                    results[task.pk] = {'id': task.pk, 'code': task.code, 'success': False,
+                                        'message': 'وضعیت این مورد قبلا تعیین شده است'}
+                else:
+                    reviewed.append(target_id)
+                    closed_tasks.append(task.pk)
+                    results[task.pk] = {'id': task.pk, 'code': task.code, 'success': True,
+                                        'message': 'تایید شد' if approve else 'رد شد'}
+            if not reviewed:
+                continue
+
+            changes = {'status': new_status}
+            if approve and model in (SaleFile, RentFile):
+                changes['datetime_expired'] = timezone.now() + timezone.timedelta(days=FILE_EXPIRY_DAYS)
+            model.objects.filter(pk__in=reviewed).update(**changes)
+            if approve and model in PHONE_MODELS:
+                refresh_phone_clusters(model, model.objects.filter(pk__in=reviewed)
+                                       .values_list('phone_normalized', flat=True))
+            if model is Person:
+                forget_person_choices()
+
+            if approve and announcement_type:
+                content_type = ContentType.objects.get_for_model(model)
+                announcements += [(content_type, target_id, current[target_id][1], announcement_type)
+                                  for target_id in reviewed if current[target_id][1]]
+
+        TaskBoss.objects.filter(pk__in=closed_tasks).update(condition='cl')
+        if announcements:
+            create_announcements_in_bulk(announcements)
+
+    missing = {'success': False, 'message': 'وظیفه یافت نشد'}
+    return [results.get(task_id, {'id': task_id, 'code': None, **missing}) for task_id in task_ids]
+
+
+def create_announcements_in_bulk(announcements):
+    """
+    Same fan-out as the post_save announcement signal (every active user except the creator),
+    for many objects at once.
+
+    Args:
+        announcements: list of (content_type, object_id, created_by_id, announcement_type)
+    """
+    agent_ids = set(CustomUserModel.objects.filter(is_active=True).values_list('id', flat=True))
+    announcements = [item for item in announcements if agent_ids - {item[2]}]
+    if not announcements:
+        return
+    created = Announcement.objects.bulk_create([
+        Announcement(content_type=content_type, object_id=object_id, created_by_id=created_by_id,
+                     announcement_type=announcement_type)
+        for content_type, object_id, created_by_id, announcement_type in announcements
+    ])
+    if any(announcement.pk is None for announcement in created):
+        # Backends without RETURNING (MySQL) leave pks unset; take the newest row of each object
+        lookup = Q()
+        for announcement in created:
+            lookup |= Q(content_type_id=announcement.content_type_id, object_id=announcement.object_id)
+        newest = {(content_type_id, object_id): pk for pk, content_type_id, object_id in
+                  Announcement.objects.filter(lookup).order_by('pk')
+                  .values_list('pk', 'content_type_id', 'object_id')}
+        for announcement in created:
+            announcement.pk = announcement.id = newest[(announcement.content_type_id, announcement.object_id)]
+
+    through = Announcement.visible_to.through
+    rows = [through(announcement_id=announcement.pk, customusermodel_id=agent_id)
+            for announcement in created for agent_id in agent_ids if agent_id != announcement.created_by_id]
+    through.objects.bulk_create(rows, batch_size=5000)
+    cache.delete_many([f'notifications_{agent_id}' for agent_id in agent_ids])
+
+
+# Cold rows (cancelled, expired, delete requested) that archive_cold_rows moves into ArchivedRecord
+ARCHIVE_MODELS = (SaleFile, RentFile, Buyer, Renter)
+ARCHIVE_DAYS = 90
+
+
+def archive_candidates(model, days=ARCHIVE_DAYS):
+    """
+    Rows of `model` that have been cold for at least `days` days.
+    Rows still used by a session (and so by its trades) or by an open boss task stay in the hot table.
+
+    Args:
+        model: One of ARCHIVE_MODELS
+        days: Minimum age in days
+
+    Returns:
+        QuerySet: Candidate rows, oldest first
+    """
+    cutoff = timezone.now() - timezone.timedelta(days=days)
+    cold = Q(status='can') | Q(delete_request='Yes')
+    if model in (SaleFile, RentFile):
+        cold |= Q(status='exp', datetime_expired__lt=cutoff)
+    task_relation = next(rel.name for rel in model._meta.related_objects if rel.related_model is TaskBoss)
+    newest = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (model.objects.filter(cold, datetime_created__lt=cutoff)
+            .exclude(sessions__isnull=False)
+            .exclude(**{f'{task_relation}__condition': 'op'})
+            # The newest row is never archived, so MySQL cannot hand its pk out again after a restart
+            .exclude(pk=newest)
+            .order_by('pk'))
+
+
+def _archive_reason(row):
+    if row.delete_request == 'Yes':
+        return 'del'
+    return 'exp' if row.status == 'exp' else 'can'
+
+
+def _archive_relations(model):
+    cascaded = [rel for rel in model._meta.related_objects
+                if not rel.many_to_many and rel.on_delete is models.CASCADE]
+    linked = [rel for rel in model._meta.related_objects
+              if not rel.many_to_many and rel.on_delete is models.SET_NULL]
+    return cascaded, linked
+
+
+def archive_rows(model, ids):
+    """
+    Move rows into ArchivedRecord in one transaction: the row and its cascaded dependents (marks, boss tasks)
+    are serialized, the foreign keys that point at it (reminders, report items) are recorded, its announcements
+    are deactivated and the row is deleted.
+
+    Args:
+        model: One of ARCHIVE_MODELS
+        ids: Primary keys to archive
+
+    Returns:
+        int: Number of rows archived
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    cascaded, linked = _archive_relations(model)
+    m2m_fields = [field.name for field in model._meta.many_to_many]
+    with transaction.atomic():
+        rows = list(model.objects.select_for_update().filter(pk__in=ids).prefetch_related(*m2m_fields))
+        if not rows:
+            return 0
+        ids = [row.pk for row in rows]
+
+        related = {pk: [] for pk in ids}
+        for rel in cascaded:
+            dependents = rel.related_model._base_manager.filter(**{f'{rel.field.name}__in': ids})
+            for item in serializers.serialize('python', dependents):
+                related[item['fields'][rel.field.name]].append(item)
+        links = {pk: {} for pk in ids}
+        for rel in linked:
+            key = f'{rel.related_model._meta.label_lower}.{rel.field.name}'
+            for pk, target_id in (rel.related_model._base_manager.filter(**{f'{rel.field.name}__in': ids})
+                                  .values_list('pk', rel.field.attname)):
+                links[target_id].setdefault(key, []).append(pk)
+
+        ArchivedRecord.objects.bulk_create([
+            ArchivedRecord(content_type=content_type, object_id=item['pk'], code=row.code,
+                           title=str(getattr(row, 'title', None) or getattr(row, 'name', ''))[:230],
+                           reason=_archive_reason(row), data=item['fields'], related=related[row.pk],
+                           links=links[row.pk])
+            for row, item in zip(rows, serializers.serialize('python', rows))
+        ])
+        deactivate_announcements(Announcement.objects.filter(content_type=content_type, object_id__in=ids))
+        model._base_manager.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archived_record(model, pk):
+    return ArchivedRecord.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id=pk).first()
+
+
+def build_archived_instance(record):
+    """
+    Unsaved instance of an archived row, e.g. to render a recover form before restoring it.
+    """
+    return next(serializers.deserialize('python', [record.serialized_row()], ignorenonexistent=True)).object
+
+
+def restore_archived(record):
+    """
+    Put an archived row back under its original pk, together with its marks and boss tasks,
+    and point the reminders and report items that referred to it back at it.
+    A code or url id taken by a newer row in the meantime is regenerated.
+
+    Args:
+        record: ArchivedRecord
+
+    Returns:
+        The restored model instance
+    """
+    model = apps.get_model('dashboard', record.model_name)
+    with transaction.atomic():
+        objects = list(serializers.deserialize('python', [record.serialized_row(), *record.related],
+                                               ignorenonexistent=True))
+        instance = objects[0].object
+        regenerate = {'code': generate_unique_code_longer if model in (Buyer, Renter) else generate_unique_code,
+                      'unique_url_id': generate_unique_id}
+        for field, generate in regenerate.items():
+            value = getattr(instance, field, None)
+            if value and model._base_manager.filter(**{field: value}).exists():
+                setattr(instance, field, generate())
+        if hasattr(instance, 'phone_normalized'):
+            # Rows archived before the column existed come back without it
+            instance.phone_normalized = functions.normalize_phone(instance.phone_number)
+        for item in objects:
+            item.save()
+        for key, pks in record.links.items():
+            label, field = key.rsplit('.', 1)
+            (apps.get_model(label)._base_manager.filter(pk__in=pks, **{f'{field}__isnull': True})
+             .update(**{field: record.object_id}))
+        record.delete()
+    return model.objects.get(pk=record.object_id)
+
+
+def search_archived(model, lookups, limit=50):
+    """
+    Archived rows of `model` matching the same field lookups a search view applies to the live table.
+
+    Args:
+        model: One of ARCHIVE_MODELS
+        lookups: dict such as {'area__gte': 80}
+        limit: Maximum number of records
+
+    Returns:
+        list: ArchivedRecord objects, newest archive first
+    """
+    return list(ArchivedRecord.objects.filter(content_type=ContentType.objects.get_for_model(model),
+                                              **{f'data__{key}': value for key, value in lookups.items()})
+                .defer('related', 'links')[:limit])
+
+
+# Delete requests reviewed by bosses: type, model, title field, url key field (None when the url only takes the pk)
+DELETE_REQUEST_SOURCES = (
+    ('sale_file', SaleFile, 'title', 'unique_url_id'),
+    ('rent_file', RentFile, 'title', 'unique_url_id'),
+    ('buyer', Buyer, 'name', 'code'),
+    ('renter', Renter, 'name', 'code'),
+    ('person', Person, 'name', None),
+)
+
+
+def delete_requests_page(page_number, per_page=12):
+    """
+    One page of pending delete requests of every type, newest first.
+    The five tables are combined with UNION ALL and sliced in the database; every row also carries the
+    total number of requests, so a page costs a single query.
+
+    Args:
+        page_number: Requested page (invalid values fall back to the first or last page)
+        per_page: Items per page
+
+    Returns:
+        Page: object_list holds dicts with type, pk, title, key and datetime_created
+    """
+    def pending(model):
+        return model.objects.filter(delete_request='Yes').order_by()
+
+    total = sum((Coalesce(Subquery(pending(model).values('delete_request').annotate(count=Count('pk'))
+                                   .values('count')), 0)
+                 for _, model, _, _ in DELETE_REQUEST_SOURCES), Value(0))
+    branches = [
+        pending(model).annotate(
+            item_type=Value(item_type, output_field=CharField()),
+            item_title=F(title_field),
+            item_key=F(key_field) if key_field else Value(None, output_field=CharField()),
+            total=total,
+        ).values_list('item_type', 'id', 'item_title', 'item_key', 'datetime_created', 'total')
+        for item_type, model, title_field, key_field in DELETE_REQUEST_SOURCES
+    ]
+    union = branches[0].union(*branches[1:], all=True).order_by('-datetime_created', 'item_type', '-id')
+
+    try:
+        number = max(int(page_number), 1)
+    except (TypeError, ValueError):
+        number = 1
+    rows = list(union[(number - 1) * per_page:number * per_page])
+    if rows:
+        count = rows[0][-1]
+    else:
+        # Past the last page (or nothing pending): count once and show the last page
+        count = union.count()
+        number = max((count + per_page - 1) // per_page, 1)
+        rows = list(union[(number - 1) * per_page:number * per_page]) if count else []
+    items = [{'type': item_type, 'pk': pk, 'title': title, 'key': key, 'datetime_created': created}
+             for item_type, pk, title, key, created, _ in rows]
+    return Page(items, number, Paginator(range(count), per_page))
+
+
+# Models whose phone numbers are checked for duplicates; a number is a duplicate when two or more
+# accepted rows of the same model share it
+PHONE_MODELS = (Person, Buyer, Renter)
+
+
+def phone_cluster_members(model):
+    return model.objects.filter(status='acc').exclude(delete_request='Yes')
+
+
+def refresh_phone_clusters(model, phone_numbers):
+    """
+    Recount the given normalized numbers of one model and create, update or drop their PhoneCluster rows.
+
+    Args:
+        model: Person, Buyer or Renter
+        phone_numbers: iterable of normalized phone numbers that may have gained or lost a member
+    """
+    phone_numbers = {phone for phone in phone_numbers if phone}
+    if not phone_numbers:
+        return
+    content_type = ContentType.objects.get_for_model(model)
+    members = {}
+    for phone, pk in (phone_cluster_members(model).filter(phone_normalized__in=phone_numbers)
+                      .order_by('pk').values_list('phone_normalized', 'pk')):
+        members.setdefault(phone, []).append(pk)
+    clusters = {phone: ids for phone, ids in members.items() if len(ids) > 1}
+
+    with transaction.atomic():
+        PhoneCluster.objects.filter(content_type=content_type, phone_number__in=phone_numbers - clusters.keys()).delete()
+        for phone, ids in clusters.items():
+            PhoneCluster.objects.update_or_create(content_type=content_type, phone_number=phone,
+                                                  defaults={'object_ids': ids, 'size': len(ids)})
+
+
+def rebuild_phone_clusters(model):
+    """
+    Rebuild every PhoneCluster row of a model from one grouped query.
+
+    Returns:
+        int: number of clusters
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    members = {}
+    for phone, pk in (phone_cluster_members(model).exclude(phone_normalized='')
+                      .order_by('pk').values_list('phone_normalized', 'pk')):
+        members.setdefault(phone, []).append(pk)
+    with transaction.atomic():
+        PhoneCluster.objects.filter(content_type=content_type).delete()
+        PhoneCluster.objects.bulk_create([
+            PhoneCluster(content_type=content_type, phone_number=phone, object_ids=ids, size=len(ids))
+            for phone, ids in members.items() if len(ids) > 1
+        ])
+    return sum(1 for ids in members.values() if len(ids) > 1)
+
+
+def duplicate_phone_numbers(model, phone_numbers=None):
+    """
+    Normalized numbers of `model` that belong to a cluster, for marking duplicates in lists.
+
+    Args:
+        model: Person, Buyer or Renter
+        phone_numbers: only check these numbers (e.g. the current page); None checks all
+
+    Returns:
+        set of normalized phone numbers
+    """
+    clusters = PhoneCluster.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    if phone_numbers is not None:
+        phone_numbers = {phone for phone in phone_numbers if phone}
+        if not phone_numbers:
+            return set()
+        clusters = clusters.filter(phone_number__in=phone_numbers)
+    return set(clusters.values_list('phone_number', flat=True))
+
+
+def find_phone_duplicates(model, phone_number, exclude_pk=None, limit=10):
+    """
+    Accepted rows of `model` that already have this number, whatever format it was typed in.
+    One query on the indexed phone_normalized column.
+
+    Args:
+        model: Person, Buyer or Renter
+        phone_number: number as typed
+        exclude_pk: leave this row out (the one being edited)
+        limit: maximum rows returned
+
+    Returns:
+        list of model instances with only the fields needed to show them
+    """
+    phone = functions.normalize_phone(phone_number)
+    if not phone:
+        return []
+    fields = ['pk', 'name', 'phone_number'] + (['code'] if model is not Person else [])
+    queryset = phone_cluster_members(model).filter(phone_normalized=phone).only(*fields).order_by('pk')
+    if exclude_pk:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return list(queryset[:limit])
+
+
+# Marked ids of an agent by mark type, with the context variable each list template expects
+MARK_MODELS = {'sf': SaleFile, 'rf': RentFile, 'by': Buyer, 'rt': Renter}
+MARK_FIELDS = {
+    'sf': ('sale_file_id', 'marked_sale_file_ids'),
+    'rf': ('rent_file_id', 'marked_rent_file_ids'),
+    'by': ('buyer_id', 'marked_buyer_ids'),
+    'rt': ('renter_id', 'marked_renter_ids'),
+}
+MARKS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_marked_ids(user):
+    """
+    Ids the user has marked, grouped by mark type.
+    Loaded with one query on a cache miss, then kept in the cache (Mark saves, deletes and
+    toggle_marks drop the key)
+    and on the user object for the rest of the request.
+
+    Returns:
+        dict: mark type -> frozenset of ids
+    """
+    if not user.is_authenticated:
+        return {mark_type: frozenset() for mark_type in MARK_FIELDS}
+    if hasattr(user, '_marked_ids'):
+        return user._marked_ids
+    key = Mark.cache_key(user.pk)
+    marked = cache.get(key)
+    if marked is None:
+        grouped = {mark_type: set() for mark_type in MARK_FIELDS}
+        fields = [field for field, context_name in MARK_FIELDS.values()]
+        for mark_type, *ids in Mark.objects.filter(agent=user).order_by().values_list('type', *fields):
+            object_id = dict(zip(MARK_FIELDS, ids)).get(mark_type)
+            if object_id is not None:
+                grouped[mark_type].add(object_id)
+        marked = {mark_type: frozenset(ids) for mark_type, ids in grouped.items()}
+        cache.set(key, marked, MARKS_CACHE_TIMEOUT)
+    user._marked_ids = marked
+    return marked
+
+
+def forget_marked_ids(user_id):
+    cache.delete(Mark.cache_key(user_id))
+
+
+def marks_context(user, *mark_types):
+    """
+    Template context with the marked id sets of the given types (all four when none are given).
+    """
+    marked = get_marked_ids(user)
+    return {MARK_FIELDS[mark_type][1]: marked[mark_type] for mark_type in mark_types or MARK_FIELDS}
+
+
+def is_marked(user, mark_type, object_id):
+    return object_id in get_marked_ids(user)[mark_type]
+
+
+def toggle_marks(user, targets, state=None):
+    """
+    Flip or set many of the user's marks in one transaction.
+    The unique (agent, target) constraints make repeated or concurrent requests harmless:
+    inserts skip existing rows and deletes of missing rows do nothing.
+
+    Args:
+        user: agent
+        targets: iterable of (mark type, object id)
+        state: None flips each mark, True marks all targets, False unmarks all targets
+
+    Returns:
+        dict: (mark type, object id) -> True when marked afterwards; ids that do not exist are left out
+    """
+    requested = {}
+    for mark_type, object_id in targets:
+        requested.setdefault(mark_type, set()).add(object_id)
+    found = {mark_type: set(MARK_MODELS[mark_type].objects.filter(pk__in=ids).values_list('pk', flat=True))
+             for mark_type, ids in requested.items()}
+    targets = {(mark_type, object_id) for mark_type, ids in found.items() for object_id in ids}
+    if not targets:
+        return {}
+
+    def lookup(items):
+        condition = Q()
+        for mark_type, object_id in items:
+            condition |= Q(**{MARK_FIELDS[mark_type][0]: object_id})
+        return Mark.objects.filter(condition, agent=user)
+
+    with transaction.atomic():
+        if state is None:
+            fields = [field for field, context_name in MARK_FIELDS.values()]
+            existing = set()
+            for mark_type, *ids in lookup(targets).select_for_update().order_by().values_list('type', *fields):
+                existing.add((mark_type, dict(zip(MARK_FIELDS, ids))[mark_type]))
+            to_delete, to_create = existing & targets, targets - existing
+        else:
+            to_delete, to_create = (set(), targets) if state else (targets, set())
+        if to_delete:
+            lookup(to_delete).delete()
+        if to_create:
+            slug = slugify(user.username)
+            Mark.objects.bulk_create([
+                Mark(agent=user, type=mark_type, slug=slug, code=generate_unique_code_longer(),
+                     **{MARK_FIELDS[mark_type][0]: object_id})
+                for mark_type, object_id in sorted(to_create)
+            ], ignore_conflicts=True)
+    forget_marked_ids(user.pk)
+    if hasattr(user, '_marked_ids'):
+        del user._marked_ids
+    return {target: target not in to_delete for target in targets}
+
+
+# Person autocomplete answers, keyed by a version that Person saves and deletes bump
+PERSON_CHOICES_VERSION_KEY = 'person_choices_version'
+PERSON_CHOICES_TIMEOUT = 60 * 10
+PERSON_CHOICES_LIMIT = 10
+RECENT_PERSONS_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def person_choices_version():
+    version = cache.get(PERSON_CHOICES_VERSION_KEY)
+    if version is None:
+        cache.add(PERSON_CHOICES_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(PERSON_CHOICES_VERSION_KEY)
+    return version
+
+
+def forget_person_choices():
+    transaction.on_commit(lambda: cache.set(PERSON_CHOICES_VERSION_KEY, time.time_ns(), None))
+
+
+def recent_persons_key(user_id):
+    return f'recent_persons_{user_id}'
+
+
+def recent_person_ids(user):
+    if not user.is_authenticated:
+        return []
+    return cache.get(recent_persons_key(user.pk), [])
+
+
+def remember_person(user, person):
+    """
+    Move the person to the front of the user's recent persons, which the autocomplete suggests
+    before anything is typed.
+    """
+    if person is None or not user.is_authenticated:
+        return
+    ids = [person.pk] + [pk for pk in recent_person_ids(user) if pk != person.pk]
+    cache.set(recent_persons_key(user.pk), ids[:PERSON_CHOICES_LIMIT], RECENT_PERSONS_TIMEOUT)
+
+
+def _person_results(queryset):
+    return [{'id': pk, 'name': name, 'phone': phone}
+            for pk, name, phone in queryset.values_list('pk', 'name', 'phone_normalized')]
+
+
+def person_choices_etag(query, user):
+    query = ' '.join(query.split())
+    recent = recent_person_ids(user) if not query else ''
+    return hashlib.md5(f'{person_choices_version()}:{query}:{recent}'.encode()).hexdigest()
+
+
+def person_choices(query, user, limit=PERSON_CHOICES_LIMIT):
+    """
+    Persons for the person autocomplete, using the (status, name) and phone_normalized indexes.
+
+    Args:
+        query: start of a name, or start of a phone number in any format normalize_phone accepts;
+               empty for the user's recent persons
+        user: requesting user
+        limit: maximum number of results
+
+    Returns:
+        list: dicts with id, name and phone; typed queries are cached until a person is saved or deleted
+    """
+    query = ' '.join(query.split())[:50]
+    if not query:
+        # Recent persons may still be pending, e.g. one the user registered just before creating a file for them
+        recent = recent_person_ids(user)[:limit]
+        if not recent:
+            return []
+        persons = Person.objects.filter(pk__in=recent).exclude(status='can').exclude(delete_request='Yes')
+        results = {result['id']: result for result in _person_results(persons)}
+        return [results[pk] for pk in recent if pk in results]
+
+    accepted = Person.objects.filter(status='acc').exclude(delete_request='Yes')
+
+    key = f'person_choices_{person_choices_version()}_{hashlib.md5(query.encode()).hexdigest()}'
+    results = cache.get(key)
+    if results is None:
+        phone = functions.normalize_phone_prefix(query)
+        if phone:
+            persons = accepted.filter(phone_normalized__startswith=phone).order_by('phone_normalized')
+        else:
+            persons = accepted.filter(name__istartswith=query).order_by('name')
+        results = _person_results(persons[:limit])
+        cache.set(key, results, PERSON_CHOICES_TIMEOUT)
+    return results
+
+
+# Rows that keep a code next to the foreign key it names (see CodeReferenceMixin)
+CODE_REFERENCE_MODELS = (Session, Reminder, Trade)
+
+
+def code_reference_gaps(model):
+    """
+    Rows with a code but no foreign key, a foreign key but no code, or a foreign key to a row with another code.
+    resolve_code_references() fills them; loaded with their foreign keys, a disagreeing code is rewritten
+    from the key.
+    """
+    gaps = Q()
+    for code_field, fk_name in model.code_references.items():
+        has_code = Q(**{f'{code_field}__isnull': False}) & ~Q(**{code_field: ''})
+        has_key = Q(**{f'{fk_name}__isnull': False})
+        gaps |= (has_code & ~has_key) | (has_key & ~has_code) | (has_key & ~Q(**{code_field: F(f'{fk_name}__code')}))
+    return model.objects.filter(gaps)
+
+
+def code_reference_mismatches(model):
+    """
+    Count, per reference, the rows whose code and foreign key disagree: a code without a foreign key,
+    or a foreign key to a row with another code (the CHECK constraints already rule out a key without a code).
+
+    Returns:
+        dict: foreign key name -> number of rows
+    """
+    mismatches = {}
+    for code_field, fk_name in model.code_references.items():
+        unresolved = Q(**{f'{code_field}__isnull': False}) & ~Q(**{code_field: ''}) & Q(**{f'{fk_name}__isnull': True})
+        different = Q(**{f'{fk_name}__isnull': False}) & ~Q(**{code_field: F(f'{fk_name}__code')})
+        mismatches[fk_name] = model.objects.filter(unresolved | different).count()
+    return mismatches
+
+
+def resolve_code_reference_batch(model, rows):
+    """
+    Fill the missing foreign keys and codes of a batch with one query per referenced model, and save them.
+
+    Returns:
+        int: number of rows updated
+    """
+    changed = model.resolve_code_references(rows)
+    if not changed:
+        return 0
+    if model is Session:
+        changed.add('sub_district')
+        for session in rows:
+            session.sub_district_id = session.file_sub_district_id()
+    model.objects.bulk_update(rows, sorted(changed), batch_size=len(rows))
+    return len(rows)
@@ -1,7 +1,6 @@
 import os
 import urllib.parse
 
-from operator import attrgetter
 from collections import defaultdict
 from django.http import JsonResponse, HttpResponse, Http404, FileResponse
 from django.urls import reverse, reverse_lazy
@@ -9,7 +8,7 @@ from django.shortcuts import get_object_or_404, render, redirect
 
 from django.views import View
 from django.views.generic import DetailView, CreateView, ListView, UpdateView, DeleteView, TemplateView
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import require_GET, require_POST, etag
 
 from django.db import transaction
 from django.db.models import Prefetch, Count, Q, F, PositiveBigIntegerField
@@ -27,8 +26,11 @@ from django.contrib import messages
 from jalali_date import datetime2jalali
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 
-from . import models, forms, functions
+from jalali import conversion
+
+from . import models, forms, functions, choices, locations, search, utils
 from .permissions import PermissionRequiredMixin, ReadOnlyPermissionMixin
 
 
@@ -44,11 +46,7 @@ class DashboardView(ReadOnlyPermissionMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.title == 'bs':
-            sub_districts = models.SubDistrict.objects.select_related(
-                'district',
-                'district__city',
-                'district__city__province'
-            ).prefetch_related(
+            sub_districts = models.SubDistrict.objects.prefetch_related(
                 Prefetch('agents',
                          queryset=models.CustomUserModel.objects.select_related('sub_district')),
                 Prefetch('agents__sale_files',
@@ -139,10 +137,7 @@ class AgentDetailView(DetailView):
 
     def get_queryset(self):
         return models.CustomUserModel.objects.select_related(
-            'sub_district',
-            'sub_district__district',
-            'sub_district__district__city',
-            'sub_district__district__city__province'
+            'sub_district'
         )
 
     def dispatch(self, request, *args, **kwargs):
@@ -190,36 +185,38 @@ class LocationListView(ReadOnlyPermissionMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        provinces = models.Province.objects.prefetch_related(
-            Prefetch(
-                'cities',
-                queryset=models.City.objects.prefetch_related(
-                    Prefetch(
-                        'districts',
-                        queryset=models.District.objects.prefetch_related(
-                            'sub_districts'
-                        ).select_related('city')
-                    )
-                ).select_related('province')
-            )
-        )
+        tree = locations.get_tree()
+        context['provinces'] = tree.provinces
+        context['cities'] = tree.cities
+        context['districts'] = tree.districts
+        context['sub_districts'] = tree.sub_districts
+        return context
 
-        cities = []
-        districts = []
-        sub_districts = []
-        for province in provinces:
-            for city in province.cities.all():
-                cities.append(city)
-                for district in city.districts.all():
-                    districts.append(district)
-                    sub_districts.extend(district.sub_districts.all())
-
-        context['provinces'] = provinces
-        context['cities'] = cities
-        context['districts'] = districts
-        context['sub_districts'] = sub_districts
 
-        return context
+def location_choices_etag(request, level):
+    return f'{locations.current_version()}-{level}-{request.GET.get("parent", "")}'
+
+
+@login_required
+@require_GET
+@etag(location_choices_etag)
+def location_choices(request, level):
+    """
+    Options of one location level for the cascading filter selects, read from the cached location tree.
+    Clients revalidate with If-None-Match and get a 304 until a location changes.
+    """
+    if level not in locations.LEVELS:
+        return JsonResponse({
+            'success': False,
+            'message': 'سطح نامعتبر است'
+        }, status=400)
+    model, parent_model = locations.LEVELS[level]
+    response = JsonResponse({
+        'success': True,
+        'results': [{'id': node.pk, 'name': node.name} for node in locations.choices(model, request.GET.get('parent'))],
+    })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 class ProvinceCreateView(PermissionRequiredMixin, CreateView):
@@ -474,6 +471,47 @@ class SubDistrictDeleteView(PermissionRequiredMixin, DeleteView):
         return self.render_to_response(self.get_context_data(form=form))
 
 
+# --------------------------------- Archive --------------------------------
+class ArchivedRecoverMixin:
+    """
+    Recover views also accept rows moved to the archive (utils.archive_rows): GET renders the form for the
+    archived data, POST restores the row before the form is applied.
+    """
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            record = utils.archived_record(self.model, self.kwargs.get(self.pk_url_kwarg))
+            if record is None:
+                raise
+            if self.request.method == 'POST':
+                return utils.restore_archived(record)
+            return utils.build_archived_instance(record)
+
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().post(request, *args, **kwargs)
+
+
+class ArchivedSearchMixin:
+    """
+    Lets bosses add archived rows to a search with ?archived=1; views put the lookups they apply to the live
+    table in self.archived_lookups.
+    """
+    archived_lookups = None
+
+    def include_archived(self):
+        return self.request.user.title == 'bs' and self.request.GET.get('archived') == '1'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['include_archived'] = self.include_archived()
+        context['archived_results'] = []
+        if context['include_archived'] and self.archived_lookups is not None:
+            context['archived_results'] = utils.search_archived(self.model, self.archived_lookups)
+        return context
+
+
 # --------------------------------- Sale Files --------------------------------
 class SaleFileListView(ReadOnlyPermissionMixin, ListView):
     model = models.SaleFile
@@ -504,6 +542,8 @@ class SaleFileListView(ReadOnlyPermissionMixin, ListView):
                     queryset_filtered = queryset_filtered.filter(elevator=form.cleaned_data['elevator'])
                 if form.cleaned_data['warehouse']:
                     queryset_filtered = queryset_filtered.filter(warehouse=form.cleaned_data['warehouse'])
+                queryset_filtered = utils.filter_date_range(queryset_filtered, form.cleaned_data['min_date'],
+                                                            form.cleaned_data['max_date'])
                 queryset_filtered = list(queryset_filtered)
 
                 if form.cleaned_data['has_images'] == 'has':
@@ -546,46 +586,6 @@ class SaleFileListView(ReadOnlyPermissionMixin, ListView):
                 if form.cleaned_data['max_level']:
                     queryset_filtered = [obj for obj in queryset_filtered if
                                          int(obj.level) <= int(form.cleaned_data['max_level'])]
-                if form.cleaned_data['min_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['min_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_min_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() >= gregorian_min_date]
-                    except (ValueError, IndexError):
-                        pass
-                if form.cleaned_data['max_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['max_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_max_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() <= gregorian_max_date]
-                    except (ValueError, IndexError):
-                        pass
 
                 return queryset_filtered
             return queryset_default
@@ -618,6 +618,8 @@ class SaleFileListView(ReadOnlyPermissionMixin, ListView):
                     queryset_filtered = queryset_filtered.filter(elevator=form.cleaned_data['elevator'])
                 if form.cleaned_data['warehouse']:
                     queryset_filtered = queryset_filtered.filter(warehouse=form.cleaned_data['warehouse'])
+                queryset_filtered = utils.filter_date_range(queryset_filtered, form.cleaned_data['min_date'],
+                                                            form.cleaned_data['max_date'])
                 queryset_filtered = list(queryset_filtered)
 
                 if form.cleaned_data['has_images'] == 'has':
@@ -657,46 +659,6 @@ class SaleFileListView(ReadOnlyPermissionMixin, ListView):
                 if form.cleaned_data['max_level']:
                     queryset_filtered = [obj for obj in queryset_filtered if
                                          int(obj.level) <= int(form.cleaned_data['max_level'])]
-                if form.cleaned_data['min_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['min_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_min_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() >= gregorian_min_date]
-                    except (ValueError, IndexError):
-                        pass
-                if form.cleaned_data['max_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['max_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_max_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() <= gregorian_max_date]
-                    except (ValueError, IndexError):
-                        pass
 
                 return queryset_filtered
             return queryset_default
@@ -707,25 +669,10 @@ class SaleFileListView(ReadOnlyPermissionMixin, ListView):
             form = forms.SaleFileAgentFilterForm(self.request.GET)
         else:
             form = forms.SaleFileFilterForm(self.request.GET)
-            if self.request.GET.get('province'):
-                form.fields['city'].queryset = models.City.objects.filter(province_id=self.request.GET.get('province'))
-            if self.request.GET.get('city'):
-                form.fields['district'].queryset = models.District.objects.filter(city_id=self.request.GET.get('city'))
-            if self.request.GET.get('district'):
-                form.fields['sub_district'].queryset = models.SubDistrict.objects.filter(
-                    district_id=self.request.GET.get('district'))
         context['filter_form'] = form
 
         # Marking
-        marked_sale_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_sale_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    sale_file__isnull=False
-                ).values_list('sale_file_id', flat=True)
-            )
-        context['marked_sale_file_ids'] = marked_sale_file_ids
+        context.update(utils.marks_context(self.request.user, 'sf'))
         return context
 
 
@@ -736,10 +683,7 @@ class SaleFileDetailView(ReadOnlyPermissionMixin, DetailView):
 
     def get_queryset(self):
         return models.SaleFile.objects.select_related(
-            'created_by', 'created_by__sub_district', 'created_by__sub_district__district',
-            'created_by__sub_district__district__city', 'created_by__sub_district__district__city__province',
-            'sub_district', 'sub_district__district', 'sub_district__district__city',
-            'sub_district__district__city__province', 'person'
+            'created_by', 'created_by__sub_district', 'sub_district', 'person'
         )
 
     def get_object(self, queryset=None):
@@ -789,13 +733,7 @@ class SaleFileDetailView(ReadOnlyPermissionMixin, DetailView):
         context['is_paginated'] = page_obj.has_other_pages()
 
         # Mark
-        is_marked = False
-        if self.request.user.is_authenticated:
-            is_marked = models.Mark.objects.filter(
-                agent=self.request.user,
-                sale_file=sale_file
-            ).exists()
-        context['is_marked'] = is_marked
+        context['is_marked'] = utils.is_marked(self.request.user, 'sf', sale_file.pk)
 
         # WA Link - Text
         context['whatsapp_share_url'] = self.get_whatsapp_share_url(sale_file)
@@ -926,7 +864,9 @@ class SaleFileCreateView(PermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.created_by = self.request.user
         messages.success(self.request, "فایل شما در سامانه ثبت شد (این فایل توسط مدیر بررسی خواهد شد).")
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        utils.remember_person(self.request.user, form.cleaned_data.get('person'))
+        return response
 
     def form_invalid(self, form):
         self.object = None
@@ -999,7 +939,7 @@ class SaleFileDeleteRequestView(PermissionRequiredMixin, UpdateView):
         return reverse_lazy('sale_file_list')
 
 
-class SaleFileRecoverView(PermissionRequiredMixin, UpdateView):
+class SaleFileRecoverView(ArchivedRecoverMixin, PermissionRequiredMixin, UpdateView):
     model = models.SaleFile
     form_class = forms.SaleFileRecoverForm
     template_name = 'dashboard/files/sale_file_recover.html'
@@ -1050,6 +990,8 @@ class RentFileListView(ReadOnlyPermissionMixin, ListView):
                 if form.cleaned_data['warehouse']:
                     queryset_filtered = queryset_filtered.filter(warehouse=form.cleaned_data['warehouse'])
 
+                queryset_filtered = utils.filter_date_range(queryset_filtered, form.cleaned_data['min_date'],
+                                                            form.cleaned_data['max_date'])
                 queryset_filtered = list(queryset_filtered)
 
                 if form.cleaned_data['has_images'] == 'has':
@@ -1098,46 +1040,6 @@ class RentFileListView(ReadOnlyPermissionMixin, ListView):
                 if form.cleaned_data['max_level']:
                     queryset_filtered = [obj for obj in queryset_filtered if
                                          int(obj.level) <= int(form.cleaned_data['max_level'])]
-                if form.cleaned_data['min_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['min_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_min_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() >= gregorian_min_date]
-                    except (ValueError, IndexError):
-                        pass
-                if form.cleaned_data['max_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['max_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_max_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() <= gregorian_max_date]
-                    except (ValueError, IndexError):
-                        pass
 
                 return queryset_filtered
             return queryset_default
@@ -1171,6 +1073,8 @@ class RentFileListView(ReadOnlyPermissionMixin, ListView):
                     queryset_filtered = queryset_filtered.filter(elevator=form.cleaned_data['elevator'])
                 if form.cleaned_data['warehouse']:
                     queryset_filtered = queryset_filtered.filter(warehouse=form.cleaned_data['warehouse'])
+                queryset_filtered = utils.filter_date_range(queryset_filtered, form.cleaned_data['min_date'],
+                                                            form.cleaned_data['max_date'])
                 queryset_filtered = list(queryset_filtered)
 
                 if form.cleaned_data['has_images'] == 'has':
@@ -1218,46 +1122,6 @@ class RentFileListView(ReadOnlyPermissionMixin, ListView):
                 if form.cleaned_data['max_level']:
                     queryset_filtered = [obj for obj in queryset_filtered if
                                          int(obj.level) <= int(form.cleaned_data['max_level'])]
-                if form.cleaned_data['min_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['min_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_min_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() >= gregorian_min_date]
-                    except (ValueError, IndexError):
-                        pass
-                if form.cleaned_data['max_date']:
-                    try:
-                        from datetime import datetime
-                        import jdatetime
-                        jalali_date_str = form.cleaned_data['max_date']
-                        if '/' in jalali_date_str:
-                            jalali_date_parts = jalali_date_str.split('/')
-                        else:
-                            jalali_date_parts = jalali_date_str.split('-')
-                        jalali_date = jdatetime.date(
-                            int(jalali_date_parts[0]),
-                            int(jalali_date_parts[1]),
-                            int(jalali_date_parts[2])
-                        )
-                        gregorian_max_date = jalali_date.togregorian()
-
-                        queryset_filtered = [obj for obj in queryset_filtered if
-                                             obj.datetime_created.date() <= gregorian_max_date]
-                    except (ValueError, IndexError):
-                        pass
 
                 return queryset_filtered
             return queryset_default
@@ -1268,25 +1132,10 @@ class RentFileListView(ReadOnlyPermissionMixin, ListView):
             form = forms.RentFileAgentFilterForm(self.request.GET)
         else:
             form = forms.RentFileFilterForm(self.request.GET)
-            if self.request.GET.get('province'):
-                form.fields['city'].queryset = models.City.objects.filter(province_id=self.request.GET.get('province'))
-            if self.request.GET.get('city'):
-                form.fields['district'].queryset = models.District.objects.filter(city_id=self.request.GET.get('city'))
-            if self.request.GET.get('district'):
-                form.fields['sub_district'].queryset = models.SubDistrict.objects.filter(
-                    district_id=self.request.GET.get('district'))
         context['filter_form'] = form
 
         # Marking
-        marked_rent_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_rent_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    rent_file__isnull=False
-                ).values_list('rent_file_id', flat=True)
-            )
-        context['marked_rent_file_ids'] = marked_rent_file_ids
+        context.update(utils.marks_context(self.request.user, 'rf'))
         return context
 
 
@@ -1297,10 +1146,7 @@ class RentFileDetailView(ReadOnlyPermissionMixin, DetailView):
 
     def get_queryset(self):
         return models.RentFile.objects.select_related(
-            'created_by', 'created_by__sub_district', 'created_by__sub_district__district',
-            'created_by__sub_district__district__city', 'created_by__sub_district__district__city__province',
-            'sub_district', 'sub_district__district', 'sub_district__district__city',
-            'sub_district__district__city__province', 'person'
+            'created_by', 'created_by__sub_district', 'sub_district', 'person'
         )
 
     def get_object(self, queryset=None):
@@ -1375,13 +1221,7 @@ class RentFileDetailView(ReadOnlyPermissionMixin, DetailView):
         context['is_paginated'] = page_obj.has_other_pages()
 
         # Mark
-        is_marked = False
-        if self.request.user.is_authenticated:
-            is_marked = models.Mark.objects.filter(
-                agent=self.request.user,
-                rent_file=rent_file
-            ).exists()
-        context['is_marked'] = is_marked
+        context['is_marked'] = utils.is_marked(self.request.user, 'rf', rent_file.pk)
 
         # WA Link - Text
         context['whatsapp_share_url'] = self.get_whatsapp_share_url(rent_file)
@@ -1514,7 +1354,9 @@ class RentFileCreateView(PermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.created_by = self.request.user
         messages.success(self.request, "فایل شما در سامانه ثبت شد (این فایل توسط مدیر بررسی خواهد شد).")
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        utils.remember_person(self.request.user, form.cleaned_data.get('person'))
+        return response
 
     def form_invalid(self, form):
         self.object = None
@@ -1587,7 +1429,7 @@ class RentFileDeleteRequestView(PermissionRequiredMixin, UpdateView):
         return reverse_lazy('rent_file_list')
 
 
-class RentFileRecoverView(PermissionRequiredMixin, UpdateView):
+class RentFileRecoverView(ArchivedRecoverMixin, PermissionRequiredMixin, UpdateView):
     model = models.RentFile
     form_class = forms.RentFileRecoverForm
     template_name = 'dashboard/files/rent_file_recover.html'
@@ -1621,14 +1463,8 @@ class PersonListView(ReadOnlyPermissionMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        duplicate_phone_numbers = (models.Person.objects
-                                   .filter(status='acc')
-                                   .exclude(delete_request='Yes')
-                                   .values('phone_number')
-                                   .annotate(count=Count('phone_number'))
-                                   .filter(count__gt=1)
-                                   .values_list('phone_number', flat=True))
-        context['duplicate_phone_numbers'] = list(duplicate_phone_numbers)
+        context['duplicate_phone_numbers'] = utils.duplicate_phone_numbers(
+            models.Person, [person.phone_normalized for person in context['object_list']])
         return context
 
 
@@ -1649,7 +1485,9 @@ class PersonCreateView(PermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.created_by = self.request.user
         messages.success(self.request, "فرد آگهی‌دهنده در سامانه ثبت شد (این اطلاعات توسط مدیر بررسی خواهد شد).")
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        utils.remember_person(self.request.user, self.object)
+        return response
 
     def form_invalid(self, form):
         self.object = None
@@ -1734,6 +1572,51 @@ class PersonRecoverView(PermissionRequiredMixin, UpdateView):
         return reverse_lazy('person_list')
 
 
+phone_lookup_models = {'ps': models.Person, 'by': models.Buyer, 'rt': models.Renter}
+
+
+@login_required
+@require_GET
+def phone_lookup(request, object_type):
+    """
+    Tell a create/update form whether the typed number already belongs to accepted rows of the same type.
+    """
+    model = phone_lookup_models.get(object_type)
+    if model is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'نوع نامعتبر است'
+        }, status=400)
+    exclude = request.GET.get('exclude', '')
+    matches = utils.find_phone_duplicates(model, request.GET.get('phone', ''),
+                                          exclude_pk=int(exclude) if exclude.isdigit() else None)
+    return JsonResponse({
+        'success': True,
+        'duplicate': bool(matches),
+        'matches': [{'id': match.pk, 'name': match.name, 'code': getattr(match, 'code', None)} for match in matches],
+    })
+
+
+def person_autocomplete_etag(request):
+    return utils.person_choices_etag(request.GET.get('q', ''), request.user)
+
+
+@login_required
+@require_GET
+@etag(person_autocomplete_etag)
+def person_autocomplete(request):
+    """
+    Accepted persons whose name or phone number starts with `q` (the user's recent persons when `q` is empty),
+    for the person selects of the file forms and filter forms.
+    """
+    response = JsonResponse({
+        'success': True,
+        'results': utils.person_choices(request.GET.get('q', ''), request.user),
+    })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 # --------------------------------- Buyers --------------------------------
 class BuyerListView(ReadOnlyPermissionMixin, ListView):
     model = models.Buyer
@@ -1839,32 +1722,12 @@ class BuyerListView(ReadOnlyPermissionMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        form = forms.BuyerFilterForm(self.request.GET)
-        if self.request.GET.get('province'):
-            form.fields['city'].queryset = models.City.objects.filter(province_id=self.request.GET.get('province'))
-        if self.request.GET.get('city'):
-            form.fields['district'].queryset = models.District.objects.filter(city_id=self.request.GET.get('city'))
-        duplicate_phone_numbers = (models.Buyer.objects
-                                   .filter(status='acc')
-                                   .exclude(delete_request='Yes')
-                                   .values('phone_number')
-                                   .annotate(count=Count('phone_number'))
-                                   .filter(count__gt=1)
-                                   .values_list('phone_number', flat=True))
-
-        context['filter_form'] = form
-        context['duplicate_phone_numbers'] = list(duplicate_phone_numbers)
+        context['filter_form'] = forms.BuyerFilterForm(self.request.GET)
+        context['duplicate_phone_numbers'] = utils.duplicate_phone_numbers(
+            models.Buyer, [buyer.phone_normalized for buyer in context['object_list']])
 
         # Marking
-        marked_buyer_ids = set()
-        if self.request.user.is_authenticated:
-            marked_buyer_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    buyer__isnull=False
-                ).values_list('buyer_id', flat=True)
-            )
-        context['marked_buyer_ids'] = marked_buyer_ids
+        context.update(utils.marks_context(self.request.user, 'by'))
         return context
 
 
@@ -1875,12 +1738,9 @@ class BuyerDetailView(ReadOnlyPermissionMixin, DetailView):
 
     def get_queryset(self):
         return models.Buyer.objects.select_related(
-            'created_by', 'created_by__sub_district', 'created_by__sub_district__district',
-            'created_by__sub_district__district__city', 'created_by__sub_district__district__city__province',
-            'province', 'city', 'district'
+            'created_by', 'created_by__sub_district', 'province', 'city', 'district'
         ).prefetch_related(
-            'sub_districts', 'sub_districts__district', 'sub_districts__district__city',
-            'sub_districts__district__city__province'
+            'sub_districts'
         )
 
     def get_object(self, queryset=None):
@@ -1907,27 +1767,15 @@ class BuyerDetailView(ReadOnlyPermissionMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        duplicate_phone_numbers = models.Buyer.objects.filter(
-            status='acc'
-        ).exclude(
-            delete_request='Yes'
-        ).values('phone_number').annotate(
-            count=Count('phone_number')
-        ).filter(
-            count__gt=1
-        ).values_list('phone_number', flat=True)
-        context['duplicate_phone_numbers'] = list(duplicate_phone_numbers)
-
         buyer = self.get_object()
+        context['duplicate_phone_numbers'] = utils.duplicate_phone_numbers(models.Buyer, [buyer.phone_normalized])
         price_min = 0.9 * buyer.budget_announced
         price_max = 1.1 * buyer.budget_announced
         area_min = 0.8 * buyer.area_min
         area_max = 1.2 * buyer.area_max
 
         suggested_files_queryset = models.SaleFile.objects.select_related(
-            'created_by', 'sub_district', 'sub_district__district',
-            'sub_district__district__city', 'sub_district__district__city__province',
-            'person'
+            'created_by', 'sub_district', 'person'
         ).filter(
             status='acc',
             price_announced__gt=price_min,
@@ -1949,13 +1797,7 @@ class BuyerDetailView(ReadOnlyPermissionMixin, DetailView):
         context['is_paginated'] = page_obj.has_other_pages()
 
         # Mark
-        is_marked = False
-        if self.request.user.is_authenticated:
-            is_marked = models.Mark.objects.filter(
-                agent=self.request.user,
-                buyer=buyer
-            ).exists()
-        context['is_marked'] = is_marked
+        context['is_marked'] = utils.is_marked(self.request.user, 'by', buyer.pk)
         return context
 
 
@@ -2042,7 +1884,7 @@ class BuyerDeleteRequestView(PermissionRequiredMixin, UpdateView):
         return reverse_lazy('buyer_list')
 
 
-class BuyerRecoverView(PermissionRequiredMixin, UpdateView):
+class BuyerRecoverView(ArchivedRecoverMixin, PermissionRequiredMixin, UpdateView):
     model = models.Buyer
     form_class = forms.BuyerRecoverForm
     template_name = 'dashboard/people/buyer_recover.html'
@@ -2183,32 +2025,12 @@ class RenterListView(ReadOnlyPermissionMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        form = forms.RenterFilterForm(self.request.GET)
-        if self.request.GET.get('province'):
-            form.fields['city'].queryset = models.City.objects.filter(province_id=self.request.GET.get('province'))
-        if self.request.GET.get('city'):
-            form.fields['district'].queryset = models.District.objects.filter(city_id=self.request.GET.get('city'))
-        duplicate_phone_numbers = (models.Renter.objects
-                                   .filter(status='acc')
-                                   .exclude(delete_request='Yes')
-                                   .values('phone_number')
-                                   .annotate(count=Count('phone_number'))
-                                   .filter(count__gt=1)
-                                   .values_list('phone_number', flat=True))
-
-        context['filter_form'] = form
-        context['duplicate_phone_numbers'] = list(duplicate_phone_numbers)
+        context['filter_form'] = forms.RenterFilterForm(self.request.GET)
+        context['duplicate_phone_numbers'] = utils.duplicate_phone_numbers(
+            models.Renter, [renter.phone_normalized for renter in context['object_list']])
 
         # Marking
-        marked_renter_ids = set()
-        if self.request.user.is_authenticated:
-            marked_renter_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    renter__isnull=False
-                ).values_list('renter_id', flat=True)
-            )
-        context['marked_renter_ids'] = marked_renter_ids
+        context.update(utils.marks_context(self.request.user, 'rt'))
         return context
 
 
@@ -2219,12 +2041,9 @@ class RenterDetailView(ReadOnlyPermissionMixin, DetailView):
 
     def get_queryset(self):
         return models.Renter.objects.select_related(
-            'created_by', 'created_by__sub_district', 'created_by__sub_district__district',
-            'created_by__sub_district__district__city', 'created_by__sub_district__district__city__province',
-            'province', 'city', 'district'
+            'created_by', 'created_by__sub_district', 'province', 'city', 'district'
         ).prefetch_related(
-            'sub_districts', 'sub_districts__district', 'sub_districts__district__city',
-            'sub_districts__district__city__province'
+            'sub_districts'
         )
 
     def get_object(self, queryset=None):
@@ -2251,18 +2070,8 @@ class RenterDetailView(ReadOnlyPermissionMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        duplicate_phone_numbers = models.Renter.objects.filter(
-            status='acc'
-        ).exclude(
-            delete_request='Yes'
-        ).values('phone_number').annotate(
-            count=Count('phone_number')
-        ).filter(
-            count__gt=1
-        ).values_list('phone_number', flat=True)
-        context['duplicate_phone_numbers'] = list(duplicate_phone_numbers)
-
         renter = self.get_object()
+        context['duplicate_phone_numbers'] = utils.duplicate_phone_numbers(models.Renter, [renter.phone_normalized])
         deposit_min = 0.8 * renter.deposit_announced
         deposit_max = 1.2 * renter.deposit_announced
         rent_min = 0.8 * renter.rent_announced
@@ -2273,17 +2082,13 @@ class RenterDetailView(ReadOnlyPermissionMixin, DetailView):
         renter_total_max = 1.2 * (renter.deposit_announced + 100 * (renter.rent_announced / 3))
 
         base_queryset = models.RentFile.objects.select_related(
-            'created_by', 'sub_district', 'sub_district__district',
-            'sub_district__district__city', 'sub_district__district__city__province',
-            'person'
+            'created_by', 'sub_district', 'person'
         ).annotate(
             deposit_total_calc=Cast(F('deposit_announced') + (100 * F('rent_announced') / 3),
                                     PositiveBigIntegerField()))
 
         non_convertable_suggested_files_queryset = models.RentFile.objects.select_related(
-            'created_by', 'sub_district', 'sub_district__district',
-            'sub_district__district__city', 'sub_district__district__city__province',
-            'person'
+            'created_by', 'sub_district', 'person'
         ).filter(
             status='acc',
             convertable='isnt',
@@ -2318,13 +2123,7 @@ class RenterDetailView(ReadOnlyPermissionMixin, DetailView):
         context['is_paginated'] = page_obj.has_other_pages()
 
         # Mark
-        is_marked = False
-        if self.request.user.is_authenticated:
-            is_marked = models.Mark.objects.filter(
-                agent=self.request.user,
-                renter=renter
-            ).exists()
-        context['is_marked'] = is_marked
+        context['is_marked'] = utils.is_marked(self.request.user, 'rt', renter.pk)
         return context
 
 
@@ -2411,7 +2210,7 @@ class RenterDeleteRequestView(PermissionRequiredMixin, UpdateView):
         return reverse_lazy('renter_list')
 
 
-class RenterRecoverView(PermissionRequiredMixin, UpdateView):
+class RenterRecoverView(ArchivedRecoverMixin, PermissionRequiredMixin, UpdateView):
     model = models.Renter
     form_class = forms.RenterRecoverForm
     template_name = 'dashboard/people/renter_recover.html'
@@ -2431,7 +2230,7 @@ class RenterRecoverView(PermissionRequiredMixin, UpdateView):
 
 
 # --------------------------------- Search ---------------------------------
-class SaleFileSearchView(ReadOnlyPermissionMixin, ListView):
+class SaleFileSearchView(ArchivedSearchMixin, ReadOnlyPermissionMixin, ListView):
     model = models.SaleFile
     template_name = 'dashboard/search/sale_file_search.html'
     context_object_name = 'sale_files'
@@ -2452,14 +2251,12 @@ class SaleFileSearchView(ReadOnlyPermissionMixin, ListView):
                 queryset = models.SaleFile.objects.select_related('province', 'city', 'district', 'sub_district',
                                                                   'person', 'created_by').all().exclude(
                     delete_request='Yes')
-                if min_price is not None:
-                    queryset = queryset.filter(price_announced__gte=min_price)
-                if max_price is not None:
-                    queryset = queryset.filter(price_announced__lte=max_price)
-                if min_area is not None:
-                    queryset = queryset.filter(area__gte=min_area)
-                if max_area is not None:
-                    queryset = queryset.filter(area__lte=max_area)
+                lookups = {lookup: value for lookup, value in (
+                    ('price_announced__gte', min_price), ('price_announced__lte', max_price),
+                    ('area__gte', min_area), ('area__lte', max_area),
+                ) if value is not None}
+                queryset = queryset.filter(**lookups)
+                self.archived_lookups = lookups
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -2467,19 +2264,11 @@ class SaleFileSearchView(ReadOnlyPermissionMixin, ListView):
         context['form'] = forms.SaleFileFilterForm(self.request.GET or None)
 
         # Marking
-        marked_sale_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_sale_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    sale_file__isnull=False
-                ).values_list('sale_file_id', flat=True)
-            )
-        context['marked_sale_file_ids'] = marked_sale_file_ids
+        context.update(utils.marks_context(self.request.user, 'sf'))
         return context
 
 
-class RentFileSearchView(ReadOnlyPermissionMixin, ListView):
+class RentFileSearchView(ArchivedSearchMixin, ReadOnlyPermissionMixin, ListView):
     model = models.RentFile
     template_name = 'dashboard/search/rent_file_search.html'
     context_object_name = 'rent_files'
@@ -2502,18 +2291,13 @@ class RentFileSearchView(ReadOnlyPermissionMixin, ListView):
                 queryset = models.RentFile.objects.select_related('province', 'city', 'district', 'sub_district',
                                                                   'person', 'created_by').all().exclude(
                     delete_request='Yes')
-                if min_deposit is not None:
-                    queryset = queryset.filter(deposit_announced__gte=min_deposit)
-                if max_deposit is not None:
-                    queryset = queryset.filter(deposit_announced__lte=max_deposit)
-                if min_rent is not None:
-                    queryset = queryset.filter(rent_announced__gte=min_rent)
-                if max_rent is not None:
-                    queryset = queryset.filter(rent_announced__lte=max_rent)
-                if min_area is not None:
-                    queryset = queryset.filter(area__gte=min_area)
-                if max_area is not None:
-                    queryset = queryset.filter(area__lte=max_area)
+                lookups = {lookup: value for lookup, value in (
+                    ('deposit_announced__gte', min_deposit), ('deposit_announced__lte', max_deposit),
+                    ('rent_announced__gte', min_rent), ('rent_announced__lte', max_rent),
+                    ('area__gte', min_area), ('area__lte', max_area),
+                ) if value is not None}
+                queryset = queryset.filter(**lookups)
+                self.archived_lookups = lookups
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -2521,19 +2305,11 @@ class RentFileSearchView(ReadOnlyPermissionMixin, ListView):
         context['form'] = forms.RentFileFilterForm(self.request.GET or None)
 
         # Marking
-        marked_rent_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_rent_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    rent_file__isnull=False
-                ).values_list('rent_file_id', flat=True)
-            )
-        context['marked_rent_file_ids'] = marked_rent_file_ids
+        context.update(utils.marks_context(self.request.user, 'rf'))
         return context
 
 
-class BuyerSearchView(ReadOnlyPermissionMixin, ListView):
+class BuyerSearchView(ArchivedSearchMixin, ReadOnlyPermissionMixin, ListView):
     model = models.Buyer
     template_name = 'dashboard/search/buyer_search.html'
     context_object_name = 'buyers'
@@ -2558,14 +2334,12 @@ class BuyerSearchView(ReadOnlyPermissionMixin, ListView):
                 else:
                     queryset = (models.Buyer.objects.select_related('province', 'city', 'district', 'created_by')
                                 .prefetch_related('sub_districts').filter(created_by=user).all().exclude(delete_request='Yes'))
-                if min_budget is not None:
-                    queryset = queryset.filter(budget_announced__gte=min_budget)
-                if max_budget is not None:
-                    queryset = queryset.filter(budget_announced__lte=max_budget)
-                if min_area is not None:
-                    queryset = queryset.filter(area__gte=min_area)
-                if max_area is not None:
-                    queryset = queryset.filter(area__lte=max_area)
+                lookups = {lookup: value for lookup, value in (
+                    ('budget_announced__gte', min_budget), ('budget_announced__lte', max_budget),
+                    ('area__gte', min_area), ('area__lte', max_area),
+                ) if value is not None}
+                queryset = queryset.filter(**lookups)
+                self.archived_lookups = lookups
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -2573,19 +2347,11 @@ class BuyerSearchView(ReadOnlyPermissionMixin, ListView):
         context['form'] = forms.BuyerFilterForm(self.request.GET or None)
 
         # Marking
-        marked_buyer_ids = set()
-        if self.request.user.is_authenticated:
-            marked_buyer_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    buyer__isnull=False
-                ).values_list('buyer_id', flat=True)
-            )
-        context['marked_buyer_ids'] = marked_buyer_ids
+        context.update(utils.marks_context(self.request.user, 'by'))
         return context
 
 
-class RenterSearchView(ReadOnlyPermissionMixin, ListView):
+class RenterSearchView(ArchivedSearchMixin, ReadOnlyPermissionMixin, ListView):
     model = models.Renter
     template_name = 'dashboard/search/renter_search.html'
     context_object_name = 'renters'
@@ -2613,18 +2379,13 @@ class RenterSearchView(ReadOnlyPermissionMixin, ListView):
                     queryset = (models.Renter.objects.select_related('province', 'city', 'district', 'created_by')
                                 .prefetch_related('sub_districts').filter(created_by=user).all().exclude(
                         delete_request='Yes'))
-                if min_deposit is not None:
-                    queryset = queryset.filter(deposit_announced__gte=min_deposit)
-                if max_deposit is not None:
-                    queryset = queryset.filter(deposit_announced__lte=max_deposit)
-                if min_rent is not None:
-                    queryset = queryset.filter(rent_announced__gte=min_rent)
-                if max_rent is not None:
-                    queryset = queryset.filter(rent_announced__lte=max_rent)
-                if min_area is not None:
-                    queryset = queryset.filter(area__gte=min_area)
-                if max_area is not None:
-                    queryset = queryset.filter(area__lte=max_area)
+                lookups = {lookup: value for lookup, value in (
+                    ('deposit_announced__gte', min_deposit), ('deposit_announced__lte', max_deposit),
+                    ('rent_announced__gte', min_rent), ('rent_announced__lte', max_rent),
+                    ('area__gte', min_area), ('area__lte', max_area),
+                ) if value is not None}
+                queryset = queryset.filter(**lookups)
+                self.archived_lookups = lookups
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -2632,15 +2393,7 @@ class RenterSearchView(ReadOnlyPermissionMixin, ListView):
         context['form'] = forms.RenterFilterForm(self.request.GET or None)
 
         # Marking
-        marked_renter_ids = set()
-        if self.request.user.is_authenticated:
-            marked_renter_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    renter__isnull=False
-                ).values_list('renter_id', flat=True)
-            )
-        context['marked_renter_ids'] = marked_renter_ids
+        context.update(utils.marks_context(self.request.user, 'rt'))
         return context
 
 
@@ -2730,49 +2483,31 @@ class CodeFinderView(ReadOnlyPermissionMixin, ListView):
             context['result_type'] = type_mapping.get(search_type, 'unknown')
 
         # Marking
-        marked_sale_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_sale_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    sale_file__isnull=False
-                ).values_list('sale_file_id', flat=True)
-            )
-        context['marked_sale_file_ids'] = marked_sale_file_ids
-
-        marked_rent_file_ids = set()
-        if self.request.user.is_authenticated:
-            marked_rent_file_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    rent_file__isnull=False
-                ).values_list('rent_file_id', flat=True)
-            )
-        context['marked_rent_file_ids'] = marked_rent_file_ids
-
-        marked_buyer_ids = set()
-        if self.request.user.is_authenticated:
-            marked_buyer_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    buyer__isnull=False
-                ).values_list('buyer_id', flat=True)
-            )
-        context['marked_buyer_ids'] = marked_buyer_ids
-
-        marked_renter_ids = set()
-        if self.request.user.is_authenticated:
-            marked_renter_ids = set(
-                models.Mark.objects.filter(
-                    agent=self.request.user,
-                    renter__isnull=False
-                ).values_list('renter_id', flat=True)
-            )
-        context['marked_renter_ids'] = marked_renter_ids
+        context.update(utils.marks_context(self.request.user))
 
         return context
 
 
+class FullTextSearchView(ReadOnlyPermissionMixin, TemplateView):
+    template_name = 'dashboard/search/full_text_search.html'
+    permission_model = 'SaleFile'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = forms.FullTextSearchForm(self.request.GET or None)
+        results = []
+        if form.is_bound and form.is_valid():
+            types = [form.cleaned_data['type']] if form.cleaned_data['type'] else None
+            labels = dict(choices.full_text_types)
+            results = [{'score': score, 'type': item_type, 'label': labels[item_type], 'object': instance}
+                       for score, item_type, instance in search.search(form.cleaned_data['q'], self.request.user,
+                                                                       types=types, limit=50)]
+        context['form'] = form
+        context['results'] = results
+        context['search_performed'] = form.is_bound
+        return context
+
+
 # --------------------------------- Marks ---------------------------------
 class SaleFileMarksListView(ReadOnlyPermissionMixin, ListView):
     model = models.Mark
@@ -2942,202 +2677,47 @@ class RenterMarkDeleteView(LoginRequiredMixin, DeleteView):
 
 @login_required
 @require_POST
-def toggle_mark_sale_file(request, object_type, object_id):
-    if object_type != 'sale_file':
-        return JsonResponse({
-            'success': False,
-            'message': 'نوع نامعتبر است'
-        })
-
-    try:
-        sale_file = get_object_or_404(models.SaleFile, id=object_id)
-
-        existing_mark = models.Mark.objects.filter(
-            agent=request.user,
-            sale_file=sale_file
-        ).first()
-
-        if existing_mark:
-            existing_mark.delete()
-            return JsonResponse({
-                'success': True,
-                'action': 'deleted',
-                'message': 'نشان حذف شد',
-                'is_marked': False
-            })
-        else:
-            mark = models.Mark.objects.create(
-                agent=request.user,
-                sale_file=sale_file
-            )
-            return JsonResponse({
-                'success': True,
-                'action': 'created',
-                'message': 'نشان ایجاد شد',
-                'is_marked': True,
-                'mark_id': mark.id
-            })
-
-    except models.SaleFile.DoesNotExist:
-        return JsonResponse({
-            'success': False,
-            'message': 'فایل فروش یافت نشد'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'message': 'خطا در پردازش درخواست'
-        })
-
-
-@login_required
-@require_POST
-def toggle_mark_rent_file(request, object_type, object_id):
-    if object_type != 'rent_file':
-        return JsonResponse({
-            'success': False,
-            'message': 'نوع نامعتبر است'
-        })
-
-    try:
-        rent_file = get_object_or_404(models.RentFile, id=object_id)
-
-        existing_mark = models.Mark.objects.filter(
-            agent=request.user,
-            rent_file=rent_file
-        ).first()
-
-        if existing_mark:
-            existing_mark.delete()
-            return JsonResponse({
-                'success': True,
-                'action': 'deleted',
-                'message': 'نشان حذف شد',
-                'is_marked': False
-            })
-        else:
-            mark = models.Mark.objects.create(
-                agent=request.user,
-                rent_file=rent_file
-            )
-            return JsonResponse({
-                'success': True,
-                'action': 'created',
-                'message': 'نشان ایجاد شد',
-                'is_marked': True,
-                'mark_id': mark.id
-            })
-
-    except models.RentFile.DoesNotExist:
-        return JsonResponse({
-            'success': False,
-            'message': 'فایل اجاره یافت نشد'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'message': 'خطا در پردازش درخواست'
-        })
-
-
-@login_required
-@require_POST
-def toggle_mark_buyer(request, object_type, object_id):
-    if object_type != 'buyer':
-        return JsonResponse({
-            'success': False,
-            'message': 'نوع نامعتبر است'
-        })
-
-    try:
-        buyer = get_object_or_404(models.Buyer, id=object_id)
-
-        existing_mark = models.Mark.objects.filter(
-            agent=request.user,
-            buyer=buyer
-        ).first()
-
-        if existing_mark:
-            existing_mark.delete()
-            return JsonResponse({
-                'success': True,
-                'action': 'deleted',
-                'message': 'نشان حذف شد',
-                'is_marked': False
-            })
-        else:
-            mark = models.Mark.objects.create(
-                agent=request.user,
-                buyer=buyer
-            )
+def toggle_marks(request):
+    """
+    Flip the marks of one or many cards ("items" = "sf:12", "by:7", ...) in one request.
+    An optional "state" of "on"/"off" sets them instead, which is safe to repeat.
+    """
+    targets = []
+    for item in request.POST.getlist('items'):
+        mark_type, _, object_id = item.partition(':')
+        if mark_type not in utils.MARK_MODELS or not object_id.isdigit():
             return JsonResponse({
-                'success': True,
-                'action': 'created',
-                'message': 'نشان ایجاد شد',
-                'is_marked': True,
-                'mark_id': mark.id
-            })
-
-    except models.Buyer.DoesNotExist:
-        return JsonResponse({
-            'success': False,
-            'message': 'خریدار یافت نشد'
-        })
-    except Exception as e:
-        return JsonResponse({
-            'success': False,
-            'message': 'خطا در پردازش درخواست'
-        })
-
-
-@login_required
-@require_POST
-def toggle_mark_renter(request, object_type, object_id):
-    if object_type != 'renter':
+                'success': False,
+                'message': 'نوع نامعتبر است'
+            }, status=400)
+        targets.append((mark_type, int(object_id)))
+    state = {'on': True, 'off': False}.get(request.POST.get('state'))
+    if not targets:
         return JsonResponse({
             'success': False,
-            'message': 'نوع نامعتبر است'
-        })
-
-    try:
-        renter = get_object_or_404(models.Renter, id=object_id)
-
-        existing_mark = models.Mark.objects.filter(
-            agent=request.user,
-            renter=renter
-        ).first()
+            'message': 'موردی انتخاب نشده است'
+        }, status=400)
 
-        if existing_mark:
-            existing_mark.delete()
-            return JsonResponse({
-                'success': True,
-                'action': 'deleted',
-                'message': 'نشان حذف شد',
-                'is_marked': False
-            })
-        else:
-            mark = models.Mark.objects.create(
-                agent=request.user,
-                renter=renter
-            )
-            return JsonResponse({
-                'success': True,
-                'action': 'created',
-                'message': 'نشان ایجاد شد',
-                'is_marked': True,
-                'mark_id': mark.id
-            })
-
-    except models.Renter.DoesNotExist:
+    results = utils.toggle_marks(request.user, targets, state=state)
+    if not results:
         return JsonResponse({
             'success': False,
-            'message': 'مستاجر یافت نشد'
-        })
-    except Exception as e:
+            'message': 'مورد یافت نشد'
+        }, status=404)
+    if len(targets) == 1:
+        is_marked = next(iter(results.values()))
         return JsonResponse({
-            'success': False,
-            'message': 'خطا در پردازش درخواست'
+            'success': True,
+            'action': 'created' if is_marked else 'deleted',
+            'message': 'نشان ایجاد شد' if is_marked else 'نشان حذف شد',
+            'is_marked': is_marked
         })
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(results)} مورد بروزرسانی شد',
+        'results': [{'item': f'{mark_type}:{object_id}', 'is_marked': is_marked}
+                    for (mark_type, object_id), is_marked in sorted(results.items())]
+    })
 
 
 # -------------------------------- Reminders -------------------------------
@@ -3234,45 +2814,8 @@ class TaskBossListView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        queryset = models.TaskBoss.objects.select_related(
-            'new_sale_file',
-            'new_sale_file__created_by',
-            'new_sale_file__sub_district',
-            'new_sale_file__person',
-
-            'new_rent_file',
-            'new_rent_file__created_by',
-            'new_rent_file__sub_district',
-            'new_rent_file__person',
-
-            'new_buyer',
-            'new_buyer__created_by',
-            'new_buyer__province',
-            'new_buyer__city',
-            'new_buyer__district',
-
-            'new_renter',
-            'new_renter__created_by',
-            'new_renter__province',
-            'new_renter__city',
-            'new_renter__district',
-
-            'new_person',
-            'new_person__created_by',
-
-            'new_session',
-            'new_session__agent',
-            'new_session__sale_file',
-            'new_session__rent_file',
-            'new_session__buyer',
-            'new_session__renter',
-
-            'result_session',
-            'result_session__agent'
-        ).prefetch_related(
-            'new_buyer__sub_districts',
-            'new_renter__sub_districts'
-        ).filter(condition='op')
+        queryset = models.TaskBoss.objects.filter(condition='op').only(
+            'id', 'code', 'type', 'condition', 'title', 'agent_name', 'location_name', 'datetime_created')
 
         form = forms.TaskBossFilterForm(self.request.GET)
         if form.is_valid() and form.cleaned_data.get('type'):
@@ -3286,11 +2829,56 @@ class TaskBossListView(ListView):
         return context
 
 
+def get_boss_task(pk, code):
+    """
+    Load a task together with the target its type points to, and nothing else.
+    """
+    task_type = get_object_or_404(models.TaskBoss.objects.values_list('type', flat=True), pk=pk, code=code)
+    relations = models.TaskBoss.target_relations.get(task_type, ())
+    return get_object_or_404(models.TaskBoss.objects.select_related(*relations), pk=pk, code=code)
+
+
+@login_required
+@require_POST
+def boss_task_bulk_review(request):
+    if request.user.title != 'bs':
+        return JsonResponse({
+            'success': False,
+            'message': 'غیر مجاز!'
+        }, status=403)
+
+    action = request.POST.get('action')
+    try:
+        task_ids = [int(task_id) for task_id in request.POST.getlist('task_ids')]
+    except ValueError:
+        task_ids = []
+    if action not in ('approve', 'reject') or not task_ids:
+        return JsonResponse({
+            'success': False,
+            'message': 'هیچ وظیفه‌ای انتخاب نشده است'
+        }, status=400)
+
+    results = utils.bulk_review_tasks(task_ids, approve=action == 'approve')
+    done = sum(1 for result in results if result['success'])
+    message = f'{done} وظیفه از {len(results)} وظیفه انتخاب‌شده بررسی شد.'
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': done > 0,
+            'message': message,
+            'results': results
+        })
+    if done:
+        messages.success(request, message)
+    else:
+        messages.warning(request, message)
+    return redirect('boss_task_list')
+
+
 class TaskBossApproveView(View):
     template_name = 'dashboard/boss/boss_task_approve.html'
 
     def get(self, request, pk, code):
-        boss_task = get_object_or_404(models.TaskBoss, pk=pk, code=code)
+        boss_task = get_boss_task(pk, code)
         if boss_task.type == 'sf':
             sale_file = boss_task.new_sale_file
             form = forms.CombinedSaleFileStatusForm(sale_file_instance=sale_file, boss_instance=boss_task)
@@ -3349,7 +2937,7 @@ class TaskBossApproveView(View):
             })
 
     def post(self, request, pk, code):
-        boss_task = get_object_or_404(models.TaskBoss, pk=pk, code=code)
+        boss_task = get_boss_task(pk, code)
         if boss_task.type == 'sf':
             sale_file = boss_task.new_sale_file
             form = forms.CombinedSaleFileStatusForm(request.POST, sale_file_instance=sale_file, boss_instance=boss_task)
@@ -3455,75 +3043,8 @@ class TaskBossDeleteView(PermissionRequiredMixin, DeleteView):
 
 
 def delete_request_list_view(request):
-    context = {}
-    querysets = {
-        'sale_files': models.SaleFile.objects.filter(delete_request='Yes'),
-        'rent_files': models.RentFile.objects.filter(delete_request='Yes'),
-        'buyers': models.Buyer.objects.filter(delete_request='Yes'),
-        'renters': models.Renter.objects.filter(delete_request='Yes'),
-        'persons': models.Person.objects.filter(delete_request='Yes'),
-    }
-
-    all_items = []
-    for item in querysets['sale_files']:
-        item.model_type = 'sale_file'
-        all_items.append(item)
-    for item in querysets['rent_files']:
-        item.model_type = 'rent_file'
-        all_items.append(item)
-    for item in querysets['buyers']:
-        item.model_type = 'buyer'
-        all_items.append(item)
-    for item in querysets['renters']:
-        item.model_type = 'renter'
-        all_items.append(item)
-    for item in querysets['persons']:
-        item.model_type = 'person'
-        all_items.append(item)
-
-    try:
-        all_items.sort(key=attrgetter('created_at'), reverse=True)
-    except AttributeError:
-        try:
-            all_items.sort(key=attrgetter('id'), reverse=True)
-        except AttributeError:
-            pass
-
-    # Pagination
-    paginator = Paginator(all_items, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    paginated_sale_files = []
-    paginated_rent_files = []
-    paginated_buyers = []
-    paginated_renters = []
-    paginated_persons = []
-
-    for item in page_obj:
-        if hasattr(item, 'model_type'):
-            if item.model_type == 'sale_file':
-                paginated_sale_files.append(item)
-            elif item.model_type == 'rent_file':
-                paginated_rent_files.append(item)
-            elif item.model_type == 'buyer':
-                paginated_buyers.append(item)
-            elif item.model_type == 'renter':
-                paginated_renters.append(item)
-            elif item.model_type == 'person':
-                paginated_persons.append(item)
-
-    if paginated_sale_files:
-        context['sale_files'] = paginated_sale_files
-    if paginated_rent_files:
-        context['rent_files'] = paginated_rent_files
-    if paginated_buyers:
-        context['buyers'] = paginated_buyers
-    if paginated_renters:
-        context['renters'] = paginated_renters
-    if paginated_persons:
-        context['persons'] = paginated_persons
-
-    context['page_obj'] = page_obj
+    page_obj = utils.delete_requests_page(request.GET.get('page'))
+    context = {'items': page_obj.object_list, 'page_obj': page_obj}
     return render(request, 'dashboard/boss/delete_item_list.html', context)
 
 
@@ -3640,7 +3161,8 @@ class ReportDetailView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['report_items'] = self.object.ads.all()
+        report_items = list(self.object.ads.select_related('sale_file', 'rent_file', 'buyer', 'renter'))
+        context['report_items'] = models.resolve_report_items(report_items)
         return context
 
 
@@ -3661,18 +3183,16 @@ class ReportListView(ReadOnlyPermissionMixin, ListView):
             date=date
         ).select_related(
             'agent',
-            'agent__sub_district',
-            'agent__sub_district__district',
-            'agent__sub_district__district__city',
-            'agent__sub_district__district__city__province'
+            'agent__sub_district'
         ).order_by('agent__sub_district', 'agent__name_family')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         date = self.kwargs.get('date')
 
+        reports = list(self.object_list)
         reports_by_sub_district = defaultdict(list)
-        for report in self.object_list:
+        for report in reports:
             if report.agent and report.agent.sub_district:
                 sub_district_name = report.agent.sub_district.name
                 reports_by_sub_district[sub_district_name].append(report)
@@ -3680,31 +3200,17 @@ class ReportListView(ReadOnlyPermissionMixin, ListView):
                 reports_by_sub_district['بدون زیرمحله'].append(report)
         reports_by_sub_district = dict(sorted(reports_by_sub_district.items()))
 
-        agents_with_reports = set(self.object_list.values_list('agent_id', flat=True))
-        all_agents = models.CustomUserModel.objects.filter(
-            is_active=True
-        ).exclude(
-            title='bs'
-        ).select_related('sub_district')
-
-        # Find agents without reports
-        agents_without_reports = []
-        for agent in all_agents:
-            if agent.id not in agents_with_reports:
-                display_name = agent.name_family if agent.name_family else agent.username
-                title_display = agent.get_title_display() if agent.title else 'نامشخص'
-                agents_without_reports.append({
-                    'id': agent.id,
-                    'display_name': display_name,
-                    'title': title_display,
-                    'full_info': f"{display_name} - {title_display}"
-                })
+        compliance = utils.report_compliance(date)
+        if conversion.parse_jalali(date):
+            year, month = map(int, str(date).replace('-', '/').split('/')[:2])
+            context['compliance_heatmap'] = utils.compliance_heatmap(year, month)
 
         context['reports_by_sub_district'] = reports_by_sub_district
         context['date'] = date
-        context['total_reports'] = self.object_list.count()
-        context['agents_without_reports'] = agents_without_reports
-        context['missing_reports_count'] = len(agents_without_reports)
+        context['total_reports'] = len(reports)
+        context['agents_without_reports'] = compliance['missing_agents']
+        context['missing_reports_count'] = compliance['missing_count']
+        context['compliance_rate'] = compliance['rate']
         return context
 
 
@@ -3717,49 +3223,20 @@ class SessionListView(ReadOnlyPermissionMixin, ListView):
     permission_model = 'Session'
 
     def get_queryset(self):
-        if self.request.user.title == 'bs':
-            queryset = (models.Session.objects
-                        .select_related('agent', 'agent__sub_district', 'sale_file', 'rent_file', 'buyer', 'renter').all())
-            form = forms.ServiceFilterForm(self.request.GET)
-            if form.is_valid():
-                queryset_filtered = queryset
-                if form.cleaned_data['type']:
-                    queryset_filtered = queryset_filtered.filter(type=form.cleaned_data['type'])
-                if form.cleaned_data['status']:
-                    queryset_filtered = queryset_filtered.filter(status=form.cleaned_data['status'])
-                queryset_filtered = list(queryset_filtered)
-                return queryset_filtered
-            return queryset
-        else:
-            if not self.request.user.sub_district:
+        queryset = models.Session.objects.select_related('agent__sub_district', 'sale_file', 'rent_file', 'buyer',
+                                                         'renter')
+        if self.request.user.title != 'bs':
+            if not self.request.user.sub_district_id:
                 return models.Session.objects.none()
-
-            user_sub_district = self.request.user.sub_district
-            sale_sessions = models.Session.objects.filter(
-                sale_file_code__isnull=False,
-                sale_file_code__in=models.SaleFile.objects.filter(
-                    sub_district=user_sub_district
-                ).values_list('code', flat=True)
-            )
-            rent_sessions = models.Session.objects.filter(
-                rent_file_code__isnull=False,
-                rent_file_code__in=models.RentFile.objects.filter(
-                    sub_district=user_sub_district
-                ).values_list('code', flat=True)
-            )
-            queryset = (sale_sessions | rent_sessions).distinct()
-            queryset = queryset.filter(agent=self.request.user)
-            form = forms.ServiceFilterForm(self.request.GET)
-            if form.is_valid():
-                queryset_filtered = queryset
-                if form.cleaned_data['type']:
-                    queryset_filtered = queryset_filtered.filter(type=form.cleaned_data['type'])
-                if form.cleaned_data['status']:
-                    queryset_filtered = queryset_filtered.filter(status=form.cleaned_data['status'])
-                queryset_filtered = list(queryset_filtered)
-                return queryset_filtered
-
-            return queryset
+            # Uses the (sub_district, agent, -datetime_created) index
+            queryset = queryset.filter(sub_district_id=self.request.user.sub_district_id, agent=self.request.user)
+        form = forms.ServiceFilterForm(self.request.GET)
+        if form.is_valid():
+            if form.cleaned_data['type']:
+                queryset = queryset.filter(type=form.cleaned_data['type'])
+            if form.cleaned_data['status']:
+                queryset = queryset.filter(status=form.cleaned_data['status'])
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -3897,9 +3374,6 @@ class SessionDetailView(ReadOnlyPermissionMixin, DetailView):
         return models.Session.objects.select_related(
             'agent',
             'agent__sub_district',
-            'agent__sub_district__district',
-            'agent__sub_district__district__city',
-            'agent__sub_district__district__city__province',
             'sale_file',
             'rent_file',
             'buyer',
@@ -3934,52 +3408,19 @@ class TradeListView(ReadOnlyPermissionMixin, ListView):
     permission_model = 'Trade'
 
     def get_queryset(self):
-        if self.request.user.title == 'bs':
-            queryset = models.Trade.objects.select_related('session', 'session__agent', 'session__agent__sub_district',
-                                                           'session__sale_file', 'session__rent_file', 'session__buyer',
-                                                           'session__renter').all()
-            form = forms.TradeFilterForm(self.request.GET)
-            if form.is_valid():
-                queryset_filtered = queryset
-                if form.cleaned_data['type']:
-                    queryset_filtered = queryset_filtered.filter(type=form.cleaned_data['type'])
-                if form.cleaned_data['followup_code_status']:
-                    queryset_filtered = queryset_filtered.filter(
-                        followup_code_status=form.cleaned_data['followup_code_status'])
-                queryset_filtered = list(queryset_filtered)
-                return queryset_filtered
-            return queryset
-        else:
-            if not self.request.user.sub_district:
+        queryset = models.Trade.objects.with_parties().select_related('session__agent__sub_district')
+        if self.request.user.title != 'bs':
+            if not self.request.user.sub_district_id:
                 return models.Trade.objects.none()
-
-            user_sub_district = self.request.user.sub_district
-            sale_trades = models.Trade.objects.filter(
-                session__sale_file_code__isnull=False,
-                session__sale_file_code__in=models.SaleFile.objects.filter(
-                    sub_district=user_sub_district
-                ).values_list('code', flat=True)
-            )
-            rent_trades = models.Trade.objects.filter(
-                session__rent_file_code__isnull=False,
-                session__rent_file_code__in=models.RentFile.objects.filter(
-                    sub_district=user_sub_district
-                ).values_list('code', flat=True)
-            )
-            queryset = (sale_trades | rent_trades).distinct()
-            queryset = queryset.filter(session__agent=self.request.user)
-            form = forms.TradeFilterForm(self.request.GET)
-            if form.is_valid():
-                queryset_filtered = queryset
-                if form.cleaned_data['type']:
-                    queryset_filtered = queryset_filtered.filter(type=form.cleaned_data['type'])
-                if form.cleaned_data['followup_code_status']:
-                    queryset_filtered = queryset_filtered.filter(
-                        followup_code_status=form.cleaned_data['followup_code_status'])
-                queryset_filtered = list(queryset_filtered)
-                return queryset_filtered
-
-            return queryset
+            queryset = queryset.filter(session__sub_district_id=self.request.user.sub_district_id,
+                                       session__agent=self.request.user)
+        form = forms.TradeFilterForm(self.request.GET)
+        if form.is_valid():
+            if form.cleaned_data['type']:
+                queryset = queryset.filter(type=form.cleaned_data['type'])
+            if form.cleaned_data['followup_code_status']:
+                queryset = queryset.filter(followup_code_status=form.cleaned_data['followup_code_status'])
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4037,6 +3478,7 @@ class TradeUpdateView(PermissionRequiredMixin, UpdateView):
 
 class TradeDetailView(ReadOnlyPermissionMixin, DetailView):
     model = models.Trade
+    queryset = models.Trade.objects.with_parties()
     context_object_name = 'trade'
     template_name = 'dashboard/services/trade_detail.html'
     permission_model = 'Trade'
@@ -4065,208 +3507,104 @@ class TradeCodeView(PermissionRequiredMixin, UpdateView):
 
 
 # -------------------------------- Calendar -------------------------------
-def calendar_current_month_view(request):
-    user = request.user
-    now = timezone.now()
-    today = datetime2jalali(now)
-    month = functions.current_month()
-    current_month = functions.current_month_finder(today.month)
-    previous_month = functions.previous_month_finder(today.month)
-    previous_2_month = functions.previous_2_month_finder(today.month)
-    next_month = functions.next_month_finder(today.month)
-    next_2_month = functions.next_2_month_finder(today.month)
-
-    # Reports
-    user_reports = models.Report.objects.filter(
-        agent=user
-    ).values_list('date', flat=True)
-    report_dates = set(user_reports)
-    days_data = []
-    today_str = today.strftime('%Y/%m/%d')
-    for day in month:
-        day_info = {
-            'date': day,
-            'weekday': None,
-            'is_today': day == today_str,
-            'is_past': day < today_str,
-            'is_future': day > today_str,
-            'has_report': day in report_dates,
-        }
-        days_data.append(day_info)
-    context = {
-        'user': user,
-        'today': today_str,
-        'month': month,
-        'days_data': days_data,
-        'current_month': current_month,
-        'previous_month': previous_month,
-        'previous_2_month': previous_2_month,
-        'next_month': next_month,
-        'next_2_month': next_2_month,
+def month_activity(user, year, month):
+    first_day, last_day = functions.month_bounds(year, month)
+    activity = defaultdict(lambda: {'reports': 0, 'reminders': 0, 'sessions': 0})
+    # The user's own activity, bosses included, as the month pages have always shown
+    querysets = {
+        'reports': models.Report.objects.filter(agent=user),
+        'reminders': models.Reminder.objects.filter(agent=user),
+        'sessions': models.Session.objects.filter(agent=user),
     }
-    return render(request, 'dashboard/calendar/current.html', context=context)
+    for key, queryset in querysets.items():
+        rows = (queryset.filter(date__range=(first_day, last_day))
+                .order_by().values('date').annotate(count=Count('id')))
+        for row in rows:
+            activity[row['date']][key] = row['count']
+    return activity
 
 
-def calendar_previous_month_view(request):
-    user = request.user
-    now = timezone.now()
-    today = datetime2jalali(now)
-    month = functions.previous_month()
-    current_month = functions.current_month_finder(today.month)
-    previous_month = functions.previous_month_finder(today.month)
-    previous_2_month = functions.previous_2_month_finder(today.month)
-    next_month = functions.next_month_finder(today.month)
-    next_2_month = functions.next_2_month_finder(today.month)
-
-    # Reports
-    user_reports = models.Report.objects.filter(
-        agent=user
-    ).values_list('date', flat=True)
-    report_dates = set(user_reports)
+def calendar_context(user, year, month):
+    today = functions.jalali_today()
+    today_str = conversion.format_jalali(*today)
+    grid = functions.month_grid(year, month)
+    activity = month_activity(user, year, month)
+
     days_data = []
-    today_str = today.strftime('%Y/%m/%d')
-    for day in month:
+    for day in grid:
+        counts = activity.get(day.date, {})
         day_info = {
-            'date': day,
-            'weekday': None,
-            'is_today': day == today_str,
-            'is_past': day < today_str,
-            'is_future': day > today_str,
-            'has_report': day in report_dates,
+            'date': day.date,
+            'weekday': day.weekday_name,
+            'is_holiday': day.is_holiday,
+            'is_today': day.date == today_str,
+            'is_past': day.date < today_str,
+            'is_future': day.date > today_str,
+            'has_report': counts.get('reports', 0) > 0,
+            'report_count': counts.get('reports', 0),
+            'reminder_count': counts.get('reminders', 0),
+            'session_count': counts.get('sessions', 0),
         }
         days_data.append(day_info)
 
-    context = {
+    previous_year, previous_month = functions.shift_month(year, month, -1)
+    next_year, next_month = functions.shift_month(year, month, 1)
+    return {
         'user': user,
         'today': today_str,
-        'month': month,
+        'year': year,
+        'month_number': month,
+        'month_name': functions.month_name(month),
+        'month': [day.date for day in grid],
         'days_data': days_data,
-        'current_month': current_month,
-        'previous_month': previous_month,
-        'previous_2_month': previous_2_month,
-        'next_month': next_month,
-        'next_2_month': next_2_month,
+        'current_month': functions.month_name(today.month),
+        'previous_month': functions.month_name(today.month, -1),
+        'previous_2_month': functions.month_name(today.month, -2),
+        'next_month': functions.month_name(today.month, 1),
+        'next_2_month': functions.month_name(today.month, 2),
+        'current_year_month': (today.year, today.month),
+        'previous_year_month': (previous_year, previous_month),
+        'next_year_month': (next_year, next_month),
     }
+
+
+def offset_calendar_context(user, offset):
+    today = functions.jalali_today()
+    year, month = functions.shift_month(today.year, today.month, offset)
+    return calendar_context(user, year, month)
+
+
+def calendar_current_month_view(request):
+    context = offset_calendar_context(request.user, 0)
+    return render(request, 'dashboard/calendar/current.html', context=context)
+
+
+def calendar_previous_month_view(request):
+    context = offset_calendar_context(request.user, -1)
     return render(request, 'dashboard/calendar/previous.html', context=context)
 
 
 def calendar_previous_2_month_view(request):
-    user = request.user
-    now = timezone.now()
-    today = datetime2jalali(now)
-    month = functions.previous_2_month()
-    current_month = functions.current_month_finder(today.month)
-    previous_month = functions.previous_month_finder(today.month)
-    previous_2_month = functions.previous_2_month_finder(today.month)
-    next_month = functions.next_month_finder(today.month)
-    next_2_month = functions.next_2_month_finder(today.month)
-
-    # Reports
-    user_reports = models.Report.objects.filter(
-        agent=user
-    ).values_list('date', flat=True)
-    report_dates = set(user_reports)
-    days_data = []
-    today_str = today.strftime('%Y/%m/%d')
-    for day in month:
-        day_info = {
-            'date': day,
-            'weekday': None,
-            'is_today': day == today_str,
-            'is_past': day < today_str,
-            'is_future': day > today_str,
-            'has_report': day in report_dates,
-        }
-        days_data.append(day_info)
-
-    context = {
-        'user': user,
-        'today': today_str,
-        'month': month,
-        'days_data': days_data,
-        'current_month': current_month,
-        'previous_month': previous_month,
-        'previous_2_month': previous_2_month,
-        'next_month': next_month,
-        'next_2_month': next_2_month,
-    }
+    context = offset_calendar_context(request.user, -2)
     return render(request, 'dashboard/calendar/2previous.html', context=context)
 
 
 def calendar_next_month_view(request):
-    user = request.user
-    now = timezone.now()
-    today = datetime2jalali(now)
-    month = functions.next_month()
-    current_month = functions.current_month_finder(today.month)
-    previous_month = functions.previous_month_finder(today.month)
-    previous_2_month = functions.previous_2_month_finder(today.month)
-    next_month = functions.next_month_finder(today.month)
-    next_2_month = functions.next_2_month_finder(today.month)
-
-    days_data = []
-    today_str = today.strftime('%Y/%m/%d')
-    for day in month:
-        day_info = {
-            'date': day,
-            'weekday': None,
-            'is_today': day == today_str,
-            'is_past': day < today_str,
-            'is_future': day > today_str,
-            'has_report': False,
-        }
-        days_data.append(day_info)
-
-    context = {
-        'user': user,
-        'today': today_str,
-        'month': month,
-        'days_data': days_data,
-        'current_month': current_month,
-        'previous_month': previous_month,
-        'previous_2_month': previous_2_month,
-        'next_month': next_month,
-        'next_2_month': next_2_month,
-    }
+    context = offset_calendar_context(request.user, 1)
     return render(request, 'dashboard/calendar/next.html', context=context)
 
 
 def calendar_next_2_month_view(request):
-    user = request.user
-    now = timezone.now()
-    today = datetime2jalali(now)
-    month = functions.next_2_month()
-    current_month = functions.current_month_finder(today.month)
-    previous_month = functions.previous_month_finder(today.month)
-    previous_2_month = functions.previous_2_month_finder(today.month)
-    next_month = functions.next_month_finder(today.month)
-    next_2_month = functions.next_2_month_finder(today.month)
+    context = offset_calendar_context(request.user, 2)
+    return render(request, 'dashboard/calendar/2next.html', context=context)
 
-    days_data = []
-    today_str = today.strftime('%Y/%m/%d')
-    for day in month:
-        day_info = {
-            'date': day,
-            'weekday': None,
-            'is_today': day == today_str,
-            'is_past': day < today_str,
-            'is_future': day > today_str,
-            'has_report': False,
-        }
-        days_data.append(day_info)
 
-    context = {
-        'user': user,
-        'today': today_str,
-        'month': month,
-        'days_data': days_data,
-        'current_month': current_month,
-        'previous_month': previous_month,
-        'previous_2_month': previous_2_month,
-        'next_month': next_month,
-        'next_2_month': next_2_month,
-    }
-    return render(request, 'dashboard/calendar/2next.html', context=context)
+@login_required
+def calendar_month_view(request, year, month):
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise Http404
+    context = calendar_context(request.user, year, month)
+    return render(request, 'dashboard/calendar/month.html', context=context)
 
 
 # ------------------------------- Interactions ------------------------------
@@ -4366,8 +3704,7 @@ class AnnouncementDetailView(LoginRequiredMixin, DetailView):
         area_max = 1.2 * buyer.area_max
 
         suggested_files = models.SaleFile.objects.select_related(
-            'created_by', 'sub_district', 'sub_district__district',
-            'sub_district__district__city', 'sub_district__district__city__province'
+            'created_by', 'sub_district'
         ).filter(
             created_by=self.request.user,
             status='acc',
@@ -4389,8 +3726,7 @@ class AnnouncementDetailView(LoginRequiredMixin, DetailView):
         renter_total_max = 1.2 * (renter.deposit_announced + 100 * (renter.rent_announced / 3))
 
         base_queryset = models.RentFile.objects.select_related(
-            'created_by', 'sub_district', 'sub_district__district',
-            'sub_district__district__city', 'sub_district__district__city__province'
+            'created_by', 'sub_district'
         ).filter(
             created_by=self.request.user
         ).annotate(
@@ -0,0 +1,151 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+from django.utils import timezone
+
+
+# Same arithmetic 33-year cycle jdatetime uses, so results match the dates already stored as strings.
+leap_residues = frozenset({1, 5, 9, 13, 17, 22, 26, 30})
+month_offsets = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336)
+# Proleptic Gregorian ordinal of 0001/01/01 (Jalali)
+epoch = date(622, 3, 21).toordinal()
+cycle_days = 12053
+weekday_names = ('شنبه', 'یکشنبه', 'دوشنبه', 'سه‌شنبه', 'چهارشنبه', 'پنج‌شنبه', 'جمعه')
+_leaps_before_residue = tuple(sum(1 for r in range(1, n) if r in leap_residues) for n in range(35))
+
+
+def is_leap(year):
+    return year % 33 in leap_residues
+
+
+@lru_cache(maxsize=None)
+def year_start(year):
+    """
+    Gregorian ordinal of the first day (Farvardin 1st) of a Jalali year.
+    """
+    cycles, rest = divmod(year - 1, 33)
+    return epoch + 365 * (year - 1) + cycles * 8 + _leaps_before_residue[rest + 1]
+
+
+def jalali_to_ordinal(year, month, day):
+    return year_start(year) + month_offsets[month - 1] + day - 1
+
+
+@lru_cache(maxsize=8192)
+def ordinal_to_jalali(ordinal):
+    """
+    Args:
+        ordinal: proleptic Gregorian ordinal, as returned by date.toordinal()
+
+    Returns:
+        (year, month, day) tuple in the Jalali calendar
+    """
+    year = (ordinal - epoch) * 33 // cycle_days + 1
+    while year_start(year) > ordinal:
+        year -= 1
+    while year_start(year + 1) <= ordinal:
+        year += 1
+    day_of_year = ordinal - year_start(year)
+    if day_of_year < 186:
+        month, day = divmod(day_of_year, 31)
+    else:
+        month, day = divmod(day_of_year - 186, 30)
+        month += 6
+    return year, month + 1, day + 1
+
+
+def _to_ordinal(value):
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    return value.toordinal()
+
+
+def gregorian_to_jalali(value):
+    """
+    Convert a date/datetime to a (year, month, day) Jalali tuple.
+    """
+    return ordinal_to_jalali(_to_ordinal(value))
+
+
+def jalali_to_gregorian(year, month, day):
+    return date.fromordinal(jalali_to_ordinal(year, month, day))
+
+
+def format_jalali(year, month, day):
+    return f'{year:04d}/{month:02d}/{day:02d}'
+
+
+def jalali_string(value):
+    """
+    'YYYY/MM/DD' Jalali string of a date/datetime, or '' for empty values.
+    """
+    if not value:
+        return ''
+    return format_jalali(*gregorian_to_jalali(value))
+
+
+def parse_jalali(text):
+    """
+    Parse a 'YYYY/MM/DD' (or 'YYYY-MM-DD') Jalali string.
+
+    Returns:
+        Gregorian date, or None when the text is not a valid Jalali date
+    """
+    try:
+        year, month, day = map(int, str(text).strip().replace('-', '/').split('/'))
+    except (TypeError, ValueError):
+        return None
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return None
+    if day > (31 if month <= 6 else 30 if month <= 11 else 30 if is_leap(year) else 29):
+        return None
+    try:
+        return jalali_to_gregorian(year, month, day)
+    except (ValueError, OverflowError):
+        # Past the end of datetime.date (year 9999, Jalali 9378/10/10)
+        return None
+
+
+def jalali_strings(values):
+    """
+    Batch version of jalali_string: converts a whole column of dates at once.
+    Each distinct calendar day is converted only once.
+    """
+    converted = {}
+    result = []
+    for value in values:
+        if not value:
+            result.append('')
+            continue
+        ordinal = _to_ordinal(value)
+        text = converted.get(ordinal)
+        if text is None:
+            text = converted[ordinal] = format_jalali(*ordinal_to_jalali(ordinal))
+        result.append(text)
+    return result
+
+
+def gregorian_dates(texts):
+    """
+    Batch version of parse_jalali.
+    """
+    converted = {}
+    result = []
+    for text in texts:
+        if text not in converted:
+            converted[text] = parse_jalali(text)
+        result.append(converted[text])
+    return result
+
+
+def ordinal_weekday(ordinal):
+    """
+    Jalali weekday of a Gregorian ordinal, with Saturday as 0 and Friday as 6 like jdatetime.
+    """
+    return (ordinal + 1) % 7
+
+
+def jalali_weekday(value):
+    return ordinal_weekday(_to_ordinal(value))
@@ -0,0 +1,23 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+from jalali.conversion import parse_jalali
+
+
+class JalaliDateField(forms.CharField):
+    """
+    Text input holding a Jalali 'YYYY/MM/DD' (or 'YYYY-MM-DD') date.
+    Cleans to the matching Gregorian date, so views can filter indexed date/datetime columns directly.
+    """
+    default_error_messages = {
+        'invalid': 'تاریخ وارد شده معتبر نیست (قالب صحیح: 1403/01/15)',
+    }
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return None
+        gregorian_date = parse_jalali(value)
+        if gregorian_date is None:
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        return gregorian_date
@@ -0,0 +1,58 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import jdatetime
+from jalali_date import datetime2jalali
+from django.core.management.base import BaseCommand
+
+from jalali import conversion
+
+
+class Command(BaseCommand):
+    help = 'Compare jalali.conversion against jdatetime on a column of random datetimes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='Number of datetimes to convert')
+        parser.add_argument('--days', type=int, default=365, help='Spread the datetimes over this many days')
+
+    def handle(self, *args, **options):
+        now = datetime.now()
+        values = [now - timedelta(days=random.randrange(options['days']), seconds=random.randrange(86400))
+                  for _ in range(options['size'])]
+        self.stdout.write(f"Converting {len(values)} datetimes spread over {options['days']} days")
+
+        timings = []
+        start = time.perf_counter()
+        expected = [datetime2jalali(value).strftime('%Y/%m/%d') for value in values]
+        timings.append(('jdatetime (datetime2jalali + strftime)', time.perf_counter() - start))
+
+        conversion.ordinal_to_jalali.cache_clear()
+        start = time.perf_counter()
+        single = [conversion.jalali_string(value) for value in values]
+        timings.append(('conversion.jalali_string', time.perf_counter() - start))
+
+        conversion.ordinal_to_jalali.cache_clear()
+        start = time.perf_counter()
+        batch = conversion.jalali_strings(values)
+        timings.append(('conversion.jalali_strings (batch)', time.perf_counter() - start))
+
+        texts = expected
+        start = time.perf_counter()
+        parsed_expected = [jdatetime.datetime.strptime(text, '%Y/%m/%d').togregorian().date() for text in texts]
+        timings.append(('jdatetime (strptime + togregorian)', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        parsed = conversion.gregorian_dates(texts)
+        timings.append(('conversion.gregorian_dates (batch)', time.perf_counter() - start))
+
+        # Rows 0-2 format datetimes and rows 3-4 parse strings; each group is compared to its jdatetime row.
+        for index, (label, seconds) in enumerate(timings):
+            baseline = timings[0 if index < 3 else 3][1]
+            speedup = baseline / seconds if seconds else 0
+            self.stdout.write(f'{label:<42} {seconds * 1000:10.1f} ms   x{speedup:7.1f}')
+
+        if single != expected or batch != expected or parsed != parsed_expected:
+            self.stdout.write(self.style.ERROR('Results differ from jdatetime'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Results match jdatetime'))
@@ -1,11 +1,12 @@
 from django import template
-from jalali_date import datetime2jalali
+
+from jalali.conversion import jalali_string
 
 register = template.Library()
 
 
 @register.filter
 def jalali_date_converter(a_date):
-    return datetime2jalali(a_date).strftime('%Y/%m/%d')
+    return jalali_string(a_date)
 
 
@@ -1,5 +1,6 @@
 from django import template
-import jdatetime
+
+from jalali.conversion import jalali_weekday, parse_jalali, weekday_names
 
 
 register = template.Library()
@@ -8,23 +9,12 @@ register = template.Library()
 @register.filter
 def weekday_finder(day):
     try:
-        if hasattr(day, 'strftime'):
-            date_obj = day
-        else:
-            year, month, day_num = map(int, day.split('/'))
-            date_obj = jdatetime.date(year, month, day_num)
-        weekday_en = date_obj.strftime('%A')
-        weekday_map = {
-            'Monday': 'دوشنبه',
-            'Tuesday': 'سه‌شنبه',
-            'Wednesday': 'چهارشنبه',
-            'Thursday': 'پنج‌شنبه',
-            'Friday': 'جمعه',
-            'Saturday': 'شنبه',
-            'Sunday': 'یکشنبه'
-        }
-        return weekday_map.get(weekday_en, 'نامشخص')
-    except:
+        if hasattr(day, 'togregorian'):
+            day = day.togregorian()
+        elif not hasattr(day, 'strftime'):
+            day = parse_jalali(day)
+        return weekday_names[jalali_weekday(day)] if day is not None else 'نامشخص'
+    except (AttributeError, TypeError, ValueError, OverflowError):
         return 'نامشخص'
 
 
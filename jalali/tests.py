@@ -1,3 +1,60 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+import jdatetime
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from . import conversion
+from .fields import JalaliDateField
+from .templatetags.weekday_finder import weekday_finder
+
+
+class ConversionTest(SimpleTestCase):
+    # Every day from 1900 to 2100, which covers all dates stored by the dashboard
+    first_day = date(1900, 1, 1).toordinal()
+    last_day = date(2100, 12, 31).toordinal()
+
+    def test_matches_jdatetime(self):
+        for ordinal in range(self.first_day, self.last_day + 1):
+            value = date.fromordinal(ordinal)
+            expected = jdatetime.date.fromgregorian(date=value)
+            jalali = conversion.gregorian_to_jalali(value)
+            self.assertEqual(jalali, (expected.year, expected.month, expected.day), value)
+            self.assertEqual(conversion.jalali_to_gregorian(*jalali), value)
+            self.assertEqual(conversion.jalali_weekday(value), expected.weekday(), value)
+            self.assertEqual(conversion.is_leap(jalali[0]), expected.isleap(), value)
+
+    def test_strings(self):
+        value = datetime(2025, 3, 20, 23, 30)
+        self.assertEqual(conversion.jalali_string(value), '1403/12/30')
+        self.assertEqual(conversion.jalali_string(value + timedelta(hours=1)), '1404/01/01')
+        self.assertEqual(conversion.jalali_string(None), '')
+        self.assertEqual(conversion.parse_jalali('1404-01-01'), date(2025, 3, 21))
+        self.assertEqual(conversion.parse_jalali('1403/12/30'), date(2025, 3, 20))
+        self.assertEqual(conversion.parse_jalali('9378/10/10'), date.max)
+        for text in ('1404/12/30', '1404/13/01', '1404/07/31', '1404/01/00', '1404/01', 'abc', None,
+                     '0/01/01', '9378/10/11', '9999/01/01'):
+            self.assertIsNone(conversion.parse_jalali(text), text)
+
+    def test_batches_match_single_conversions(self):
+        values = [date(2024, 3, 20), None, datetime(2024, 3, 20, 8), date(2025, 9, 22)]
+        texts = conversion.jalali_strings(values)
+        self.assertEqual(texts, [conversion.jalali_string(value) for value in values])
+        self.assertEqual(conversion.gregorian_dates(texts + ['1404/12/30']),
+                         [conversion.parse_jalali(text) for text in texts] + [None])
+
+
+class InputTest(SimpleTestCase):
+    def test_out_of_range_dates_are_invalid(self):
+        field = JalaliDateField(required=False)
+        self.assertEqual(field.clean('1404/01/01'), date(2025, 3, 21))
+        for text in ('9999/01/01', '0/01/01', '1404/13/01'):
+            with self.assertRaises(ValidationError):
+                field.clean(text)
+
+    def test_weekday_finder(self):
+        self.assertEqual(weekday_finder('1404/01/01'), 'جمعه')
+        self.assertEqual(weekday_finder(jdatetime.date(1404, 1, 1)), 'جمعه')
+        self.assertEqual(weekday_finder(date(2025, 3, 21)), 'جمعه')
+        for value in ('9999/01/01', 'abc', None, 1404):
+            self.assertEqual(weekday_finder(value), 'نامشخص')
@@ -0,0 +1,77 @@
+// Cascading location selects for the filter forms and person autocomplete for the filter and file forms.
+// Location selects carry data-choices-url (and data-parent, the name of the parent select);
+// person selects carry data-autocomplete-url. Both endpoints answer with {success, results: [{id, name}]}
+// (person results also carry the phone) and send an ETag, so the browser revalidates repeated requests with a 304.
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-choices-url][data-parent]').forEach(function(select) {
+        const parent = select.form && select.form.elements[select.dataset.parent];
+        if (!parent) {
+            return;
+        }
+        parent.addEventListener('change', function() {
+            loadLocationChoices(select, parent.value);
+        });
+    });
+
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(initPersonAutocomplete);
+});
+
+function fillSelect(select, results, keepSelected) {
+    const kept = keepSelected ? Array.from(select.selectedOptions).filter(option => option.value) : [];
+    select.innerHTML = select.multiple ? '' : '<option value="">---------</option>';
+    kept.forEach(option => select.add(option));
+    results.forEach(function(item) {
+        if (!kept.some(option => option.value === String(item.id))) {
+            select.add(new Option(item.name, item.id));
+        }
+    });
+}
+
+function loadLocationChoices(select, parentId) {
+    // Emptying the select first also clears the levels below it through their own change listeners
+    fillSelect(select, [], false);
+    select.dispatchEvent(new Event('change'));
+    if (!parentId) {
+        return;
+    }
+    fetch(select.dataset.choicesUrl + '?parent=' + encodeURIComponent(parentId), {credentials: 'same-origin'})
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                fillSelect(select, data.results, false);
+            }
+        });
+}
+
+function initPersonAutocomplete(select) {
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control mb-1';
+    input.placeholder = 'جستجوی نام یا شماره تلفن';
+    select.parentNode.insertBefore(input, select);
+
+    function search(query) {
+        fetch(select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query), {credentials: 'same-origin'})
+            .then(response => response.json())
+            .then(data => {
+                if (data.success && input.value.trim() === query) {
+                    const results = data.results.map(item => ({id: item.id, name: `${item.name} (${item.phone})`}));
+                    fillSelect(select, results, true);
+                }
+            });
+    }
+
+    // An empty query returns the persons this user picked or registered recently
+    let timer = null;
+    input.addEventListener('focus', function() {
+        if (!input.value.trim()) {
+            search('');
+        }
+    }, {once: true});
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        timer = setTimeout(() => search(query), 250);
+    });
+}
@@ -61,7 +61,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 'X-CSRFToken': csrfToken,
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
-            body: 'csrfmiddlewaretoken=' + encodeURIComponent(csrfToken),
+            // csrf token plus the hidden "items" input (e.g. "sf:12")
+            body: new URLSearchParams(new FormData(form)),
             credentials: 'same-origin'
         })
         .then(response => {
@@ -130,6 +131,27 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Mark (state 'on'), unmark ('off') or flip (no state) many cards with one request,
+    // e.g. toggleMarks(['sf:12', 'sf:15'], 'on'). Resolves to the JSON response.
+    window.toggleMarks = function(items, state) {
+        const form = document.querySelector('form.mark-form');
+        if (!form) {
+            return Promise.reject(new Error('No mark form on this page'));
+        }
+        const body = new URLSearchParams();
+        body.append('csrfmiddlewaretoken', form.querySelector('[name=csrfmiddlewaretoken]').value);
+        items.forEach(item => body.append('items', item));
+        if (state) {
+            body.append('state', state);
+        }
+        return fetch(form.action, {
+            method: 'POST',
+            headers: {'X-Requested-With': 'XMLHttpRequest'},
+            body: body,
+            credentials: 'same-origin'
+        }).then(response => response.json());
+    };
+
     function showInlineMessage(button, message, type) {
         // Remove existing message
         const existing = button.parentNode.querySelector('.mark-message');